@@ -0,0 +1,64 @@
+"""Add equipment allocation windows
+
+Revision ID: a3c5e7f9b680
+Revises: f2b4d6e8a579
+Create Date: 2026-10-19 15:48:12.604327
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e7f9b680'
+down_revision: Union[str, Sequence[str], None] = 'f2b4d6e8a579'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('package_equipment',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('package_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['package_id'], ['packages.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_package_equipment_id'), 'package_equipment', ['id'], unique=False)
+    op.create_index(op.f('ix_package_equipment_package_id'), 'package_equipment', ['package_id'], unique=False)
+
+    op.add_column('equipment_assignments', sa.Column('starts_at', sa.DateTime(), nullable=True))
+    op.add_column('equipment_assignments', sa.Column('ends_at', sa.DateTime(), nullable=True))
+    # Existing assignments take their event's window (4h when the duration is unknown)
+    op.execute(
+        "UPDATE equipment_assignments AS a SET starts_at = e.date, "
+        "ends_at = e.date + make_interval(secs => COALESCE(e.duration_hours, 4) * 3600) "
+        "FROM events AS e WHERE e.id = a.event_id"
+    )
+    op.alter_column('equipment_assignments', 'starts_at', nullable=False)
+    op.alter_column('equipment_assignments', 'ends_at', nullable=False)
+    op.create_index(op.f('ix_equipment_assignments_event_id'), 'equipment_assignments', ['event_id'], unique=False)
+    op.create_index(op.f('ix_equipment_assignments_equipment_id'), 'equipment_assignments', ['equipment_id'], unique=False)
+    # Same guarantee as booking_slots: one item cannot be in two places at once.
+    # Fails if legacy assignments already overlap; those must be fixed by hand first.
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        "ALTER TABLE equipment_assignments ADD CONSTRAINT equipment_assignments_no_overlap "
+        "EXCLUDE USING gist (equipment_id WITH =, tsrange(starts_at, ends_at, '[)') WITH &&)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('equipment_assignments_no_overlap', 'equipment_assignments')
+    op.drop_index(op.f('ix_equipment_assignments_equipment_id'), table_name='equipment_assignments')
+    op.drop_index(op.f('ix_equipment_assignments_event_id'), table_name='equipment_assignments')
+    op.drop_column('equipment_assignments', 'ends_at')
+    op.drop_column('equipment_assignments', 'starts_at')
+    op.drop_index(op.f('ix_package_equipment_package_id'), table_name='package_equipment')
+    op.drop_index(op.f('ix_package_equipment_id'), table_name='package_equipment')
+    op.drop_table('package_equipment')
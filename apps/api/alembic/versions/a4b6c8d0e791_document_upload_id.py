@@ -0,0 +1,30 @@
+"""Add document upload id
+
+Revision ID: a4b6c8d0e791
+Revises: e3a5b7c9d680
+Create Date: 2026-10-19 23:12:04.581930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4b6c8d0e791'
+down_revision: Union[str, Sequence[str], None] = 'e3a5b7c9d680'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('upload_id', sa.String(), nullable=True))
+    op.create_index(op.f('ix_documents_upload_id'), 'documents', ['upload_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_documents_upload_id'), table_name='documents')
+    op.drop_column('documents', 'upload_id')
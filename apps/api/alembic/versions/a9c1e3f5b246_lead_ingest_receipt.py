@@ -0,0 +1,33 @@
+"""Add lead receipt and creation time
+
+Revision ID: a9c1e3f5b246
+Revises: f8b0d2e4a135
+Create Date: 2026-10-19 20:31:45.107362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c1e3f5b246'
+down_revision: Union[str, Sequence[str], None] = 'f8b0d2e4a135'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('leads', sa.Column('receipt', sa.String(length=36), nullable=True))
+    op.add_column('leads', sa.Column('created_at', sa.DateTime(), nullable=True))
+    # Batched inserts skip receipts already written, so replays are harmless
+    op.create_unique_constraint('leads_receipt_key', 'leads', ['receipt'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('leads_receipt_key', 'leads', type_='unique')
+    op.drop_column('leads', 'created_at')
+    op.drop_column('leads', 'receipt')
@@ -0,0 +1,39 @@
+"""Add lead search indexes
+
+Revision ID: b0d2f4a6c357
+Revises: a9c1e3f5b246
+Create Date: 2026-10-19 21:06:18.664021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b0d2f4a6c357'
+down_revision: Union[str, Sequence[str], None] = 'a9c1e3f5b246'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_leads_status_id', 'leads', ['status', 'id'], unique=False)
+    op.create_index('ix_leads_source_id', 'leads', ['source', 'id'], unique=False)
+    op.create_index('ix_leads_event_type_id', 'leads', ['event_type', 'id'], unique=False)
+    op.create_index('ix_leads_event_date_id', 'leads', ['event_date', 'id'], unique=False)
+    # Must stay identical to services.lead_search.search_vector
+    op.execute(
+        "CREATE INDEX ix_leads_search ON leads USING gin "
+        "(to_tsvector('spanish'::regconfig, coalesce(message, '') || ' ' || coalesce(interested_services, '')))"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_leads_search")
+    op.drop_index('ix_leads_event_date_id', table_name='leads')
+    op.drop_index('ix_leads_event_type_id', table_name='leads')
+    op.drop_index('ix_leads_source_id', table_name='leads')
+    op.drop_index('ix_leads_status_id', table_name='leads')
@@ -0,0 +1,34 @@
+"""Reuse pending payment preferences
+
+Revision ID: b2d4f6a8c013
+Revises: 0f95423c7d44
+Create Date: 2026-10-19 10:12:31.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a8c013'
+down_revision: Union[str, Sequence[str], None] = '0f95423c7d44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('payments', sa.Column('mp_init_point', sa.String(), nullable=True))
+    op.add_column('payments', sa.Column('checkout_key', sa.String(), nullable=True))
+    op.add_column('payments', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_payments_checkout_key'), 'payments', ['checkout_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_payments_checkout_key'), table_name='payments')
+    op.drop_column('payments', 'expires_at')
+    op.drop_column('payments', 'checkout_key')
+    op.drop_column('payments', 'mp_init_point')
@@ -0,0 +1,38 @@
+"""Add inventory counters
+
+Revision ID: b4d6f8a0c791
+Revises: a3c5e7f9b680
+Create Date: 2026-10-19 16:31:55.087214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d6f8a0c791'
+down_revision: Union[str, Sequence[str], None] = 'a3c5e7f9b680'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('inventory_counters',
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('status', postgresql.ENUM('AVAILABLE', 'IN_USE', 'MAINTENANCE', 'MISSING', name='equipmentstatus', create_type=False), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('category', 'status')
+    )
+    op.execute(
+        "INSERT INTO inventory_counters (category, status, count) "
+        "SELECT COALESCE(category, ''), status, COUNT(*) FROM equipment GROUP BY 1, 2"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('inventory_counters')
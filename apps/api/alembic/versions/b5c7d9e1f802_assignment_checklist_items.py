@@ -0,0 +1,35 @@
+"""Backfill checklist items for equipment assignments
+
+Revision ID: b5c7d9e1f802
+Revises: a4b6c8d0e791
+Create Date: 2026-10-20 10:14:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5c7d9e1f802'
+down_revision: Union[str, Sequence[str], None] = 'a4b6c8d0e791'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Allocation now creates one item per assignment; give older assignments theirs
+    op.execute("""
+        INSERT INTO checklist_items (assignment_id, name, checked_out, checked_in)
+        SELECT a.id, e.name, false, false
+        FROM equipment_assignments a
+        JOIN equipment e ON e.id = a.equipment_id
+        WHERE NOT EXISTS (SELECT 1 FROM checklist_items c WHERE c.assignment_id = a.id)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The backfilled rows cannot be told apart from allocated ones; they stay
+    pass
@@ -0,0 +1,53 @@
+"""Add lead duplicate detection keys
+
+Revision ID: c1e3a5b7d468
+Revises: b0d2f4a6c357
+Create Date: 2026-10-19 21:52:40.281936
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1e3a5b7d468'
+down_revision: Union[str, Sequence[str], None] = 'b0d2f4a6c357'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('lead_match_keys',
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('lead_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['lead_id'], ['leads.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('key', 'lead_id')
+    )
+    op.create_index(op.f('ix_lead_match_keys_lead_id'), 'lead_match_keys', ['lead_id'], unique=False)
+    op.create_table('lead_match_blocks',
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.add_column('leads', sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+    op.add_column('leads', sa.Column('dedup_checked_at', sa.DateTime(), nullable=True))
+    op.create_foreign_key('leads_duplicate_of_id_fkey', 'leads', 'leads', ['duplicate_of_id'], ['id'])
+    op.create_index(op.f('ix_leads_duplicate_of_id'), 'leads', ['duplicate_of_id'], unique=False)
+    # Existing leads are all pending; the background job works through them
+    op.create_index('ix_leads_dedup_pending', 'leads', ['id'], unique=False,
+                    postgresql_where=sa.text('dedup_checked_at IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leads_dedup_pending', table_name='leads')
+    op.drop_index(op.f('ix_leads_duplicate_of_id'), table_name='leads')
+    op.drop_constraint('leads_duplicate_of_id_fkey', 'leads', type_='foreignkey')
+    op.drop_column('leads', 'dedup_checked_at')
+    op.drop_column('leads', 'duplicate_of_id')
+    op.drop_table('lead_match_blocks')
+    op.drop_index(op.f('ix_lead_match_keys_lead_id'), table_name='lead_match_keys')
+    op.drop_table('lead_match_keys')
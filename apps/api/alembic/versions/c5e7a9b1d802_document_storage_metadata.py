@@ -0,0 +1,34 @@
+"""Add document storage metadata
+
+Revision ID: c5e7a9b1d802
+Revises: b4d6f8a0c791
+Create Date: 2026-10-19 17:05:23.341870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e7a9b1d802'
+down_revision: Union[str, Sequence[str], None] = 'b4d6f8a0c791'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('storage_key', sa.String(), nullable=True))
+    op.add_column('documents', sa.Column('content_type', sa.String(), nullable=True))
+    op.add_column('documents', sa.Column('size_bytes', sa.BigInteger(), nullable=True))
+    op.add_column('documents', sa.Column('checksum_sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('documents', 'checksum_sha256')
+    op.drop_column('documents', 'size_bytes')
+    op.drop_column('documents', 'content_type')
+    op.drop_column('documents', 'storage_key')
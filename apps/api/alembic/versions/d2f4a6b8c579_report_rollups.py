@@ -0,0 +1,70 @@
+"""Add daily report rollups
+
+Revision ID: d2f4a6b8c579
+Revises: c1e3a5b7d468
+Create Date: 2026-10-19 22:14:07.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f4a6b8c579'
+down_revision: Union[str, Sequence[str], None] = 'c1e3a5b7d468'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('bookings', sa.Column('confirmed_at', sa.DateTime(), nullable=True))
+    op.add_column('payments', sa.Column('approved_at', sa.DateTime(), nullable=True))
+    # No earlier timestamps exist, so existing rows count on the day of the upgrade
+    op.execute("UPDATE leads SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+    op.execute("UPDATE bookings SET confirmed_at = CURRENT_TIMESTAMP WHERE status = 'CONFIRMED'")
+    op.execute("UPDATE payments SET approved_at = CURRENT_TIMESTAMP WHERE status = 'APPROVED'")
+    op.create_table('report_daily_leads',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', postgresql.ENUM('NEW', 'QUOTED', 'PENDING_DEPOSIT', 'CONFIRMED', 'COMPLETED', 'CANCELLED', name='leadstatus', create_type=False), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status')
+    )
+    op.create_table('report_daily_bookings',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('confirmed', sa.Integer(), nullable=False),
+    sa.Column('value_ars', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('report_daily_revenue',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('payments', sa.Integer(), nullable=False),
+    sa.Column('amount_ars', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.execute(
+        "INSERT INTO report_daily_leads (day, status, count) "
+        "SELECT DATE(created_at), status, COUNT(*) FROM leads GROUP BY 1, 2"
+    )
+    op.execute(
+        "INSERT INTO report_daily_bookings (day, confirmed, value_ars) "
+        "SELECT DATE(confirmed_at), COUNT(*), COALESCE(SUM(total_price_ars), 0) FROM bookings "
+        "WHERE status = 'CONFIRMED' GROUP BY 1"
+    )
+    op.execute(
+        "INSERT INTO report_daily_revenue (day, payments, amount_ars) "
+        "SELECT DATE(approved_at), COUNT(*), COALESCE(SUM(amount_ars), 0) FROM payments "
+        "WHERE status = 'APPROVED' GROUP BY 1"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('report_daily_revenue')
+    op.drop_table('report_daily_bookings')
+    op.drop_table('report_daily_leads')
+    op.drop_column('payments', 'approved_at')
+    op.drop_column('bookings', 'confirmed_at')
@@ -0,0 +1,31 @@
+"""Add contract storage key
+
+Revision ID: d6f8b0c2e913
+Revises: c5e7a9b1d802
+Create Date: 2026-10-19 17:44:08.912650
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f8b0c2e913'
+down_revision: Union[str, Sequence[str], None] = 'c5e7a9b1d802'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contracts', sa.Column('storage_key', sa.String(), nullable=True))
+    # Completion callbacks look documents up by key to stay idempotent
+    op.create_index(op.f('ix_documents_storage_key'), 'documents', ['storage_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_documents_storage_key'), table_name='documents')
+    op.drop_column('contracts', 'storage_key')
@@ -0,0 +1,28 @@
+"""Add booking version
+
+Revision ID: d8f0b2c4e357
+Revises: c5e7a9b1d246
+Create Date: 2026-10-19 13:05:47.120934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f0b2c4e357'
+down_revision: Union[str, Sequence[str], None] = 'c5e7a9b1d246'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('bookings', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('bookings', 'version')
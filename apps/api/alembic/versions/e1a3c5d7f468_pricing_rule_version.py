@@ -0,0 +1,28 @@
+"""Add pricing rule version
+
+Revision ID: e1a3c5d7f468
+Revises: d8f0b2c4e357
+Create Date: 2026-10-19 14:21:09.553810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a3c5d7f468'
+down_revision: Union[str, Sequence[str], None] = 'd8f0b2c4e357'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('pricing_rules', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('pricing_rules', 'version')
@@ -0,0 +1,36 @@
+"""Add app settings
+
+Revision ID: e3a5b7c9d680
+Revises: d2f4a6b8c579
+Create Date: 2026-10-19 22:41:26.318504
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a5b7c9d680'
+down_revision: Union[str, Sequence[str], None] = 'd2f4a6b8c579'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('app_settings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('values', sa.JSON(), nullable=False),
+    sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # The single settings row; empty values mean the built-in defaults
+    op.execute("INSERT INTO app_settings (id, values, version) VALUES (1, '{}', 1)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('app_settings')
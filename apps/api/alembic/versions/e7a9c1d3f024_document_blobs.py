@@ -0,0 +1,58 @@
+"""Add content-addressed document blobs
+
+Revision ID: e7a9c1d3f024
+Revises: d6f8b0c2e913
+Create Date: 2026-10-19 19:02:37.415208
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a9c1d3f024'
+down_revision: Union[str, Sequence[str], None] = 'd6f8b0c2e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('storage_key', sa.String(), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('unreferenced_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256'),
+    sa.UniqueConstraint('storage_key')
+    )
+    op.create_index(op.f('ix_blobs_unreferenced_at'), 'blobs', ['unreferenced_at'], unique=False)
+    # Existing uploads: the oldest copy of each content becomes its blob
+    op.execute("""
+        INSERT INTO blobs (sha256, storage_key, size_bytes, content_type, ref_count, created_at)
+        SELECT DISTINCT ON (checksum_sha256) checksum_sha256, storage_key, size_bytes, content_type,
+               COUNT(*) OVER (PARTITION BY checksum_sha256), now()
+        FROM documents
+        WHERE checksum_sha256 IS NOT NULL AND storage_key IS NOT NULL
+        ORDER BY checksum_sha256, id
+    """)
+    # Duplicates now share a key
+    op.drop_index(op.f('ix_documents_storage_key'), table_name='documents')
+    op.create_index(op.f('ix_documents_storage_key'), 'documents', ['storage_key'], unique=False)
+    op.create_index(op.f('ix_documents_checksum_sha256'), 'documents', ['checksum_sha256'], unique=False)
+    op.create_foreign_key('documents_checksum_sha256_fkey', 'documents', 'blobs', ['checksum_sha256'], ['sha256'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('documents_checksum_sha256_fkey', 'documents', type_='foreignkey')
+    op.drop_index(op.f('ix_documents_checksum_sha256'), table_name='documents')
+    op.drop_index(op.f('ix_documents_storage_key'), table_name='documents')
+    op.create_index(op.f('ix_documents_storage_key'), 'documents', ['storage_key'], unique=True)
+    op.drop_index(op.f('ix_blobs_unreferenced_at'), table_name='blobs')
+    op.drop_table('blobs')
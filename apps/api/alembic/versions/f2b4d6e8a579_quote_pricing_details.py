@@ -0,0 +1,36 @@
+"""Add quote pricing details
+
+Revision ID: f2b4d6e8a579
+Revises: e1a3c5d7f468
+Create Date: 2026-10-19 15:02:41.218406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b4d6e8a579'
+down_revision: Union[str, Sequence[str], None] = 'e1a3c5d7f468'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('quotes', sa.Column('package_id', sa.Integer(), nullable=True))
+    op.add_column('quotes', sa.Column('addon_ids', sa.JSON(), nullable=True))
+    op.add_column('quotes', sa.Column('created_at', sa.DateTime(), nullable=True))
+    op.create_foreign_key('quotes_package_id_fkey', 'quotes', 'packages', ['package_id'], ['id'])
+    op.create_index(op.f('ix_quotes_lead_id'), 'quotes', ['lead_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_quotes_lead_id'), table_name='quotes')
+    op.drop_constraint('quotes_package_id_fkey', 'quotes', type_='foreignkey')
+    op.drop_column('quotes', 'created_at')
+    op.drop_column('quotes', 'addon_ids')
+    op.drop_column('quotes', 'package_id')
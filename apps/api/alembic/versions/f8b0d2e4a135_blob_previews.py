@@ -0,0 +1,39 @@
+"""Add blob preview status
+
+Revision ID: f8b0d2e4a135
+Revises: e7a9c1d3f024
+Create Date: 2026-10-19 19:48:12.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8b0d2e4a135'
+down_revision: Union[str, Sequence[str], None] = 'e7a9c1d3f024'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+preview_status = sa.Enum('PENDING', 'PROCESSING', 'READY', 'FAILED', 'UNSUPPORTED', name='previewstatus')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    preview_status.create(op.get_bind(), checkfirst=True)
+    # Existing blobs start as PENDING, so the sweep backfills their previews
+    op.add_column('blobs', sa.Column('preview_status', preview_status, server_default='PENDING', nullable=False))
+    op.add_column('blobs', sa.Column('preview_key', sa.String(), nullable=True))
+    op.add_column('blobs', sa.Column('preview_updated_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_blobs_preview_status'), 'blobs', ['preview_status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_blobs_preview_status'), table_name='blobs')
+    op.drop_column('blobs', 'preview_updated_at')
+    op.drop_column('blobs', 'preview_key')
+    op.drop_column('blobs', 'preview_status')
+    preview_status.drop(op.get_bind(), checkfirst=True)
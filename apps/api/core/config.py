@@ -9,6 +9,89 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 60 * 24 * 7 # 1 week
 
+    # Mercado Pago settings
+    mp_access_token: str = ""
+    mp_api_base_url: str = "https://api.mercadopago.com"
+    mp_connect_timeout_seconds: float = 3.0
+    mp_read_timeout_seconds: float = 10.0
+    mp_max_retries: int = 2
+    mp_pool_size: int = 10
+    mp_breaker_failure_threshold: int = 5
+    mp_breaker_reset_seconds: float = 30.0
+    mp_preference_ttl_minutes: int = 60 * 24
+    checkout_cache_seconds: float = 300.0
+
+    # Availability
+    default_event_duration_hours: float = 4.0
+    availability_refresh_seconds: int = 60
+    # Picks up event changes made by other workers
+    calendar_refresh_seconds: int = 300
+
+    # Payment reconciliation job (0 disables the background loop)
+    reconcile_interval_minutes: int = 0
+    reconcile_lookback_days: int = 3
+
+    # Write-behind lead ingestion: journal directory, flush cadence and batch size
+    lead_ingest_dir: str = "ingest"
+    lead_ingest_flush_seconds: float = 1.0
+    lead_ingest_batch_size: int = 500
+    lead_ingest_fsync: bool = True
+    # Duplicate check over leads not checked at creation (0 disables)
+    lead_dedup_interval_minutes: int = 5
+
+    # Batch quotes (0 disables the background job over NEW leads)
+    quote_interval_minutes: int = 0
+    quote_default_package_id: int | None = None
+    quote_deposit_fraction: float = 0.3
+
+    # Document storage: "local" (files under storage_local_root) or "s3"
+    storage_backend: str = "local"
+    storage_local_root: str = "storage"
+    storage_local_base_url: str = "/files"
+    s3_endpoint: str | None = None # e.g. MinIO or `python -m scripts.fake_s3`
+    s3_region: str | None = None
+    s3_access_key: str | None = None
+    s3_secret_key: str | None = None
+    storage_part_size_mb: int = 8
+    document_max_upload_mb: int = 25
+    # Lifetime of presigned upload/download URLs
+    storage_presign_seconds: int = 900
+    # HMAC key for local presigned URLs; falls back to jwt_secret
+    storage_signing_key: str = ""
+    # Deduplicated document blobs (0 disables the garbage collector)
+    blob_gc_interval_minutes: int = 60
+    blob_gc_grace_minutes: int = 60 * 24
+    # Document previews (Pillow, plus pypdfium2 for PDFs, are optional)
+    preview_workers: int = 1
+    preview_max_px: int = 480
+    preview_sweep_seconds: int = 300
+
+    # Contract rendering (separate processes, so the API stays responsive)
+    contract_render_workers: int = 2
+
+    # Revenue time series cache: writes evict the periods they touch, so past
+    # periods can live long; the current one is also recomputed on this TTL
+    revenue_series_ttl_seconds: int = 3600
+    revenue_series_current_ttl_seconds: int = 30
+
+    # Business settings (services.app_settings) are pushed to workers on
+    # change; this poll bounds the delay when a notification is missed
+    app_settings_refresh_seconds: int = 30
+
+    # Instagram feed on the home page (empty token disables it). Refreshed in
+    # the background; pages only ever read the last good snapshot.
+    instagram_access_token: str = ""
+    instagram_user_id: str = "me"
+    instagram_api_base_url: str = "https://graph.instagram.com"
+    instagram_feed_limit: int = 12
+    instagram_timeout_seconds: float = 5.0
+    instagram_refresh_seconds: int = 900
+    # Failed refreshes retry after this, doubling up to the max (with jitter)
+    instagram_retry_seconds: int = 30
+    instagram_max_backoff_seconds: int = 3600
+    # Last good snapshot, so a restart during an outage still shows posts
+    instagram_snapshot_path: str = "instagram_feed.json"
+
     class Config:
         env_file = ".env"
 
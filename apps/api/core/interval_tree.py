@@ -0,0 +1,110 @@
+import random
+from typing import Any, Hashable, Iterator
+
+
+class _Node:
+    __slots__ = ("start", "end", "key", "priority", "max_end", "left", "right")
+
+    def __init__(self, start, end, key):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.priority = random.random()
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+    @property
+    def order(self):
+        return (self.start, self.key)
+
+    def update(self):
+        max_end = self.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+
+def _split(node: _Node | None, order: tuple, inclusive: bool) -> tuple:
+    # Left part gets nodes ordered before ``order`` (or equal to it, if inclusive)
+    if node is None:
+        return None, None
+    if node.order < order or (inclusive and node.order == order):
+        left, right = _split(node.right, order, inclusive)
+        node.right = left
+        node.update()
+        return node, right
+    left, right = _split(node.left, order, inclusive)
+    node.left = right
+    node.update()
+    return left, node
+
+
+def _merge(left: _Node | None, right: _Node | None) -> _Node | None:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+class IntervalTree:
+    """Half-open ``[start, end)`` intervals in a treap augmented with max end.
+
+    Inserts, removals and overlap queries run in O(log n + k) expected time.
+    Each interval carries a hashable ``key``; (start, key) must be unique.
+    """
+
+    def __init__(self):
+        self._root: _Node | None = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, start, end, key: Hashable):
+        left, right = _split(self._root, (start, key), inclusive=False)
+        self._root = _merge(_merge(left, _Node(start, end, key)), right)
+        self._size += 1
+
+    def remove(self, start, key: Hashable) -> bool:
+        left, rest = _split(self._root, (start, key), inclusive=False)
+        found, right = _split(rest, (start, key), inclusive=True)
+        self._root = _merge(left, right)
+        if found is not None:
+            self._size -= 1
+            return True
+        return False
+
+    def overlapping(self, start, end) -> list[tuple[Any, Any, Hashable]]:
+        result: list = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_end <= start:
+                continue
+            stack.append(node.left)
+            if node.start < end:
+                if node.end > start:
+                    result.append((node.start, node.end, node.key))
+                stack.append(node.right)
+        result.sort(key=lambda item: item[0])
+        return result
+
+    def __iter__(self) -> Iterator[tuple[Any, Any, Hashable]]:
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield (node.start, node.end, node.key)
+            node = node.right
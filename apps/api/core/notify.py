@@ -0,0 +1,124 @@
+import json
+import os
+import select
+import threading
+import uuid
+from collections import defaultdict
+from typing import Callable
+
+from sqlalchemy import event as orm_event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from core.config import settings
+
+# Handlers receive the payload dict, or None after a reconnect when
+# notifications may have been missed and everything should be reloaded.
+Handler = Callable[[dict | None], None]
+
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class NotificationHub:
+    """Cross-worker invalidation messages over Postgres LISTEN/NOTIFY.
+
+    ``publish`` queues a message on the session; it is sent with pg_notify
+    inside the committing transaction and dispatched to local handlers right
+    after the commit, so nothing is announced for rolled-back writes. Other
+    workers receive it on a background listener connection.
+    """
+
+    def __init__(self, database_url: str):
+        self.url = make_url(database_url)
+        self.enabled = self.url.get_backend_name() == "postgresql"
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel].append(handler)
+
+    def publish(self, session: Session, channel: str, payload: dict | None = None):
+        session.info.setdefault("notifications", []).append((channel, payload or {}))
+
+    def dispatch(self, channel: str, payload: dict | None):
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception as e:
+                print(f"Notification handler for {channel} failed: {e}")
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen_forever, name="notify-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen_forever(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        dsn = self.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        backoff = 1.0
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(dsn)
+                connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with connection.cursor() as cursor:
+                    for channel in self._handlers:
+                        cursor.execute(f'LISTEN "{channel}"')
+                # Anything published while we were disconnected is lost: resync
+                for channel in self._handlers:
+                    self.dispatch(channel, None)
+                backoff = 1.0
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notification = connection.notifies.pop(0)
+                        message = json.loads(notification.payload or "{}")
+                        if message.pop("_origin", None) != WORKER_ID:
+                            self.dispatch(notification.channel, message)
+            except Exception as e:
+                print(f"Notification listener error, reconnecting in {backoff:.0f}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+notification_hub = NotificationHub(settings.database_url)
+
+
+@orm_event.listens_for(Session, "before_commit")
+def _send_notifications(session):
+    if not notification_hub.enabled:
+        return
+    # before_commit runs ahead of the final flush; flush now so flush hooks can still publish
+    session.flush()
+    for channel, payload in session.info.get("notifications", []):
+        session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": channel, "payload": json.dumps(dict(payload, _origin=WORKER_ID))},
+        )
+
+
+@orm_event.listens_for(Session, "after_commit")
+def _dispatch_notifications(session):
+    for channel, payload in session.info.pop("notifications", []):
+        notification_hub.dispatch(channel, payload)
+
+
+@orm_event.listens_for(Session, "after_soft_rollback")
+def _discard_notifications(session, previous_transaction):
+    session.info.pop("notifications", None)
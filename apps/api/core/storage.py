@@ -0,0 +1,403 @@
+import hashlib
+import hmac
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, BinaryIO, Iterator
+from urllib.parse import quote, urlencode
+
+from fastapi.concurrency import run_in_threadpool
+
+from core.config import settings
+
+MB = 1024 * 1024
+# S3 rejects multipart parts under 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * MB
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class StorageError(Exception):
+    pass
+
+
+class UploadTooLargeError(StorageError):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the {max_bytes // MB} MB limit")
+        self.max_bytes = max_bytes
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    key: str
+    size: int
+    sha256: str | None # None when the client uploaded directly
+    content_type: str | None
+    url: str
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    size: int
+    content_type: str | None
+
+
+@dataclass(frozen=True)
+class PresignedRequest:
+    # What the client must send: method, URL and any headers the signature covers
+    method: str
+    url: str
+    headers: dict
+
+
+class Upload:
+    """One object being written part by part; exactly one of complete/abort ends it."""
+
+    def write_part(self, data: bytes):
+        raise NotImplementedError
+
+    def complete(self, last_part: bytes):
+        raise NotImplementedError
+
+    def abort(self):
+        raise NotImplementedError
+
+
+class StorageBackend:
+    def start_upload(self, key: str, content_type: str | None) -> Upload:
+        raise NotImplementedError
+
+    def open(self, key: str) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+    def head(self, key: str) -> ObjectInfo | None:
+        raise NotImplementedError
+
+    def presign_put(self, key: str, content_type: str | None, max_bytes: int, expires_in: int) -> PresignedRequest:
+        raise NotImplementedError
+
+    def presign_get(self, key: str, expires_in: int, filename: str | None = None,
+                    content_type: str | None = None) -> str:
+        raise NotImplementedError
+
+
+class _LocalUpload(Upload):
+    def __init__(self, path: str, tmp_dir: str):
+        self.path = path
+        self.file = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+
+    def write_part(self, data: bytes):
+        self.file.write(data)
+
+    def complete(self, last_part: bytes):
+        self.file.write(last_part)
+        self.file.close()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Readers never see a half-written file
+        os.replace(self.file.name, self.path)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.file.name):
+            os.remove(self.file.name)
+
+
+class LocalStorage(StorageBackend):
+    """Stores objects under a directory; for development and offline tests.
+
+    Presigned URLs point at ``routers/files.py`` and carry an HMAC over the
+    method, key, expiry and any constraints, mimicking S3 query signing.
+    """
+
+    def __init__(self, root: str, base_url: str, signing_key: str = ""):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+        self.signing_key = signing_key.encode()
+        self.tmp_dir = os.path.join(self.root, ".uploads")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError(f"Invalid key: {key}")
+        return path
+
+    def start_upload(self, key: str, content_type: str | None) -> Upload:
+        return _LocalUpload(self.path(key), self.tmp_dir)
+
+    def open(self, key: str) -> Iterator[bytes]:
+        try:
+            with open(self.path(key), "rb") as f:
+                while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+                    yield chunk
+        except FileNotFoundError as e:
+            raise StorageError(f"Object not found: {key}") from e
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def head(self, key: str) -> ObjectInfo | None:
+        try:
+            return ObjectInfo(size=os.path.getsize(self.path(key)), content_type=None)
+        except FileNotFoundError:
+            return None
+
+    def _signature(self, method: str, key: str, params: dict) -> str:
+        message = "\n".join([method, key] + [f"{name}={params[name]}" for name in sorted(params)])
+        return hmac.new(self.signing_key, message.encode(), hashlib.sha256).hexdigest()
+
+    def _presign(self, method: str, key: str, expires_in: int, params: dict) -> str:
+        params = {name: value for name, value in params.items() if value is not None}
+        params["expires"] = int(time.time()) + expires_in
+        params["signature"] = self._signature(method, key, params)
+        return f"{self.base_url}/{quote(key)}?{urlencode(params)}"
+
+    def verify(self, method: str, key: str, params: dict) -> dict:
+        """Checks a presigned request and returns its signed parameters."""
+        params = dict(params)
+        signature = params.pop("signature", "")
+        if not hmac.compare_digest(signature, self._signature(method, key, params)):
+            raise StorageError("Invalid signature")
+        if int(params.get("expires", 0)) < time.time():
+            raise StorageError("URL expired")
+        return params
+
+    def presign_put(self, key: str, content_type: str | None, max_bytes: int, expires_in: int) -> PresignedRequest:
+        url = self._presign("PUT", key, expires_in, {"max_bytes": max_bytes, "content_type": content_type})
+        return PresignedRequest("PUT", url, {"Content-Type": content_type} if content_type else {})
+
+    def presign_get(self, key: str, expires_in: int, filename: str | None = None,
+                    content_type: str | None = None) -> str:
+        return self._presign("GET", key, expires_in, {"filename": filename, "content_type": content_type})
+
+
+class _S3Upload(Upload):
+    def __init__(self, client, bucket: str, key: str, content_type: str | None):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.extra = {"ContentType": content_type} if content_type else {}
+        self.upload_id: str | None = None
+        self.parts: list[dict] = []
+
+    def write_part(self, data: bytes):
+        if self.upload_id is None:
+            response = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key, **self.extra)
+            self.upload_id = response["UploadId"]
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=data,
+        )
+        self.parts.append({"PartNumber": number, "ETag": response["ETag"]})
+
+    def complete(self, last_part: bytes):
+        if self.upload_id is None:
+            # Fits in one part: a plain PUT saves three round trips
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=last_part, **self.extra)
+            return
+        if last_part:
+            self.write_part(last_part)
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )
+
+    def abort(self):
+        if self.upload_id is not None:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+
+class S3Storage(StorageBackend):
+    """S3 or any S3-compatible store (MinIO, ``python -m scripts.fake_s3``)."""
+
+    def __init__(self, bucket: str, endpoint_url: str | None = None, region: str | None = None,
+                 access_key: str | None = None, secret_key: str | None = None):
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        config = {"s3": {"addressing_style": "path"}} if endpoint_url else {}
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+            config=Config(**config),
+        )
+
+    def start_upload(self, key: str, content_type: str | None) -> Upload:
+        return _S3Upload(self.client, self.bucket, key, content_type)
+
+    def open(self, key: str) -> Iterator[bytes]:
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        except self.client.exceptions.NoSuchKey as e:
+            raise StorageError(f"Object not found: {key}") from e
+        yield from body.iter_chunks(DOWNLOAD_CHUNK_SIZE)
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def url(self, key: str) -> str:
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.amazonaws.com/{key}"
+
+    def head(self, key: str) -> ObjectInfo | None:
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return ObjectInfo(size=response["ContentLength"], content_type=response.get("ContentType"))
+
+    def presign_put(self, key: str, content_type: str | None, max_bytes: int, expires_in: int) -> PresignedRequest:
+        # A presigned PUT cannot cap the size; the completion step checks it
+        params = {"Bucket": self.bucket, "Key": key}
+        if content_type:
+            params["ContentType"] = content_type
+        url = self.client.generate_presigned_url("put_object", Params=params, ExpiresIn=expires_in)
+        return PresignedRequest("PUT", url, {"Content-Type": content_type} if content_type else {})
+
+    def presign_get(self, key: str, expires_in: int, filename: str | None = None,
+                    content_type: str | None = None) -> str:
+        params = {"Bucket": self.bucket, "Key": key}
+        if filename:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        if content_type:
+            params["ResponseContentType"] = content_type
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+
+class ChunkedUploader:
+    """Streams bytes into a backend in fixed-size parts with bounded memory.
+
+    Callers ``feed`` chunks of any size; when it returns True a full part is
+    buffered and ``flush`` (blocking) sends it. Size is enforced and the
+    SHA-256 computed as the bytes go by, so nothing is re-read afterwards.
+    """
+
+    def __init__(self, backend: StorageBackend, key: str, content_type: str | None,
+                 max_bytes: int, part_size: int):
+        self.backend = backend
+        self.key = key
+        self.content_type = content_type
+        self.max_bytes = max_bytes
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.buffer = bytearray()
+        self.upload = backend.start_upload(key, content_type)
+
+    def feed(self, data: bytes) -> bool:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(self.max_bytes)
+        self.digest.update(data)
+        self.buffer += data
+        return len(self.buffer) > self.part_size
+
+    def flush(self):
+        # Keeps the remainder back: only the final part may be short
+        while len(self.buffer) > self.part_size:
+            part = bytes(self.buffer[:self.part_size])
+            del self.buffer[:self.part_size]
+            self.upload.write_part(part)
+
+    def finish(self) -> StoredObject:
+        self.flush()
+        self.upload.complete(bytes(self.buffer))
+        self.buffer = bytearray()
+        return StoredObject(
+            key=self.key,
+            size=self.size,
+            sha256=self.digest.hexdigest(),
+            content_type=self.content_type,
+            url=self.backend.url(self.key),
+        )
+
+    def abort(self):
+        self.buffer = bytearray()
+        self.upload.abort()
+
+
+def store_fileobj(backend: StorageBackend, key: str, fileobj: BinaryIO, content_type: str | None,
+                  max_bytes: int, part_size: int) -> StoredObject:
+    uploader = ChunkedUploader(backend, key, content_type, max_bytes, part_size)
+    try:
+        while chunk := fileobj.read(DOWNLOAD_CHUNK_SIZE * 16):
+            if uploader.feed(chunk):
+                uploader.flush()
+        return uploader.finish()
+    except BaseException:
+        uploader.abort()
+        raise
+
+
+def copy_object(backend: StorageBackend, source_key: str, key: str, content_type: str | None,
+                max_bytes: int, part_size: int) -> StoredObject:
+    # Streams through the API, so the size and SHA-256 describe exactly the bytes written
+    uploader = ChunkedUploader(backend, key, content_type, max_bytes, part_size)
+    try:
+        for chunk in backend.open(source_key):
+            if uploader.feed(chunk):
+                uploader.flush()
+        return uploader.finish()
+    except BaseException:
+        uploader.abort()
+        raise
+
+
+async def store_stream(uploader: ChunkedUploader, chunks: AsyncIterator[bytes]) -> StoredObject:
+    # Blocking part uploads run in the threadpool, only when a part is full
+    try:
+        async for chunk in chunks:
+            if uploader.feed(chunk):
+                await run_in_threadpool(uploader.flush)
+        return await run_in_threadpool(uploader.finish)
+    except BaseException:
+        await run_in_threadpool(uploader.abort)
+        raise
+
+
+def object_key(prefix: str, filename: str | None) -> str:
+    # Random component so re-uploads never overwrite each other
+    name = os.path.basename(filename or "") or "file"
+    safe = "".join(c if c.isalnum() or c in "._-" else "_" for c in name)[-100:]
+    return f"{prefix}/{uuid.uuid4().hex}/{safe}"
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    if settings.storage_backend == "s3":
+        return S3Storage(
+            bucket=settings.s3_bucket,
+            endpoint_url=settings.s3_endpoint,
+            region=settings.s3_region,
+            access_key=settings.s3_access_key,
+            secret_key=settings.s3_secret_key,
+        )
+    return LocalStorage(
+        settings.storage_local_root,
+        settings.storage_local_base_url,
+        signing_key=settings.storage_signing_key or settings.jwt_secret,
+    )
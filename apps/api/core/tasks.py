@@ -0,0 +1,14 @@
+import asyncio
+from typing import Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+
+async def run_periodically(interval_seconds: float, func: Callable, *args):
+    # Runs a blocking job in the threadpool every interval; errors are logged, not fatal
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(func, *args)
+        except Exception as e:
+            print(f"Background task {func.__name__} failed: {e}")
@@ -1,10 +1,76 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-from routers import auth, leads, bookings, catalog, payments, inventory, karaoke, documents, social, reports, settings, contract_templates, frontend
+from core.config import settings as app_settings
+from routers import auth, leads, quotes, bookings, calendar, catalog, payments, inventory, karaoke, documents, social, reports, exports, settings, contract_templates, files, frontend
+from core.notify import notification_hub
+from core.tasks import run_periodically
+from services.app_settings import settings_cache
+from services.availability import rebuild_availability
+from services.blobs import collect_blob_garbage
+from services.calendar import load_calendar
+from services.contracts import shutdown_render_pool
+from services.equipment import rebuild_equipment_index
+from services.instagram_feed import instagram_feed, instagram_refresh_loop
+from services.lead_dedup import dedupe_pending
+from services.lead_ingest import lead_ingest_queue
+from services.previews import preview_sweep_loop, shutdown_preview_pool
+from services.quotes import quote_new_leads
+from services.reconciliation import reconciliation_loop
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the in-memory indexes; a missing DB must not keep the API down
+    for warm_up in (rebuild_availability, rebuild_equipment_index, load_calendar, settings_cache.load):
+        try:
+            await run_in_threadpool(warm_up)
+        except Exception as e:
+            print(f"Startup warm-up {warm_up.__name__} failed: {e}")
+    # In-process caches are invalidated across workers over LISTEN/NOTIFY
+    notification_hub.start()
+    # Replays leads journaled before a restart, then writes new ones in batches
+    lead_ingest_queue.start()
+    background_tasks = [
+        asyncio.create_task(run_periodically(app_settings.availability_refresh_seconds, rebuild_availability)),
+        asyncio.create_task(run_periodically(app_settings.availability_refresh_seconds, rebuild_equipment_index)),
+        asyncio.create_task(run_periodically(app_settings.calendar_refresh_seconds, load_calendar)),
+        asyncio.create_task(run_periodically(app_settings.app_settings_refresh_seconds, settings_cache.refresh)),
+        asyncio.create_task(preview_sweep_loop()),
+    ]
+    if instagram_feed.enabled:
+        # Serve the saved snapshot until the first background refresh lands
+        instagram_feed.load_snapshot()
+        background_tasks.append(asyncio.create_task(instagram_refresh_loop()))
+    if app_settings.reconcile_interval_minutes > 0:
+        background_tasks.append(asyncio.create_task(reconciliation_loop()))
+    if app_settings.quote_interval_minutes > 0:
+        background_tasks.append(asyncio.create_task(
+            run_periodically(app_settings.quote_interval_minutes * 60, quote_new_leads)
+        ))
+    if app_settings.lead_dedup_interval_minutes > 0:
+        background_tasks.append(asyncio.create_task(
+            run_periodically(app_settings.lead_dedup_interval_minutes * 60, dedupe_pending)
+        ))
+    if app_settings.blob_gc_interval_minutes > 0:
+        background_tasks.append(asyncio.create_task(
+            run_periodically(app_settings.blob_gc_interval_minutes * 60, collect_blob_garbage)
+        ))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    notification_hub.stop()
+    lead_ingest_queue.stop()
+    instagram_feed.close()
+    shutdown_render_pool()
+    shutdown_preview_pool()
 
 app = FastAPI(
     title="Karina Ocampo Event Management API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -12,7 +78,9 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # API Routers
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(leads.router, prefix="/leads", tags=["Leads"])
+app.include_router(quotes.router, prefix="/quotes", tags=["Quotes"])
 app.include_router(bookings.router, prefix="/bookings", tags=["Bookings"])
+app.include_router(calendar.router, prefix="/calendar", tags=["Calendar"])
 app.include_router(catalog.router, prefix="/catalog", tags=["Catalog"])
 app.include_router(payments.router, prefix="/payments", tags=["Payments"])
 app.include_router(inventory.router, prefix="/inventory", tags=["Inventory"])
@@ -20,9 +88,14 @@ app.include_router(karaoke.router, prefix="/karaoke", tags=["Karaoke"])
 app.include_router(documents.router, prefix="/documents", tags=["Documents"])
 app.include_router(social.router, prefix="/social", tags=["Social"])
 app.include_router(reports.router, prefix="/reports", tags=["Reports"])
+app.include_router(exports.router, prefix="/exports", tags=["Exports"])
 app.include_router(settings.router, prefix="/settings", tags=["Settings"])
 app.include_router(contract_templates.router, prefix="/contract-templates", tags=["Contract Templates"])
 
+# Presigned URLs of the local storage backend point here; S3 serves its own
+if app_settings.storage_backend == "local":
+    app.include_router(files.router, prefix=app_settings.storage_local_base_url, tags=["Files"])
+
 # Frontend Router
 app.include_router(frontend.router, tags=["Frontend"])
 
@@ -1,27 +1,45 @@
 from .user import User, ProviderProfile, ClientProfile
-from .event import Lead, Quote, Event, Booking, Payment
-from .catalog import Package, AddOn, PricingRule
-from .inventory import Equipment, EquipmentAssignment, ChecklistItem
+from .event import Lead, LeadMatchKey, LeadMatchBlock, Quote, Event, Booking, BookingSlot, Payment
+from .catalog import Package, PackageEquipment, AddOn, PricingRule
+from .inventory import Equipment, InventoryCounter, EquipmentAssignment, ChecklistItem
 from .karaoke import Song, SongRequest
-from .document import Contract, Document
+from .document import Contract, Document, Blob
+from .report import DailyLeadCount, DailyBookingTotal, DailyRevenue
+from .settings import AppSetting
 
 __all__ = [
     "User",
     "ProviderProfile",
     "ClientProfile",
     "Lead",
+    "LeadMatchKey",
+    "LeadMatchBlock",
     "Quote",
     "Event",
     "Booking",
+    "BookingSlot",
     "Payment",
     "Package",
+    "PackageEquipment",
     "AddOn",
     "PricingRule",
     "Equipment",
+    "InventoryCounter",
     "EquipmentAssignment",
     "ChecklistItem",
     "Song",
     "SongRequest",
     "Contract",
     "Document",
+    "Blob",
+    "DailyLeadCount",
+    "DailyBookingTotal",
+    "DailyRevenue",
+    "AppSetting",
 ]
+
+# Registers the flush hooks that keep inventory_counters and the report
+# rollups in step with their source rows, so any code that writes those
+# models (scripts too) updates them
+from services import inventory_counters as _inventory_counters  # noqa: E402,F401
+from services import report_rollups as _report_rollups  # noqa: E402,F401
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey
 from core.db import Base
 
 class Package(Base):
@@ -10,6 +10,15 @@ class Package(Base):
     duration_hours = Column(Float)
     base_price_ars = Column(Integer, nullable=False)
 
+class PackageEquipment(Base):
+    # Equipment a package needs, by category; used to auto-allocate events
+    __tablename__ = "package_equipment"
+
+    id = Column(Integer, primary_key=True, index=True)
+    package_id = Column(Integer, ForeignKey("packages.id", ondelete="CASCADE"), nullable=False, index=True)
+    category = Column(String, nullable=False)
+    quantity = Column(Integer, nullable=False, default=1)
+
 class AddOn(Base):
     __tablename__ = "addons"
 
@@ -24,5 +33,9 @@ class PricingRule(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     condition = Column(String) # e.g., 'day_of_week == "saturday"'
-    adjustment_percentage = Column(Float)
+    adjustment_percentage = Column(Float) # Percent of the subtotal, e.g. 15 for +15% or -10 for a discount
     adjustment_fixed_ars = Column(Integer)
+    # Bumped on every update; compiled conditions are cached by (id, version)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
@@ -1,5 +1,6 @@
 import enum
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Text, DateTime
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Text, DateTime, BigInteger
 from sqlalchemy.orm import relationship
 from core.db import Base
 from .event import Booking
@@ -15,6 +16,13 @@ class DocumentOwnerType(str, enum.Enum):
     CLIENT = "client"
     EVENT = "event"
 
+class PreviewStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+    UNSUPPORTED = "unsupported"
+
 class Contract(Base):
     __tablename__ = "contracts"
 
@@ -24,6 +32,7 @@ class Contract(Base):
     version = Column(Integer, default=1)
     status = Column(Enum(ContractStatus), default=ContractStatus.DRAFT, nullable=False)
     file_url = Column(String)
+    storage_key = Column(String) # Set when the file lives in core.storage
     signed_at = Column(DateTime)
 
     booking = relationship("Booking")
@@ -37,6 +46,37 @@ class Document(Base):
     document_type = Column(String) # e.g., 'DNI', 'CUIT'
     file_url = Column(String, nullable=False)
     extra_data = Column(Text) # JSON string for extra info
+    # Set for files stored through core.storage; duplicates share their blob's key
+    storage_key = Column(String, index=True)
+    content_type = Column(String)
+    size_bytes = Column(BigInteger)
+    checksum_sha256 = Column(String(64), ForeignKey("blobs.sha256"), index=True)
+    # Presigned upload this document came from, so completing it again returns it
+    upload_id = Column(String, unique=True, index=True)
+
+    blob = relationship("Blob")
+
+    @property
+    def preview_status(self) -> PreviewStatus | None:
+        return self.blob.preview_status if self.blob else None
+
+class Blob(Base):
+    """One stored object per distinct content, shared by the documents that reference it."""
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    storage_key = Column(String, nullable=False, unique=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    content_type = Column(String)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Set when ref_count drops to zero; the garbage collector waits out a grace period
+    unreferenced_at = Column(DateTime, index=True)
+    # Thumbnail / first-page preview, built in the background (services.previews)
+    preview_status = Column(Enum(PreviewStatus), nullable=False, default=PreviewStatus.PENDING,
+                            server_default=PreviewStatus.PENDING.name, index=True)
+    preview_key = Column(String)
+    preview_updated_at = Column(DateTime)
 
 class ContractTemplate(Base):
     __tablename__ = "contract_templates"
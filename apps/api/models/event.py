@@ -1,5 +1,6 @@
 import enum
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Float, Text
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Float, Text, JSON, Index, text
 from sqlalchemy.orm import relationship
 from core.db import Base
 from .user import User
@@ -42,16 +43,48 @@ class Lead(Base):
     message = Column(Text)
     status = Column(Enum(LeadStatus), default=LeadStatus.NEW, nullable=False)
     source = Column(String) # e.g., utm_source
+    # Handed out by the write-behind ingestion path (services.lead_ingest)
+    receipt = Column(String(36), unique=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Earliest lead of the same person (services.lead_dedup); NULL for originals
+    duplicate_of_id = Column(Integer, ForeignKey("leads.id"), index=True)
+    dedup_checked_at = Column(DateTime)
+
+    # Lead search filters on one column and pages newest first by id
+    # (the full-text GIN index is Postgres-only and lives in the migration)
+    __table_args__ = (
+        Index("ix_leads_status_id", "status", "id"),
+        Index("ix_leads_source_id", "source", "id"),
+        Index("ix_leads_event_type_id", "event_type", "id"),
+        Index("ix_leads_event_date_id", "event_date", "id"),
+        # Small: only leads the duplicate check has not seen yet
+        Index("ix_leads_dedup_pending", "id", postgresql_where=text("dedup_checked_at IS NULL")),
+    )
+
+class LeadMatchKey(Base):
+    """Blocking keys: leads sharing a key are the only pairs compared for duplicates."""
+    __tablename__ = "lead_match_keys"
+    key = Column(String(200), primary_key=True)
+    lead_id = Column(Integer, ForeignKey("leads.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+class LeadMatchBlock(Base):
+    """Leads per blocking key, kept up to date so oversized blocks are skipped without counting."""
+    __tablename__ = "lead_match_blocks"
+    key = Column(String(200), primary_key=True)
+    size = Column(Integer, nullable=False, default=0)
 
 class Quote(Base):
     __tablename__ = "quotes"
     id = Column(Integer, primary_key=True, index=True)
-    lead_id = Column(Integer, ForeignKey("leads.id"))
+    lead_id = Column(Integer, ForeignKey("leads.id"), index=True)
     client_id = Column(Integer, ForeignKey("users.id"))
     price_ars = Column(Integer, nullable=False) # In ARS cents
+    package_id = Column(Integer, ForeignKey("packages.id"))
+    addon_ids = Column(JSON) # Add-on ids priced into this quote
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Filled in the first time the quote is viewed
     deposit_payment_link = Column(String)
     total_payment_link = Column(String)
-    # package/addons relationship to be added
 
 class Event(Base):
     __tablename__ = "events"
@@ -62,6 +95,7 @@ class Event(Base):
     duration_hours = Column(Float)
     status = Column(Enum(EventStatus), default=EventStatus.SCHEDULED, nullable=False)
     notes = Column(Text)
+    provider_id = Column(Integer, ForeignKey("users.id")) # Assigned provider, if any
 
 class Booking(Base):
     __tablename__ = "bookings"
@@ -70,18 +104,42 @@ class Booking(Base):
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
     total_price_ars = Column(Integer, nullable=False)
     status = Column(Enum(BookingStatus), default=BookingStatus.PENDING_DEPOSIT, nullable=False)
+    # Bumped on every write; stale ORM updates raise StaleDataError
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Set when the booking becomes CONFIRMED; the day it counts in reports
+    confirmed_at = Column(DateTime)
     # package/addons relationship to be added
 
     client = relationship("User")
     event = relationship("Event")
 
+    __mapper_args__ = {"version_id_col": version}
+
+class BookingSlot(Base):
+    # Time slot held by a confirmed booking on one resource ("main" or
+    # "provider:<id>"). In Postgres an exclusion constraint on
+    # (resource, tsrange(starts_at, ends_at)) rejects overlapping rows.
+    __tablename__ = "booking_slots"
+    id = Column(Integer, primary_key=True, index=True)
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    resource = Column(String, nullable=False)
+    starts_at = Column(DateTime, nullable=False)
+    ends_at = Column(DateTime, nullable=False)
+
 class Payment(Base):
     __tablename__ = "payments"
     id = Column(Integer, primary_key=True, index=True)
     booking_id = Column(Integer, ForeignKey("bookings.id"), nullable=False)
     type = Column(String) # 'deposit' or 'total'
     mp_preference_id = Column(String)
+    mp_init_point = Column(String)
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING, nullable=False)
     amount_ars = Column(Integer, nullable=False)
+    # "<booking_id>:<type>:<amount_ars>" while the checkout is reusable, NULL afterwards
+    checkout_key = Column(String, unique=True, index=True)
+    expires_at = Column(DateTime)
+    # Set when the payment becomes APPROVED; the day it counts as revenue
+    approved_at = Column(DateTime)
 
     booking = relationship("Booking")
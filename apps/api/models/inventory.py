@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Boolean, DateTime
 from sqlalchemy.orm import relationship
 from core.db import Base
 from .event import Event
@@ -18,12 +18,25 @@ class Equipment(Base):
     category = Column(String) # e.g., 'Audio', 'Lighting'
     status = Column(Enum(EquipmentStatus), default=EquipmentStatus.AVAILABLE, nullable=False)
 
+class InventoryCounter(Base):
+    # Equipment count per (category, status), kept in step with every status
+    # change so the dashboard never has to count rows. NULL categories are ''.
+    __tablename__ = "inventory_counters"
+
+    category = Column(String, primary_key=True)
+    status = Column(Enum(EquipmentStatus), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
 class EquipmentAssignment(Base):
     __tablename__ = "equipment_assignments"
 
     id = Column(Integer, primary_key=True, index=True)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
-    equipment_id = Column(Integer, ForeignKey("equipment.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False, index=True)
+    equipment_id = Column(Integer, ForeignKey("equipment.id"), nullable=False, index=True)
+    # Copied from the event window. In Postgres an exclusion constraint on
+    # (equipment_id, tsrange(starts_at, ends_at)) rejects double allocation.
+    starts_at = Column(DateTime, nullable=False)
+    ends_at = Column(DateTime, nullable=False)
 
     event = relationship("Event")
     equipment = relationship("Equipment")
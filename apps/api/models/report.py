@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, BigInteger, Date, Enum
+from core.db import Base
+from .event import LeadStatus
+
+# Daily rollups behind /reports/overview (services.report_rollups). Every
+# write to leads, bookings and payments adjusts them in the same
+# transaction, so a report over any range sums at most one row per day.
+
+class DailyLeadCount(Base):
+    # Leads created that day, by their current status
+    __tablename__ = "report_daily_leads"
+
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(LeadStatus), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class DailyBookingTotal(Base):
+    # Bookings confirmed that day and still confirmed; value as in bookings.total_price_ars
+    __tablename__ = "report_daily_bookings"
+
+    day = Column(Date, primary_key=True)
+    confirmed = Column(Integer, nullable=False, default=0)
+    value_ars = Column(BigInteger, nullable=False, default=0)
+
+class DailyRevenue(Base):
+    # Payments approved that day, amounts in ARS cents
+    __tablename__ = "report_daily_revenue"
+
+    day = Column(Date, primary_key=True)
+    payments = Column(Integer, nullable=False, default=0)
+    amount_ars = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,14 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, DateTime, JSON
+from core.db import Base
+
+class AppSetting(Base):
+    # Business settings edited from the admin (services.app_settings). A
+    # single row, id 1; version is bumped on every update and tells workers
+    # whether their cached copy is current.
+    __tablename__ = "app_settings"
+
+    id = Column(Integer, primary_key=True)
+    values = Column(JSON, nullable=False, default=dict)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
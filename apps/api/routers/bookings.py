@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List
+from datetime import datetime, timedelta
 
+from core.config import settings
 from core.db import SessionLocal
 from models.event import Booking, Event, BookingStatus
+from services.availability import MAIN_RESOURCE, availability_index, provider_resource
+from services.booking_transitions import NOT_FOUND, UNCHANGED, UPDATED, transition_bookings
 
 router = APIRouter()
 
@@ -13,6 +17,7 @@ class BookingResponse(BaseModel):
     client_id: int
     event_id: int
     status: str
+    version: int
 
     class Config:
         from_attributes = True
@@ -25,6 +30,35 @@ class EventResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BookingVersion(BaseModel):
+    id: int
+    version: int | None = None # Version last seen by the client; omit to skip the check
+
+class BulkTransitionRequest(BaseModel):
+    status: BookingStatus
+    items: List[BookingVersion]
+
+class TransitionResult(BaseModel):
+    id: int
+    result: str
+    status: BookingStatus | None = None
+    version: int | None = None
+    detail: str | None = None
+
+class BulkTransitionResponse(BaseModel):
+    updated: int
+    results: List[TransitionResult]
+
+class AvailabilityResponse(BaseModel):
+    start: datetime
+    end: datetime
+    available: bool
+    conflicting_booking_ids: List[int]
+
+class FreeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -33,6 +67,9 @@ def get_db():
     finally:
         db.close()
 
+def resources_for(provider_id: int | None) -> list[str]:
+    return [MAIN_RESOURCE, provider_resource(provider_id)] if provider_id else [MAIN_RESOURCE]
+
 @router.get("/events", response_model=List[EventResponse])
 def get_events(db: Session = Depends(get_db)):
     events = db.query(Event).all()
@@ -43,22 +80,59 @@ def get_bookings(db: Session = Depends(get_db)):
     bookings = db.query(Booking).all()
     return bookings
 
-@router.post("/bookings/{booking_id}/confirm", response_model=BookingResponse)
-def confirm_booking(booking_id: int, db: Session = Depends(get_db)):
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
-    if not booking:
+@router.get("/availability", response_model=AvailabilityResponse)
+def check_availability(
+    start: datetime,
+    end: datetime | None = None,
+    duration_hours: float | None = Query(None, gt=0),
+    provider_id: int | None = None,
+):
+    # Answered from the in-memory index, no DB query
+    if end is None:
+        end = start + timedelta(hours=duration_hours or settings.default_event_duration_hours)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    conflicts = availability_index.conflicts(resources_for(provider_id), start, end)
+    return {"start": start, "end": end, "available": not conflicts, "conflicting_booking_ids": conflicts}
+
+@router.get("/availability/free-slots", response_model=List[FreeSlot])
+def get_free_slots(
+    start: datetime,
+    end: datetime,
+    duration_hours: float = Query(4, gt=0),
+    provider_id: int | None = None,
+):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > timedelta(days=366):
+        raise HTTPException(status_code=400, detail="Range cannot exceed one year")
+    free = availability_index.free_slots(
+        resources_for(provider_id), start, end, timedelta(hours=duration_hours)
+    )
+    return [{"start": s, "end": e} for s, e in free]
+
+def apply_single_transition(db: Session, booking_id: int, version: int | None, target: BookingStatus):
+    [result] = transition_bookings(db, target, {booking_id: version})
+    if result["result"] == NOT_FOUND:
         raise HTTPException(status_code=404, detail="Booking not found")
-    booking.status = BookingStatus.CONFIRMED
-    db.commit()
-    db.refresh(booking)
-    return booking
+    if result["result"] not in (UPDATED, UNCHANGED):
+        raise HTTPException(status_code=409, detail=result)
+    return db.query(Booking).filter(Booking.id == booking_id).first()
+
+@router.post("/bookings/transitions", response_model=BulkTransitionResponse)
+def bulk_transition_bookings(request: BulkTransitionRequest, db: Session = Depends(get_db)):
+    if len(request.items) > 1000:
+        raise HTTPException(status_code=400, detail="At most 1000 bookings per request")
+    results = transition_bookings(db, request.status, {item.id: item.version for item in request.items})
+    return {
+        "updated": sum(1 for result in results if result["result"] == UPDATED),
+        "results": results,
+    }
+
+@router.post("/bookings/{booking_id}/confirm", response_model=BookingResponse)
+def confirm_booking(booking_id: int, version: int | None = None, db: Session = Depends(get_db)):
+    return apply_single_transition(db, booking_id, version, BookingStatus.CONFIRMED)
 
 @router.post("/bookings/{booking_id}/cancel", response_model=BookingResponse)
-def cancel_booking(booking_id: int, db: Session = Depends(get_db)):
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    booking.status = BookingStatus.CANCELLED
-    db.commit()
-    db.refresh(booking)
-    return booking
+def cancel_booking(booking_id: int, version: int | None = None, db: Session = Depends(get_db)):
+    return apply_single_transition(db, booking_id, version, BookingStatus.CANCELLED)
@@ -0,0 +1,55 @@
+import json
+from datetime import date, datetime, timedelta
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+from core.http import etag_matches, not_modified, strong_etag
+from services.calendar import Month, calendar_service
+
+router = APIRouter()
+
+CACHE_CONTROL = "public, max-age=60"
+
+def parse_month(value: str) -> Month:
+    try:
+        parsed = datetime.strptime(value, "%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="month must look like YYYY-MM")
+    return (parsed.year, parsed.month)
+
+@router.get("/")
+async def get_calendar(
+    request: Request,
+    month: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+):
+    if month:
+        bucket = await run_in_threadpool(calendar_service.get_month, parse_month(month))
+        if etag_matches(request, bucket.etag):
+            return not_modified(bucket.etag, CACHE_CONTROL)
+        return Response(
+            content=bucket.body,
+            media_type="application/json",
+            headers={"ETag": bucket.etag, "Cache-Control": CACHE_CONTROL},
+        )
+
+    if start is None or end is None:
+        raise HTTPException(status_code=400, detail="Pass either month or start and end")
+    if end < start or (end - start).days > 366:
+        raise HTTPException(status_code=400, detail="Range must be positive and at most one year")
+
+    buckets = await run_in_threadpool(calendar_service.get_range, start, end)
+    # The range ETag is derived from the month ETags, so a 304 needs no serialization
+    etag = strong_etag(f"{start}:{end}:".encode() + ",".join(b.etag for b in buckets).encode())
+    if etag_matches(request, etag):
+        return not_modified(etag, CACHE_CONTROL)
+    low, high = start.isoformat(), (end + timedelta(days=1)).isoformat()
+    events = [e for bucket in buckets for e in bucket.events if low <= e["date"] < high]
+    body = json.dumps({"start": start.isoformat(), "end": end.isoformat(), "events": events}, ensure_ascii=False)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
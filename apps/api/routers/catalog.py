@@ -1,18 +1,87 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
+from datetime import date, timedelta
 
 from core.db import SessionLocal
+from core.http import etag_matches, not_modified
+from models.catalog import AddOn, Package, PackageEquipment, PricingRule
+from services.catalog_cache import catalog_cache, invalidate_catalog
+from services.pricing import PricingRuleError, compile_condition, pricing_context
 
 router = APIRouter()
 
-class Package(BaseModel):
+MAX_PRICED_DATES = 731
+# Clients may reuse a copy but must revalidate it; a 304 costs no DB work
+CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+class PackageBase(BaseModel):
+    name: str
+    description: str | None = None
+    duration_hours: float | None = None
+    base_price_ars: int
+
+class PackageResponse(PackageBase):
     id: int
+
+    class Config:
+        from_attributes = True
+
+class PackageEquipmentItem(BaseModel):
+    category: str
+    quantity: int = 1
+
+    class Config:
+        from_attributes = True
+
+class AddOnBase(BaseModel):
     name: str
+    description: str | None = None
+    price_ars: int
+
+class AddOnResponse(AddOnBase):
+    id: int
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+class PricingRuleBase(BaseModel):
+    name: str
+    condition: str | None = None
+    # Percent of the subtotal: 15 adds 15%, -10 takes 10% off
+    adjustment_percentage: float | None = Field(default=None, ge=-100, le=100)
+    adjustment_fixed_ars: int | None = None
+
+class PricingRuleResponse(PricingRuleBase):
+    id: int
+    version: int
+
+    class Config:
+        from_attributes = True
+
+class PriceBatchRequest(BaseModel):
+    package_id: int | None = None
+    addon_ids: List[int] = []
+    num_guests: int | None = None
+    event_type: str | None = None
+    duration_hours: float | None = None
+    location: str | None = None
+    # Either explicit dates or an inclusive start/end range
+    dates: List[date] | None = None
+    start: date | None = None
+    end: date | None = None
+
+class AppliedRule(BaseModel):
+    rule_id: int
+    name: str
+    adjustment_ars: int
+
+class PriceResult(BaseModel):
+    date: date
+    subtotal_ars: int
+    total_ars: int
+    applied_rules: List[AppliedRule]
 
 # Dependency
 def get_db():
@@ -22,14 +91,167 @@ def get_db():
     finally:
         db.close()
 
-@router.get("/packages", response_model=List[Package])
-def get_packages(db: Session = Depends(get_db)):
-    return []
+def validate_condition(condition: str | None):
+    try:
+        compile_condition(condition)
+    except PricingRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def load_packages(db: Session) -> list:
+    packages = db.query(Package).order_by(Package.id).all()
+    return [PackageResponse.model_validate(p).model_dump(mode="json") for p in packages]
+
+def load_addons(db: Session) -> list:
+    addons = db.query(AddOn).order_by(AddOn.id).all()
+    return [AddOnResponse.model_validate(a).model_dump(mode="json") for a in addons]
+
+def load_pricing_rules(db: Session) -> list:
+    rules = db.query(PricingRule).order_by(PricingRule.id).all()
+    return [PricingRuleResponse.model_validate(r).model_dump(mode="json") for r in rules]
+
+def cached_response(request: Request, name: str, load, db: Session) -> Response:
+    cached = catalog_cache.get_body(name, db, load)
+    if etag_matches(request, cached.etag):
+        return not_modified(cached.etag, CACHE_CONTROL)
+    return Response(
+        content=cached.body,
+        media_type="application/json",
+        headers={"ETag": cached.etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+def get_or_404(db: Session, model, item_id: int, label: str):
+    item = db.query(model).filter(model.id == item_id).first()
+    if not item:
+        raise HTTPException(status_code=404, detail=f"{label} not found")
+    return item
+
+@router.get("/packages", response_model=List[PackageResponse])
+def get_packages(request: Request, db: Session = Depends(get_db)):
+    return cached_response(request, "packages", load_packages, db)
+
+@router.post("/packages", response_model=PackageResponse)
+def create_package(package: PackageBase, db: Session = Depends(get_db)):
+    db_package = Package(**package.model_dump())
+    db.add(db_package)
+    invalidate_catalog(db)
+    db.commit()
+    db.refresh(db_package)
+    return db_package
+
+@router.put("/packages/{package_id}", response_model=PackageResponse)
+def update_package(package_id: int, package: PackageBase, db: Session = Depends(get_db)):
+    db_package = get_or_404(db, Package, package_id, "Package")
+    for field, value in package.model_dump().items():
+        setattr(db_package, field, value)
+    invalidate_catalog(db)
+    db.commit()
+    db.refresh(db_package)
+    return db_package
+
+@router.delete("/packages/{package_id}")
+def delete_package(package_id: int, db: Session = Depends(get_db)):
+    db.delete(get_or_404(db, Package, package_id, "Package"))
+    invalidate_catalog(db)
+    db.commit()
+    return {"message": "Package deleted"}
 
-@router.get("/addons")
-def get_addons(db: Session = Depends(get_db)):
-    return []
+@router.get("/packages/{package_id}/equipment", response_model=List[PackageEquipmentItem])
+def get_package_equipment(package_id: int, db: Session = Depends(get_db)):
+    return db.query(PackageEquipment).filter(PackageEquipment.package_id == package_id).all()
 
-@router.get("/pricing")
-def get_pricing_rules(db: Session = Depends(get_db)):
-    return []
+@router.put("/packages/{package_id}/equipment", response_model=List[PackageEquipmentItem])
+def set_package_equipment(package_id: int, items: List[PackageEquipmentItem], db: Session = Depends(get_db)):
+    get_or_404(db, Package, package_id, "Package")
+    if any(item.quantity < 1 for item in items):
+        raise HTTPException(status_code=400, detail="quantity must be at least 1")
+    db.query(PackageEquipment).filter(PackageEquipment.package_id == package_id).delete()
+    db.add_all([PackageEquipment(package_id=package_id, **item.model_dump()) for item in items])
+    db.commit()
+    return items
+
+@router.get("/addons", response_model=List[AddOnResponse])
+def get_addons(request: Request, db: Session = Depends(get_db)):
+    return cached_response(request, "addons", load_addons, db)
+
+@router.post("/addons", response_model=AddOnResponse)
+def create_addon(addon: AddOnBase, db: Session = Depends(get_db)):
+    db_addon = AddOn(**addon.model_dump())
+    db.add(db_addon)
+    invalidate_catalog(db)
+    db.commit()
+    db.refresh(db_addon)
+    return db_addon
+
+@router.put("/addons/{addon_id}", response_model=AddOnResponse)
+def update_addon(addon_id: int, addon: AddOnBase, db: Session = Depends(get_db)):
+    db_addon = get_or_404(db, AddOn, addon_id, "Add-on")
+    for field, value in addon.model_dump().items():
+        setattr(db_addon, field, value)
+    invalidate_catalog(db)
+    db.commit()
+    db.refresh(db_addon)
+    return db_addon
+
+@router.delete("/addons/{addon_id}")
+def delete_addon(addon_id: int, db: Session = Depends(get_db)):
+    db.delete(get_or_404(db, AddOn, addon_id, "Add-on"))
+    invalidate_catalog(db)
+    db.commit()
+    return {"message": "Add-on deleted"}
+
+@router.get("/pricing", response_model=List[PricingRuleResponse])
+def get_pricing_rules(request: Request, db: Session = Depends(get_db)):
+    return cached_response(request, "pricing", load_pricing_rules, db)
+
+@router.post("/pricing", response_model=PricingRuleResponse)
+def create_pricing_rule(rule: PricingRuleBase, db: Session = Depends(get_db)):
+    validate_condition(rule.condition)
+    db_rule = PricingRule(**rule.model_dump())
+    db.add(db_rule)
+    invalidate_catalog(db)
+    db.commit()
+    db.refresh(db_rule)
+    return db_rule
+
+@router.put("/pricing/{rule_id}", response_model=PricingRuleResponse)
+def update_pricing_rule(rule_id: int, rule: PricingRuleBase, db: Session = Depends(get_db)):
+    validate_condition(rule.condition)
+    db_rule = get_or_404(db, PricingRule, rule_id, "Pricing rule")
+    for field, value in rule.model_dump().items():
+        setattr(db_rule, field, value)
+    invalidate_catalog(db)
+    db.commit()
+    db.refresh(db_rule)
+    return db_rule
+
+@router.post("/pricing/batch", response_model=List[PriceResult])
+def price_batch(request: PriceBatchRequest, db: Session = Depends(get_db)):
+    if request.dates is not None:
+        dates = request.dates
+    elif request.start and request.end and request.end >= request.start:
+        dates = [request.start + timedelta(days=i) for i in range((request.end - request.start).days + 1)]
+    else:
+        raise HTTPException(status_code=400, detail="Pass dates or a start/end range")
+    if len(dates) > MAX_PRICED_DATES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PRICED_DATES} dates per request")
+
+    # Catalog and compiled rules come from the shared cache, not the DB
+    engine = catalog_cache.get_pricing_engine(db)
+    today = date.today()
+    contexts = (
+        pricing_context(
+            day,
+            package_id=request.package_id,
+            addon_ids=request.addon_ids,
+            num_guests=request.num_guests,
+            event_type=request.event_type,
+            duration_hours=request.duration_hours,
+            location=request.location,
+            today=today,
+        )
+        for day in dates
+    )
+    try:
+        return engine.price_many(contexts)
+    except PricingRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
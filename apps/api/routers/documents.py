@@ -1,11 +1,35 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File, HTTPException, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse
+from jose import JWTError, jwt
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List
 
 from core.db import SessionLocal
 from core.config import settings
-from models.document import Contract, Document
+from core.security import create_access_token
+from core.storage import (
+    MB,
+    ChunkedUploader,
+    StorageBackend,
+    StorageError,
+    StoredObject,
+    UploadTooLargeError,
+    get_storage,
+    object_key,
+    store_fileobj,
+    store_stream,
+)
+from models.document import Contract, Document, DocumentOwnerType, PreviewStatus
+from services.blobs import acquire_blob, adopt_upload, release_blob, reuse_blob
+from services.previews import PREVIEW_CONTENT_TYPE, build_preview
+from services.contracts import FORMATS, ContractRenderError, load_render_job, render_to_storage
 
 router = APIRouter()
 
@@ -27,10 +51,38 @@ class DocumentResponse(BaseModel):
     document_type: str
     file_url: str
     extra_data: str | None = None
+    content_type: str | None = None
+    size_bytes: int | None = None
+    checksum_sha256: str | None = None
+    preview_status: PreviewStatus | None = None
 
     class Config:
         from_attributes = True
 
+class PresignDocumentRequest(BaseModel):
+    owner_id: int
+    owner_type: str
+    document_type: str
+    filename: str
+    content_type: str | None = None
+
+class PresignContractRequest(BaseModel):
+    filename: str = "contract.pdf"
+    content_type: str | None = "application/pdf"
+
+class ReuseDocumentRequest(BaseModel):
+    owner_id: int
+    owner_type: str
+    document_type: str
+    filename: str
+    sha256: str
+    size_bytes: int
+
+class CompleteUploadRequest(BaseModel):
+    token: str
+
+UPLOAD_TOKEN_PURPOSE = "storage_upload"
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -54,28 +106,364 @@ def sign_contract(contract_id: int, db: Session = Depends(get_db)):
     db.refresh(contract)
     return {"status": "contract signed", "contract_id": contract.id}
 
+def parse_owner_type(owner_type: str) -> DocumentOwnerType:
+    try:
+        return DocumentOwnerType(owner_type.lower())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"owner_type must be one of {[t.value for t in DocumentOwnerType]}")
+
+def upload_limits() -> tuple[int, int]:
+    return settings.document_max_upload_mb * MB, settings.storage_part_size_mb * MB
+
+def new_document(owner_id: int, owner_type: DocumentOwnerType, document_type: str, filename: str | None,
+                 url: str, key: str, content_type: str | None, size: int, sha256: str,
+                 upload_id: str | None = None) -> Document:
+    return Document(
+        owner_id=owner_id,
+        owner_type=owner_type,
+        document_type=document_type,
+        file_url=url,
+        extra_data=json.dumps({"original_filename": filename}),
+        storage_key=key,
+        content_type=content_type,
+        size_bytes=size,
+        checksum_sha256=sha256,
+        upload_id=upload_id,
+    )
+
+def save_document(db: Session, storage: StorageBackend, owner_id: int, owner_type: DocumentOwnerType,
+                  document_type: str, filename: str | None, stored: StoredObject,
+                  upload_id: str | None = None) -> Document:
+    try:
+        # Identical content (the same DNI scan again) points at the copy already stored
+        key = acquire_blob(db, stored)
+        document = new_document(owner_id, owner_type, document_type, filename, storage.url(key), key,
+                                stored.content_type, stored.size, stored.sha256, upload_id)
+        db.add(document)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        storage.delete(stored.key)
+        raise
+    if key != stored.key:
+        storage.delete(stored.key)
+    db.refresh(document)
+    return document
+
 @router.post("/documents/upload", response_model=DocumentResponse)
 def upload_document(
+    background_tasks: BackgroundTasks,
     owner_id: int = Form(...),
     owner_type: str = Form(...),
     document_type: str = Form(...),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    storage: StorageBackend = Depends(get_storage),
 ):
-    # Placeholder for S3 upload logic - in a real app, this would return a presigned URL
-    # and the frontend would upload directly to S3. Here, we simulate the upload.
-    fake_file_url = f"https://{settings.s3_bucket}.s3.amazonaws.com/{file.filename}"
+    parsed_owner_type = parse_owner_type(owner_type)
+    max_bytes, part_size = upload_limits()
+    key = object_key(f"documents/{parsed_owner_type.value}/{owner_id}", file.filename)
+    try:
+        # The multipart body is already spooled to disk; copy it out part by part
+        stored = store_fileobj(storage, key, file.file, file.content_type, max_bytes, part_size)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    document = save_document(db, storage, owner_id, parsed_owner_type, document_type, file.filename, stored)
+    background_tasks.add_task(build_preview, document.checksum_sha256)
+    return document
 
-    # Create a dummy document record
-    new_document = Document(
-        owner_id=owner_id,
-        owner_type=owner_type,
-        document_type=document_type,
-        file_url=fake_file_url,
-        extra_data=f'{{"original_filename": "{file.filename}", "content_type": "{file.content_type}"}}',
+@router.put("/documents/stream", response_model=DocumentResponse)
+async def stream_document(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    owner_id: int,
+    owner_type: str,
+    document_type: str,
+    filename: str,
+    storage: StorageBackend = Depends(get_storage),
+):
+    """Raw request body straight to storage, one part in memory at a time."""
+    parsed_owner_type = parse_owner_type(owner_type)
+    max_bytes, part_size = upload_limits()
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise HTTPException(status_code=413, detail=str(UploadTooLargeError(max_bytes)))
+
+    key = object_key(f"documents/{parsed_owner_type.value}/{owner_id}", filename)
+    uploader = await run_in_threadpool(
+        ChunkedUploader, storage, key, request.headers.get("content-type"), max_bytes, part_size
+    )
+    try:
+        stored = await store_stream(uploader, request.stream())
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    db = SessionLocal()
+    try:
+        document = await run_in_threadpool(
+            save_document, db, storage, owner_id, parsed_owner_type, document_type, filename, stored
+        )
+        # Serialized before the session closes: preview_status lazy-loads the blob
+        response = await run_in_threadpool(DocumentResponse.model_validate, document)
+    finally:
+        db.close()
+    background_tasks.add_task(build_preview, response.checksum_sha256)
+    return response
+
+def presigned_download(storage: StorageBackend, key: str, filename: str | None, content_type: str | None) -> dict:
+    expires_in = settings.storage_presign_seconds
+    return {
+        "url": storage.presign_get(key, expires_in, filename=filename, content_type=content_type),
+        "expires_at": datetime.utcnow() + timedelta(seconds=expires_in),
+    }
+
+def document_filename(document: Document) -> str:
+    return (json.loads(document.extra_data or "{}").get("original_filename") or "document").replace('"', '')
+
+def issue_upload(storage: StorageBackend, key: str, content_type: str | None, claims: dict) -> dict:
+    max_bytes, _ = upload_limits()
+    expires_in = settings.storage_presign_seconds
+    presigned = storage.presign_put(key, content_type, max_bytes, expires_in)
+    # Everything the completion step needs travels in a signed token, not in the DB
+    token = create_access_token(
+        dict(claims, purpose=UPLOAD_TOKEN_PURPOSE, key=key, content_type=content_type, upload_id=uuid.uuid4().hex),
+        expires_delta=timedelta(seconds=expires_in * 2),
     )
-    db.add(new_document)
+    return {
+        "method": presigned.method,
+        "url": presigned.url,
+        "headers": presigned.headers,
+        "max_bytes": max_bytes,
+        "expires_at": datetime.utcnow() + timedelta(seconds=expires_in),
+        "token": token,
+    }
+
+def decode_upload_token(token: str, kind: str) -> dict:
+    try:
+        claims = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+    except JWTError:
+        raise HTTPException(status_code=400, detail="Invalid or expired upload token")
+    if claims.get("purpose") != UPLOAD_TOKEN_PURPOSE or claims.get("kind") != kind:
+        raise HTTPException(status_code=400, detail="Invalid upload token")
+    return claims
+
+def verify_upload(storage: StorageBackend, claims: dict) -> StoredObject:
+    key = claims["key"]
+    info = storage.head(key)
+    if info is None:
+        raise HTTPException(status_code=409, detail="File has not been uploaded yet")
+    max_bytes, _ = upload_limits()
+    if info.size > max_bytes:
+        # Presigned PUTs cannot cap the size up front, so oversized files are dropped here
+        storage.delete(key)
+        raise HTTPException(status_code=413, detail=str(UploadTooLargeError(max_bytes)))
+    return StoredObject(
+        key=key,
+        size=info.size,
+        sha256=None,
+        content_type=info.content_type or claims.get("content_type"),
+        url=storage.url(key),
+    )
+
+@router.post("/documents/presign")
+def presign_document_upload(request: PresignDocumentRequest, storage: StorageBackend = Depends(get_storage)):
+    owner_type = parse_owner_type(request.owner_type)
+    key = object_key(f"documents/{owner_type.value}/{request.owner_id}", request.filename)
+    return issue_upload(storage, key, request.content_type, {
+        "kind": "document",
+        "owner_id": request.owner_id,
+        "owner_type": owner_type.value,
+        "document_type": request.document_type,
+        "filename": request.filename,
+    })
+
+@router.post("/documents/complete", response_model=DocumentResponse)
+def complete_document_upload(
+    request: CompleteUploadRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    storage: StorageBackend = Depends(get_storage),
+):
+    claims = decode_upload_token(request.token, "document")
+    # Completing twice (client retry) returns the same record; tokens issued
+    # before upload ids existed fall back to the presigned key
+    upload_id = claims.get("upload_id") or claims["key"]
+    existing = db.query(Document).filter(Document.upload_id == upload_id).first()
+    if existing:
+        return existing
+    uploaded = verify_upload(storage, claims)
+    max_bytes, part_size = upload_limits()
+    try:
+        # The presigned URL may still be live, so the blob must not keep its key
+        stored = adopt_upload(storage, uploaded, max_bytes, part_size)
+    except UploadTooLargeError as e:
+        storage.delete(uploaded.key)
+        raise HTTPException(status_code=413, detail=str(e))
+    except StorageError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        document = save_document(db, storage, claims["owner_id"], DocumentOwnerType(claims["owner_type"]),
+                                 claims["document_type"], claims["filename"], stored, upload_id)
+    except IntegrityError:
+        # A concurrent completion of the same upload saved it first
+        existing = db.query(Document).filter(Document.upload_id == upload_id).first()
+        if not existing:
+            raise
+        return existing
+    storage.delete(uploaded.key)
+    background_tasks.add_task(build_preview, document.checksum_sha256)
+    return document
+
+@router.post("/documents/reuse", response_model=DocumentResponse)
+def reuse_document(
+    request: ReuseDocumentRequest,
+    db: Session = Depends(get_db),
+    storage: StorageBackend = Depends(get_storage),
+):
+    """Attaches an already stored file by its SHA-256, skipping the upload; 404 means upload it."""
+    owner_type = parse_owner_type(request.owner_type)
+    blob = reuse_blob(db, request.sha256, request.size_bytes)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="No stored file with that checksum")
+    document = new_document(request.owner_id, owner_type, request.document_type, request.filename,
+                            storage.url(blob.storage_key), blob.storage_key, blob.content_type,
+                            blob.size_bytes, blob.sha256)
+    db.add(document)
+    db.commit()
+    db.refresh(document)
+    return document
+
+@router.delete("/documents/{document_id}")
+def delete_document(document_id: int, db: Session = Depends(get_db)):
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    # The object itself goes once no document references it (services.blobs.collect_garbage)
+    if document.checksum_sha256:
+        release_blob(db, document.checksum_sha256)
+    db.delete(document)
+    db.commit()
+    return {"status": "document deleted", "document_id": document_id}
+
+@router.get("/documents/{document_id}/download-url")
+def get_document_download_url(
+    document_id: int,
+    db: Session = Depends(get_db),
+    storage: StorageBackend = Depends(get_storage),
+):
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document or not document.storage_key:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return presigned_download(storage, document.storage_key, document_filename(document), document.content_type)
+
+@router.get("/documents/{document_id}/download")
+def download_document(
+    document_id: int,
+    db: Session = Depends(get_db),
+    storage: StorageBackend = Depends(get_storage),
+):
+    # Redirect to storage so the bytes never go through the API workers
+    return RedirectResponse(get_document_download_url(document_id, db, storage)["url"], status_code=307)
+
+@router.get("/documents/{document_id}/preview")
+def get_document_preview(
+    document_id: int,
+    db: Session = Depends(get_db),
+    storage: StorageBackend = Depends(get_storage),
+):
+    # Built once in the background; viewing it is a redirect to a stored JPEG
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if document.preview_status != PreviewStatus.READY:
+        status = document.preview_status.value if document.preview_status else "unavailable"
+        raise HTTPException(status_code=404, detail=f"Preview {status}")
+    url = presigned_download(storage, document.blob.preview_key, None, PREVIEW_CONTENT_TYPE)["url"]
+    return RedirectResponse(url, status_code=307)
+
+@router.post("/documents/{document_id}/preview")
+def rebuild_document_preview(document_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Queues the preview again, e.g. after a failure or after installing Pillow."""
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document or not document.blob:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if document.blob.preview_status != PreviewStatus.PROCESSING:
+        document.blob.preview_status = PreviewStatus.PENDING
+        db.commit()
+    background_tasks.add_task(build_preview, document.checksum_sha256)
+    return {"status": "preview queued", "document_id": document_id}
+
+@router.post("/contracts/{contract_id}/presign")
+def presign_contract_upload(
+    contract_id: int,
+    request: PresignContractRequest,
+    db: Session = Depends(get_db),
+    storage: StorageBackend = Depends(get_storage),
+):
+    contract = db.query(Contract).filter(Contract.id == contract_id).first()
+    if not contract:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    key = object_key(f"contracts/{contract.booking_id}/{contract.id}", request.filename)
+    return issue_upload(storage, key, request.content_type, {"kind": "contract", "contract_id": contract.id})
+
+@router.post("/contracts/complete", response_model=ContractResponse)
+def complete_contract_upload(
+    request: CompleteUploadRequest,
+    db: Session = Depends(get_db),
+    storage: StorageBackend = Depends(get_storage),
+):
+    claims = decode_upload_token(request.token, "contract")
+    stored = verify_upload(storage, claims)
+    contract = db.query(Contract).filter(Contract.id == claims["contract_id"]).first()
+    if not contract:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    contract.file_url = stored.url
+    contract.storage_key = stored.key
     db.commit()
-    db.refresh(new_document)
+    db.refresh(contract)
+    return contract
+
+@router.get("/contracts/{contract_id}/download-url")
+def get_contract_download_url(
+    contract_id: int,
+    db: Session = Depends(get_db),
+    storage: StorageBackend = Depends(get_storage),
+):
+    contract = db.query(Contract).filter(Contract.id == contract_id).first()
+    if not contract or not contract.storage_key:
+        raise HTTPException(status_code=404, detail="Contract file not found")
+    return presigned_download(storage, contract.storage_key, f"contract-{contract.id}.pdf", None)
+
+@router.post("/contracts/{contract_id}/render")
+async def render_contract_file(
+    contract_id: int,
+    format: str = "html",
+    storage: StorageBackend = Depends(get_storage),
+):
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {list(FORMATS)}")
+    db = SessionLocal()
+    try:
+        job = await run_in_threadpool(load_render_job, db, contract_id)
+    except ContractRenderError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    finally:
+        db.close()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    template, context = job
+    try:
+        key, cached = await render_to_storage(storage, template, context, format)
+    except ContractRenderError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    download = presigned_download(storage, key, f"contract-{contract_id}.{format}", FORMATS[format])
+    return dict(download, cached=cached)
 
-    return new_document
+@router.get("/contracts/{contract_id}/rendered")
+async def get_rendered_contract(
+    contract_id: int,
+    format: str = "html",
+    storage: StorageBackend = Depends(get_storage),
+):
+    rendered = await render_contract_file(contract_id, format, storage)
+    return RedirectResponse(rendered["url"], status_code=307)
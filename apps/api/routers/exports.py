@@ -0,0 +1,33 @@
+from datetime import date, datetime
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from services.exports import EXPORTS, FORMATS, stream_export
+
+router = APIRouter()
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("csv", description="csv or ndjson"),
+    start: date | None = None,
+    end: date | None = None,
+    gzip: bool = False,
+):
+    # Rows are fetched in batches and written as they arrive, so memory use
+    # does not grow with the export. Dates filter leads by creation, bookings
+    # by confirmation and payments by approval; both ends are inclusive.
+    if dataset not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export; one of {', '.join(EXPORTS)}")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_export(dataset, format, start, end, compress=gzip),
+        media_type="application/gzip" if gzip else FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+from core.config import settings
+from core.storage import MB, ChunkedUploader, LocalStorage, StorageError, UploadTooLargeError, get_storage, store_stream
+
+# Serves presigned URLs of the local storage backend, standing in for S3 in
+# development and tests. Only mounted when STORAGE_BACKEND=local.
+router = APIRouter()
+
+def get_local_storage() -> LocalStorage:
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=404, detail="Not found")
+    return storage
+
+def verify(storage: LocalStorage, method: str, key: str, request: Request) -> dict:
+    try:
+        return storage.verify(method, key, dict(request.query_params))
+    except StorageError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+@router.put("/{key:path}")
+async def put_file(key: str, request: Request, storage: LocalStorage = Depends(get_local_storage)):
+    params = verify(storage, "PUT", key, request)
+    uploader = await run_in_threadpool(
+        ChunkedUploader, storage, key, params.get("content_type"), int(params["max_bytes"]),
+        settings.storage_part_size_mb * MB,
+    )
+    try:
+        stored = await store_stream(uploader, request.stream())
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return {"key": stored.key, "size": stored.size, "sha256": stored.sha256}
+
+@router.get("/{key:path}")
+def get_file(key: str, request: Request, storage: LocalStorage = Depends(get_local_storage)):
+    params = verify(storage, "GET", key, request)
+    path = storage.path(key)
+    if storage.head(key) is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path, media_type=params.get("content_type"), filename=params.get("filename"))
@@ -1,16 +1,48 @@
+from datetime import datetime
+
 from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
+
+from core.http import etag_matches, not_modified
+from routers.calendar import parse_month
+from services.calendar import calendar_service, month_label
+from services.instagram_feed import instagram_feed
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
+AGENDA_CACHE_CONTROL = "public, max-age=60"
+
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    # We will add logic to fetch instagram feed later
-    return templates.TemplateResponse("home.html", {"request": request, "instagram_posts": []})
+    # Cached feed (services.instagram_feed), so Instagram's latency never reaches the page
+    return templates.TemplateResponse(request, "home.html", {"instagram_posts": instagram_feed.posts()})
 
 @router.get("/agenda", response_class=HTMLResponse)
-async def agenda(request: Request):
-    # We will add logic to fetch events later
-    return templates.TemplateResponse("agenda.html", {"request": request, "events": []})
+async def agenda(request: Request, month: str | None = None):
+    current = parse_month(month) if month else (datetime.utcnow().year, datetime.utcnow().month)
+    bucket = await run_in_threadpool(calendar_service.get_month, current)
+    if etag_matches(request, bucket.html_etag):
+        return not_modified(bucket.html_etag, AGENDA_CACHE_CONTROL)
+
+    # The month's event list is rendered once per bucket version and reused
+    fragment = bucket.fragments.get("agenda")
+    if fragment is None:
+        fragment = templates.get_template("_agenda_month.html").render(events=bucket.events)
+        bucket.fragments["agenda"] = fragment
+
+    year, number = current
+    previous_month = (year - 1, 12) if number == 1 else (year, number - 1)
+    next_month = (year + 1, 1) if number == 12 else (year, number + 1)
+    response = templates.TemplateResponse(request, "agenda.html", {
+        "month": month_label(current),
+        "previous_month": month_label(previous_month),
+        "next_month": month_label(next_month),
+        "events_fragment": Markup(fragment),
+    })
+    response.headers["ETag"] = bucket.html_etag
+    response.headers["Cache-Control"] = AGENDA_CACHE_CONTROL
+    return response
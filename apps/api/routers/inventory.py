@@ -1,10 +1,28 @@
-from fastapi import APIRouter, Depends
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List
+from datetime import datetime
 
 from core.db import SessionLocal
+from models.event import Event
 from models.inventory import Equipment, EquipmentAssignment
+from services.checklist import CHECK_IN, CHECK_OUT, SCAN_BATCH_SIZE, ChecklistScanner
+from services.equipment import (
+    AllocationError,
+    EquipmentConflictError,
+    allocate_equipment,
+    assignment_entries,
+    equipment_index,
+    package_requirements,
+    publish_assignments,
+    publish_unassigned,
+    release_assignments,
+)
+from services.inventory_counters import inventory_summary, rebuild_counters
 
 router = APIRouter()
 
@@ -21,10 +39,31 @@ class EquipmentAssignmentResponse(BaseModel):
     id: int
     event_id: int
     equipment_id: int
+    starts_at: datetime
+    ends_at: datetime
 
     class Config:
         from_attributes = True
 
+class AllocationRequest(BaseModel):
+    # Either a package whose equipment requirements to fill, or explicit category counts
+    package_id: int | None = None
+    requirements: Dict[str, int] | None = None
+
+class CategorySummary(BaseModel):
+    category: str | None = None
+    available: int
+    in_use: int
+    maintenance: int
+    missing: int
+    total: int
+
+class ScanBatchRequest(BaseModel):
+    # Item ids, item or equipment names, or {"item_id": ...} / {"name": ...} objects
+    scans: List[Any]
+
+SCAN_ACTIONS = {"check-out": CHECK_OUT, "check-in": CHECK_IN}
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -38,7 +77,118 @@ def get_equipment(db: Session = Depends(get_db)):
     equipment = db.query(Equipment).all()
     return equipment
 
+@router.get("/summary", response_model=List[CategorySummary])
+def get_inventory_summary(db: Session = Depends(get_db)):
+    # Reads the maintained counters: one row per (category, status), not per item
+    return inventory_summary(db)
+
+@router.post("/summary/rebuild", response_model=List[CategorySummary])
+def rebuild_inventory_summary(db: Session = Depends(get_db)):
+    rebuild_counters(db)
+    return inventory_summary(db)
+
+@router.get("/equipment/free", response_model=List[EquipmentResponse])
+def get_free_equipment(category: str, start: datetime, end: datetime, db: Session = Depends(get_db)):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    free_ids = equipment_index.free(category, start, end)
+    if not free_ids:
+        return []
+    return db.query(Equipment).filter(Equipment.id.in_(free_ids)).order_by(Equipment.id).all()
+
 @router.get("/assignments", response_model=List[EquipmentAssignmentResponse])
-def get_assignments(db: Session = Depends(get_db)):
-    assignments = db.query(EquipmentAssignment).all()
-    return assignments
+def get_assignments(event_id: int | None = None, db: Session = Depends(get_db)):
+    query = db.query(EquipmentAssignment)
+    if event_id is not None:
+        query = query.filter(EquipmentAssignment.event_id == event_id)
+    return query.all()
+
+@router.post("/events/{event_id}/allocate", response_model=List[EquipmentAssignmentResponse])
+def allocate_event_equipment(event_id: int, request: AllocationRequest, db: Session = Depends(get_db)):
+    event = db.query(Event).filter(Event.id == event_id).first()
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if request.package_id is not None:
+        requirements = package_requirements(db, request.package_id)
+    elif request.requirements:
+        requirements = request.requirements
+    else:
+        raise HTTPException(status_code=400, detail="Pass package_id or requirements")
+
+    try:
+        assignments = allocate_equipment(db, event, requirements)
+    except AllocationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except EquipmentConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    entries = assignment_entries(assignments)
+    db.commit()
+    publish_assignments(entries)
+    return [
+        EquipmentAssignmentResponse(id=i, event_id=event_id, equipment_id=e, starts_at=s, ends_at=f)
+        for i, e, s, f in entries
+    ]
+
+@router.delete("/assignments/{assignment_id}")
+def delete_assignment(assignment_id: int, db: Session = Depends(get_db)):
+    if not db.query(EquipmentAssignment).filter(EquipmentAssignment.id == assignment_id).first():
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    release_assignments(db, [assignment_id])
+    db.commit()
+    publish_unassigned([assignment_id])
+    return {"message": "Assignment deleted"}
+
+@router.post("/events/{event_id}/checklist/{action}")
+async def scan_checklist(event_id: int, action: str, request: Request):
+    """Bulk check-out/check-in; send {"scans": [...]} or an application/x-ndjson stream.
+
+    NDJSON bodies are applied batch by batch as they arrive and answered
+    with one NDJSON result line per scan.
+    """
+    if action not in SCAN_ACTIONS:
+        raise HTTPException(status_code=404, detail="Unknown checklist action")
+    action = SCAN_ACTIONS[action]
+    db = SessionLocal()
+    try:
+        event = await run_in_threadpool(db.get, Event, event_id)
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+        scanner = await run_in_threadpool(ChecklistScanner, db, event_id)
+
+        if "ndjson" not in request.headers.get("content-type", ""):
+            try:
+                body = ScanBatchRequest.model_validate(await request.json())
+            except ValueError:
+                raise HTTPException(status_code=422, detail="Expected {\"scans\": [...]}")
+            results = []
+            for i in range(0, len(body.scans), SCAN_BATCH_SIZE):
+                results += await run_in_threadpool(scanner.apply, action, body.scans[i:i + SCAN_BATCH_SIZE])
+            return {"results": results}
+
+        lines: list[str] = []
+        batch: list = []
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *complete, buffer = buffer.split(b"\n")
+            for line in complete:
+                if not line.strip():
+                    continue
+                try:
+                    batch.append(json.loads(line))
+                except ValueError:
+                    # Keeps the position count in step with the input lines
+                    batch.append({"invalid": line.decode(errors="replace")})
+            if len(batch) >= SCAN_BATCH_SIZE:
+                lines += [json.dumps(r) for r in await run_in_threadpool(scanner.apply, action, batch)]
+                batch = []
+        if buffer.strip():
+            try:
+                batch.append(json.loads(buffer))
+            except ValueError:
+                batch.append({"invalid": buffer.decode(errors="replace")})
+        if batch:
+            lines += [json.dumps(r) for r in await run_in_threadpool(scanner.apply, action, batch)]
+        return Response(content="\n".join(lines) + "\n", media_type="application/x-ndjson")
+    finally:
+        db.close()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List
@@ -7,6 +7,9 @@ from datetime import datetime
 from core.db import SessionLocal
 from models.event import Lead as DBLead
 from models.event import LeadStatus
+from services.lead_dedup import check_leads, dedupe_pending
+from services.lead_ingest import lead_ingest_queue
+from services.lead_search import LeadFilters, search_leads
 
 router = APIRouter()
 
@@ -28,10 +31,18 @@ class LeadResponse(LeadCreate):
     event_location: str | None = None
     num_guests: int | None = None
     interested_services: str | None = None
+    source: str | None = None
+    duplicate_of_id: int | None = None
 
     class Config:
         from_attributes = True # Use from_attributes instead of orm_mode for Pydantic v2
 
+class LeadSearchResponse(BaseModel):
+    items: List[LeadResponse]
+    next_cursor: str | None = None
+    # Only on the first page; counts per status and per source
+    facets: dict[str, dict[str, int]] | None = None
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -44,10 +55,70 @@ def get_db():
 def create_lead(lead: LeadCreate, db: Session = Depends(get_db)):
     db_lead = DBLead(**lead.model_dump())
     db.add(db_lead)
+    db.flush()
+    # Links the lead to an earlier submission by the same person, if any
+    check_leads(db, [db_lead.id])
     db.commit()
     db.refresh(db_lead)
     return db_lead
 
+@router.post("/ingest", status_code=202)
+def ingest_lead(lead: LeadCreate, source: str | None = None):
+    """Contact form endpoint: journals the lead and answers before it reaches the DB."""
+    receipt = lead_ingest_queue.submit(lead.model_dump(mode="json"), source)
+    return {"receipt": receipt, "status": "queued"}
+
+@router.get("/receipts/{receipt}")
+def get_lead_receipt(receipt: str, db: Session = Depends(get_db)):
+    lead = db.query(DBLead).filter(DBLead.receipt == receipt).first()
+    if lead:
+        return {"receipt": receipt, "status": "stored", "lead_id": lead.id}
+    if lead_ingest_queue.is_queued(receipt):
+        return {"receipt": receipt, "status": "queued", "lead_id": None}
+    # Possibly still queued on another worker
+    raise HTTPException(status_code=404, detail="Receipt not found")
+
+@router.get("/search", response_model=LeadSearchResponse)
+def search(
+    status: List[LeadStatus] = Query(default=[]),
+    source: List[str] = Query(default=[]),
+    event_type: List[str] = Query(default=[]),
+    event_date_from: datetime | None = None,
+    event_date_to: datetime | None = None,
+    q: str | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+):
+    filters = LeadFilters(
+        status=status, source=source, event_type=event_type,
+        event_date_from=event_date_from, event_date_to=event_date_to, q=q,
+    )
+    try:
+        # Facets only on the first page; later pages keep the counts already shown
+        leads, next_cursor, facets = search_leads(db, filters, cursor, limit, facets=cursor is None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": leads, "next_cursor": next_cursor, "facets": facets}
+
+@router.post("/dedupe")
+def dedupe_leads():
+    """Checks every lead not yet checked for duplicates (normally a background job)."""
+    return dedupe_pending()
+
+@router.get("/{lead_id}/duplicates", response_model=List[LeadResponse])
+def get_lead_duplicates(lead_id: int, db: Session = Depends(get_db)):
+    lead = db.query(DBLead).filter(DBLead.id == lead_id).first()
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    original_id = lead.duplicate_of_id or lead.id
+    return (
+        db.query(DBLead)
+        .filter((DBLead.id == original_id) | (DBLead.duplicate_of_id == original_id), DBLead.id != lead_id)
+        .order_by(DBLead.id)
+        .all()
+    )
+
 @router.get("/", response_model=List[LeadResponse])
 def get_leads(db: Session = Depends(get_db)):
     leads = db.query(DBLead).all()
@@ -1,22 +1,41 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-import mercadopago
-import os
 
 from core.db import SessionLocal
-from models.event import Booking, Payment, PaymentStatus
+from models.event import Booking, BookingStatus, Payment, PaymentStatus
+from services.availability import (
+    SlotConflictError,
+    index_entries,
+    publish_released,
+    publish_reserved,
+    release_slots,
+    reserve_booking_slot,
+)
+from services.booking_transitions import bookings_with_live_payments, can_transition
+from services.checkout import (
+    CheckoutConflictError,
+    checkout_key,
+    get_cached_checkout,
+    get_or_create_checkout,
+    release_checkout,
+)
+from services.payment_gateway import (
+    GatewayUnavailableError,
+    MercadoPagoClient,
+    PaymentGatewayError,
+    get_payment_gateway,
+)
 
 router = APIRouter()
 
-# Initialize Mercado Pago SDK
-mp_sdk = mercadopago.SDK(os.environ.get("MP_ACCESS_TOKEN"))
-
 class PaymentPreferenceCreate(BaseModel):
     booking_id: int
     amount: float
     description: str
     payer_email: str
+    type: str = "deposit" # 'deposit' or 'total'
 
 # Dependency
 def get_db():
@@ -26,61 +45,50 @@ def get_db():
     finally:
         db.close()
 
+def gateway_http_error(e: PaymentGatewayError) -> HTTPException:
+    if isinstance(e, GatewayUnavailableError):
+        return HTTPException(status_code=503, detail="Mercado Pago is temporarily unavailable")
+    return HTTPException(status_code=502, detail=f"Mercado Pago error: {e}")
+
 @router.post("/mp/create-preference")
-def create_payment_preference(preference_data: PaymentPreferenceCreate, db: Session = Depends(get_db)):
+def create_payment_preference(
+    preference_data: PaymentPreferenceCreate,
+    db: Session = Depends(get_db),
+    gateway: MercadoPagoClient = Depends(get_payment_gateway),
+):
+    # Double-clicks and client retries are answered from the cache, no DB round trip
+    cached = get_cached_checkout(checkout_key(
+        preference_data.booking_id, preference_data.type, int(round(preference_data.amount * 100))
+    ))
+    if cached:
+        return cached
+
     booking = db.query(Booking).filter(Booking.id == preference_data.booking_id).first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
 
-    # Create a payment record in our DB first
-    new_payment = Payment(
-        booking_id=booking.id,
-        type="deposit", # Assuming this is for a deposit
-        amount_ars=int(preference_data.amount * 100), # Store in cents
-        status=PaymentStatus.PENDING
-    )
-    db.add(new_payment)
-    db.commit()
-    db.refresh(new_payment)
-
-    preference = {
-        "items": [
-            {
-                "title": preference_data.description,
-                "quantity": 1,
-                "unit_price": preference_data.amount,
-            }
-        ],
-        "payer": {
-            "email": preference_data.payer_email
-        },
-        "back_urls": {
-            "success": "https://your-frontend.com/success", # TODO: Replace with actual frontend URL
-            "failure": "https://your-frontend.com/failure", # TODO: Replace with actual frontend URL
-            "pending": "https://your-frontend.com/pending", # TODO: Replace with actual frontend URL
-        },
-        "auto_return": "approved",
-        "notification_url": f"https://your-backend.com/payments/webhooks/mp?payment_id={new_payment.id}", # TODO: Replace with actual backend URL
-        "external_reference": str(new_payment.id) # Our internal payment ID
-    }
-
     try:
-        mp_preference_response = mp_sdk.preference().create(preference)
-        mp_preference_id = mp_preference_response["response"]["id"]
-        mp_init_point = mp_preference_response["response"]["init_point"]
-
-        # Update our payment record with MP preference ID
-        new_payment.mp_preference_id = mp_preference_id
-        db.commit()
-        db.refresh(new_payment)
-
-        return {"preference_id": mp_preference_id, "init_point": mp_init_point}
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Mercado Pago error: {e}")
+        return get_or_create_checkout(
+            db,
+            gateway,
+            booking_id=booking.id,
+            payment_type=preference_data.type,
+            amount=preference_data.amount,
+            description=preference_data.description,
+            payer_email=preference_data.payer_email,
+        )
+    except PaymentGatewayError as e:
+        raise gateway_http_error(e)
+    except CheckoutConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 @router.post("/webhooks/mp")
-async def webhook_mercado_pago(request: Request, payment_id: int | None = None, db: Session = Depends(get_db)):
+async def webhook_mercado_pago(
+    request: Request,
+    payment_id: int | None = None,
+    db: Session = Depends(get_db),
+    gateway: MercadoPagoClient = Depends(get_payment_gateway),
+):
     # Validate webhook signature (TODO: Implement proper signature validation)
     # For now, we'll just process the notification
 
@@ -91,32 +99,58 @@ async def webhook_mercado_pago(request: Request, payment_id: int | None = None,
         payment_id_mp = data.get("data", {}).get("id")
         if payment_id_mp:
             try:
-                payment_info = mp_sdk.payment().get(payment_id_mp)
-                status = payment_info["response"]["status"]
-                external_reference = payment_info["response"]["external_reference"]
+                # The gateway client is blocking; keep it off the event loop
+                payment_info = await run_in_threadpool(gateway.get_payment, payment_id_mp)
+            except PaymentGatewayError as e:
+                print(f"Error fetching Mercado Pago payment {payment_id_mp}: {e}")
+                raise gateway_http_error(e)
+
+            try:
+                status = payment_info["status"]
+                external_reference = payment_info["external_reference"]
 
                 if external_reference and external_reference.isdigit():
                     our_payment_id = int(external_reference)
                     our_payment = db.query(Payment).filter(Payment.id == our_payment_id).first()
 
                     if our_payment:
+                        if status in ("approved", "rejected"):
+                            # A settled payment can no longer be reused for checkout
+                            release_checkout(db, our_payment.checkout_key)
+                            our_payment.checkout_key = None
+                        reserved, released = [], []
                         if status == "approved":
                             our_payment.status = PaymentStatus.APPROVED
                             # Update booking status
                             booking = db.query(Booking).filter(Booking.id == our_payment.booking_id).first()
-                            if booking:
-                                booking.status = BookingStatus.CONFIRMED
-                                db.add(booking)
+                            if booking and can_transition(booking.status, BookingStatus.CONFIRMED):
+                                try:
+                                    reserve_booking_slot(db, booking)
+                                    booking.status = BookingStatus.CONFIRMED
+                                    db.add(booking)
+                                    reserved = index_entries([booking])
+                                except SlotConflictError as e:
+                                    # Paid but the slot is taken: keep it pending for an admin to resolve
+                                    print(f"Booking {booking.id} not confirmed: {e}")
                         elif status == "rejected":
                             our_payment.status = PaymentStatus.REJECTED
                             booking = db.query(Booking).filter(Booking.id == our_payment.booking_id).first()
-                            if booking:
-                                booking.status = BookingStatus.CANCELLED
-                                db.add(booking)
+                            # A failed attempt must not cancel a booking another payment already
+                            # confirmed or may still confirm
+                            if booking and booking.status == BookingStatus.PENDING_DEPOSIT:
+                                if bookings_with_live_payments(db, [booking.id], [our_payment.id]):
+                                    print(f"Booking {booking.id} kept: it has other approved or pending payments")
+                                else:
+                                    booking.status = BookingStatus.CANCELLED
+                                    db.add(booking)
+                                    release_slots(db, [booking.id])
+                                    released.append(booking.id)
                         elif status == "pending":
                             our_payment.status = PaymentStatus.PENDING
                         db.commit()
                         db.refresh(our_payment)
+                        publish_reserved(reserved)
+                        publish_released(released)
                         print(f"Payment {our_payment_id} updated to {our_payment.status}")
 
             except Exception as e:
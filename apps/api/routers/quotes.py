@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+
+from core.db import SessionLocal
+from models.event import Quote
+from services.payment_gateway import MercadoPagoClient, get_payment_gateway
+from services.quotes import ensure_payment_links, quote_leads, quote_new_leads
+
+router = APIRouter()
+
+MAX_BATCH_LEADS = 1000
+
+class QuoteBatchRequest(BaseModel):
+    lead_ids: List[int]
+    # Override what is quoted; by default it is read from the lead's interested services
+    package_id: int | None = None
+    addon_ids: List[int] | None = None
+
+class QuoteResponse(BaseModel):
+    id: int
+    lead_id: int | None = None
+    client_id: int | None = None
+    price_ars: int
+    package_id: int | None = None
+    addon_ids: List[int] | None = None
+    created_at: datetime | None = None
+    deposit_payment_link: str | None = None
+    total_payment_link: str | None = None
+
+    class Config:
+        from_attributes = True
+
+# Dependency
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.post("/batch")
+def create_quotes(request: QuoteBatchRequest, db: Session = Depends(get_db)):
+    if len(request.lead_ids) > MAX_BATCH_LEADS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_LEADS} leads per request")
+    return quote_leads(db, list(dict.fromkeys(request.lead_ids)), request.package_id, request.addon_ids)
+
+@router.post("/batch/new-leads")
+async def create_quotes_for_new_leads():
+    return await run_in_threadpool(quote_new_leads)
+
+@router.get("/", response_model=List[QuoteResponse])
+def get_quotes(lead_id: int | None = None, db: Session = Depends(get_db)):
+    query = db.query(Quote)
+    if lead_id is not None:
+        query = query.filter(Quote.lead_id == lead_id)
+    return query.order_by(Quote.id.desc()).limit(500).all()
+
+@router.get("/{quote_id}", response_model=QuoteResponse)
+def get_quote(
+    quote_id: int,
+    db: Session = Depends(get_db),
+    gateway: MercadoPagoClient = Depends(get_payment_gateway),
+):
+    quote = db.query(Quote).filter(Quote.id == quote_id).first()
+    if not quote:
+        raise HTTPException(status_code=404, detail="Quote not found")
+    # Checkouts are only created for quotes someone actually opens
+    return ensure_payment_links(db, gateway, quote)
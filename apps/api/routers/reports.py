@@ -1,18 +1,74 @@
-from fastapi import APIRouter
+from datetime import date
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from core.db import SessionLocal
+from services.report_rollups import overview, rebuild_rollups
+from services.revenue_series import GRANULARITIES, MAX_BUCKETS, bucket_starts, default_range, revenue_series_cache
 
 router = APIRouter()
 
 class OverviewReport(BaseModel):
+    start: date | None = None
+    end: date | None = None
     total_leads: int
+    leads_by_status: Dict[str, int]
+    confirmed_bookings: int
+    booked_value_ars: int
+    approved_payments: int
+    total_revenue: float # ARS
+
+class RevenuePoint(BaseModel):
+    period: date # First day of the day/week/month
+    approved_payments: int
+    revenue: float # ARS
     confirmed_bookings: int
-    total_revenue: float
+    booked_value_ars: int
+
+class RevenueSeries(BaseModel):
+    granularity: str
+    start: date
+    end: date
+    points: List[RevenuePoint]
+    cached_buckets: int
+
+# Dependency
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
 
 @router.get("/overview", response_model=OverviewReport)
-def get_overview_report():
-    # Placeholder for actual report generation logic
-    return {
-        "total_leads": 100,
-        "confirmed_bookings": 50,
-        "total_revenue": 150000.00
-    }
+def get_overview_report(start: date | None = None, end: date | None = None, db: Session = Depends(get_db)):
+    # Sums the daily rollups, so the cost depends on the range, not on table sizes
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return overview(db, start, end)
+
+@router.post("/rebuild", response_model=OverviewReport)
+def rebuild_reports(db: Session = Depends(get_db)):
+    rebuild_rollups(db)
+    return overview(db)
+
+@router.get("/revenue", response_model=RevenueSeries)
+def get_revenue_series(
+    granularity: str = "day",
+    start: date | None = None,
+    end: date | None = None,
+    db: Session = Depends(get_db),
+):
+    # Approved payments and confirmed bookings per period; unchanged periods come from the cache
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    default_start, end = default_range(granularity, end)
+    start = start or default_start
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if len(bucket_starts(start, end, granularity)) > MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BUCKETS} {granularity}s per request")
+    return revenue_series_cache.series(db, granularity, start, end)
@@ -1,21 +1,42 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from core.db import SessionLocal
+from services.app_settings import StaleSettingsError, settings_cache, update_app_settings
 
 router = APIRouter()
 
 class AppSettings(BaseModel):
-    default_deposit_percentage: float
+    default_deposit_percentage: float = Field(ge=0, le=1)
     coverage_zones: list[str]
 
-@router.get("/", response_model=AppSettings)
+class AppSettingsResponse(AppSettings):
+    version: int
+
+class AppSettingsUpdate(AppSettings):
+    # Version the client last read; if set, a newer save is reported as 409
+    version: int | None = None
+
+# Dependency
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.get("/", response_model=AppSettingsResponse)
 def get_settings():
-    # Placeholder for actual settings retrieval
-    return {
-        "default_deposit_percentage": 0.30,
-        "coverage_zones": ["AMBA", "La Plata"]
-    }
-
-@router.put("/", response_model=AppSettings)
-def update_settings(settings: AppSettings):
-    # Placeholder for actual settings update
-    return settings
+    # Served from the in-process copy; updates from any worker replace it
+    values = settings_cache.all()
+    return dict(values, version=settings_cache.version or 0)
+
+@router.put("/", response_model=AppSettingsResponse)
+def update_settings(settings: AppSettingsUpdate, db: Session = Depends(get_db)):
+    values = settings.model_dump(exclude={"version"})
+    try:
+        version = update_app_settings(db, values, expected_version=settings.version)
+    except StaleSettingsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return dict(values, version=version)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import List
 
+from services.instagram_feed import instagram_feed
+
 router = APIRouter()
 
 class InstagramPost(BaseModel):
@@ -11,23 +13,19 @@ class InstagramPost(BaseModel):
     permalink: str
     timestamp: str
 
+class InstagramFeedStatus(BaseModel):
+    enabled: bool
+    posts: int
+    fetched_at: str | None = None
+    last_attempt_at: str | None = None
+    consecutive_failures: int
+    last_error: str | None = None
+
 @router.get("/instagram/feed", response_model=List[InstagramPost])
 def get_instagram_feed():
-    # Placeholder for Instagram API integration
-    # In a real application, you would fetch data from Instagram Basic Display API or Graph API
-    return [
-        {
-            "id": "1",
-            "caption": "¡Gran evento de karaoke anoche! #karaoke #fiesta",
-            "media_url": "https://via.placeholder.com/150/FF0000/FFFFFF?text=Post1",
-            "permalink": "https://instagram.com/p/1",
-            "timestamp": "2025-08-27T10:00:00Z"
-        },
-        {
-            "id": "2",
-            "caption": "Preparando el show para el fin de semana. #musicaenvivo #show",
-            "media_url": "https://via.placeholder.com/150/0000FF/FFFFFF?text=Post2",
-            "permalink": "https://instagram.com/p/2",
-            "timestamp": "2025-08-26T15:30:00Z"
-        }
-    ]
+    # Last good snapshot from memory; never waits on Instagram
+    return instagram_feed.posts()
+
+@router.get("/instagram/status", response_model=InstagramFeedStatus)
+def get_instagram_feed_status():
+    return instagram_feed.status()
@@ -0,0 +1,139 @@
+"""Benchmarks duplicate-lead detection on synthetic leads.
+
+Uses its own database (never the app's) so it can be thrown away:
+
+    python -m scripts.bench_dedup --leads 1000000 --database-url sqlite:///bench_dedup.db
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, delete, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from core.db import Base
+from models.event import Lead, LeadMatchBlock, LeadMatchKey, LeadStatus
+from services.lead_dedup import check_leads
+
+FIRST_NAMES = [
+    "Juan", "María", "José", "Ana", "Luis", "Lucía", "Carlos", "Sofía", "Jorge", "Valentina", "Diego", "Camila",
+    "Martín", "Florencia", "Pablo", "Agustina", "Matías", "Julieta", "Nicolás", "Paula", "Federico", "Micaela",
+    "Gonzalo", "Romina", "Santiago", "Carolina", "Facundo", "Belén", "Sebastián", "Natalia", "Lautaro", "Rocío",
+    "Ezequiel", "Milagros", "Tomás", "Antonella", "Franco", "Daniela", "Ignacio", "Victoria",
+]
+LAST_NAMES = [
+    "González", "Rodríguez", "Gómez", "Fernández", "López", "Díaz", "Martínez", "Pérez", "García", "Sánchez",
+    "Romero", "Sosa", "Torres", "Álvarez", "Ruiz", "Ramírez", "Flores", "Acosta", "Benítez", "Medina",
+    "Suárez", "Herrera", "Aguirre", "Pereyra", "Gutiérrez", "Giménez", "Molina", "Silva", "Castro", "Rojas",
+    "Ortiz", "Núñez", "Luna", "Juárez", "Cabrera", "Ríos", "Ferreyra", "Godoy", "Morales", "Domínguez",
+]
+DOMAINS = ["gmail.com", "hotmail.com", "yahoo.com.ar", "outlook.com"]
+AREA_CODES = ["11", "351", "341", "221", "261", "2966"]
+
+
+def new_person(rng: random.Random) -> dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    area = rng.choice(AREA_CODES)
+    number = "".join(rng.choice("0123456789") for _ in range(10 - len(area)))
+    return {
+        "first": first, "last": last,
+        "local": f"{first}.{last}{rng.randint(1, 9999)}",
+        "domain": rng.choice(DOMAINS),
+        "area": area, "number": number,
+        "event_date": datetime(2026, 1, 1) + timedelta(days=rng.randint(0, 730), hours=rng.choice([20, 21, 22])),
+    }
+
+
+def render(person: dict, rng: random.Random, variant: bool) -> dict:
+    first, last, local, domain = person["first"], person["last"], person["local"], person["domain"]
+    area, number = person["area"], person["number"]
+    phone = f"+54 9 {area} {number[:-4]}-{number[-4:]}"
+    name = f"{first} {last}"
+    email = f"{local}@{domain}"
+    if variant:
+        # What people actually change between two submissions of the form
+        name = rng.choice([name, name.upper(), f"{last} {first}", f"{first} {last}".replace("í", "i").replace("é", "e")])
+        phone = rng.choice([phone, f"0{area} 15 {number}", f"{area}{number}", None])
+        email = rng.choice([email, email.upper(), f"{local}+eventos@{domain}", f"{local}@{rng.choice(DOMAINS)}"])
+    return {
+        "contact_name": name, "contact_email": email, "contact_phone": phone,
+        "event_date": person["event_date"], "status": LeadStatus.NEW,
+    }
+
+
+def generate(num_leads: int, duplicate_rate: float, seed: int):
+    rng = random.Random(seed)
+    people: list[dict] = []
+    for _ in range(num_leads):
+        if people and rng.random() < duplicate_rate:
+            person_id = rng.randrange(len(people))
+            yield person_id, render(people[person_id], rng, variant=True)
+        else:
+            people.append(new_person(rng))
+            yield len(people) - 1, render(people[-1], rng, variant=False)
+
+
+def run(database_url: str, num_leads: int, duplicate_rate: float, batch_size: int, seed: int):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine, tables=[Lead.__table__, LeadMatchKey.__table__, LeadMatchBlock.__table__])
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.execute(delete(LeadMatchKey))
+    db.execute(delete(LeadMatchBlock))
+    db.execute(delete(Lead))
+    db.commit()
+
+    started = time.perf_counter()
+    person_of: dict[int, int] = {}
+    rows = []
+    for lead_id, (person_id, row) in enumerate(generate(num_leads, duplicate_rate, seed), start=1):
+        person_of[lead_id] = person_id
+        rows.append(dict(row, id=lead_id))
+        if len(rows) == 10000:
+            db.execute(insert(Lead), rows)
+            rows = []
+    if rows:
+        db.execute(insert(Lead), rows)
+    db.commit()
+    print(f"Inserted {num_leads} leads in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    compared = 0
+    links: dict[int, int] = {}
+    for start in range(1, num_leads + 1, batch_size):
+        batch_links, batch_compared = check_leads(db, list(range(start, min(start + batch_size, num_leads + 1))))
+        db.commit()
+        links.update(batch_links)
+        compared += batch_compared
+    elapsed = time.perf_counter() - started
+    keys = db.execute(select(func.count()).select_from(LeadMatchBlock)).scalar_one()
+    db.close()
+
+    seen: set[int] = set()
+    expected = 0
+    for lead_id in range(1, num_leads + 1):
+        expected += person_of[lead_id] in seen
+        seen.add(person_of[lead_id])
+    correct = sum(person_of[lead] == person_of[original] for lead, original in links.items())
+    naive = num_leads * (num_leads - 1) // 2
+    print(f"Checked {num_leads} leads in {elapsed:.1f}s ({num_leads / elapsed:.0f} leads/s), {keys} blocking keys")
+    print(f"Compared {compared} candidate pairs instead of {naive} ({naive / max(compared, 1):.0f}x fewer)")
+    print(f"Linked {len(links)} of {expected} resubmissions: "
+          f"precision {correct / max(len(links), 1):.3f}, recall {correct / max(expected, 1):.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Duplicate-lead detection benchmark")
+    parser.add_argument("--database-url", default="sqlite:///bench_dedup.db",
+                        help="Scratch database; its leads tables are emptied first")
+    parser.add_argument("--leads", type=int, default=1_000_000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.15)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.database_url, args.leads, args.duplicate_rate, args.batch_size, args.seed)
@@ -0,0 +1,55 @@
+"""Benchmarks the Mercado Pago gateway client against the local fake API.
+
+    python -m scripts.bench_gateway --requests 2000 --concurrency 16
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.fake_mp import FakeMercadoPagoServer
+from services.payment_gateway import CircuitBreaker, GatewayUnavailableError, MercadoPagoClient
+
+
+def run(num_requests: int, concurrency: int, latency: float):
+    with FakeMercadoPagoServer() as server:
+        server.state.latency_seconds = latency
+        payment = server.state.add_payment(external_reference="1")
+        client = MercadoPagoClient(
+            "TEST-TOKEN", server.base_url, pool_size=concurrency,
+            breaker=CircuitBreaker(failure_threshold=5, reset_timeout=1.0),
+        )
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(lambda _: client.get_payment(payment["id"]), range(num_requests)))
+        elapsed = time.perf_counter() - started
+        print(f"{num_requests} lookups in {elapsed:.2f}s ({num_requests / elapsed:.0f} req/s), "
+              f"{server.state.request_count} served")
+
+        # With MP down, calls should fail fast once the breaker opens
+        server.state.fail_next = 10 ** 9
+        started = time.perf_counter()
+        rejected = 0
+        for _ in range(100):
+            try:
+                client.get_payment(payment["id"])
+            except GatewayUnavailableError:
+                rejected += 1
+            except Exception:
+                pass
+        elapsed = time.perf_counter() - started
+        print(f"100 lookups against a failing gateway in {elapsed:.3f}s, {rejected} short-circuited")
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gateway client benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated MP latency in seconds")
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, args.latency)
@@ -0,0 +1,153 @@
+"""Local stand-in for the Instagram Graph API media endpoint.
+
+Serves ``GET /<user-id>/media`` with a few seeded posts, plus ``/_fake``
+control endpoints to replace the posts and inject latency or failures.
+Run it with:
+
+    python -m scripts.fake_instagram --port 8766
+
+and point the API at it with ``INSTAGRAM_API_BASE_URL=http://localhost:8766``
+and any ``INSTAGRAM_ACCESS_TOKEN``.
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def sample_posts(count: int = 6) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(17900000000000000 + i),
+            "caption": f"Post de prueba {i + 1} #karaoke #fiesta",
+            "media_type": "VIDEO" if i % 3 == 2 else "IMAGE",
+            "media_url": f"https://placehold.co/600x600?text=Post{i + 1}",
+            "thumbnail_url": f"https://placehold.co/600x600?text=Video{i + 1}" if i % 3 == 2 else None,
+            "permalink": f"https://www.instagram.com/p/fake{i + 1}/",
+            "timestamp": (now - timedelta(days=i)).strftime("%Y-%m-%dT%H:%M:%S+0000"),
+        }
+        for i in range(count)
+    ]
+
+
+class FakeInstagramState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.posts = sample_posts()
+        self.latency_seconds = 0.0
+        self.fail_next = 0
+        self.fail_status = 500
+        self.request_count = 0
+
+
+class FakeInstagramHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: FakeInstagramState
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: dict | None = None):
+        payload = json.dumps(body or {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # The client gave up, e.g. timed out on injected latency
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        state = self.state
+        if url.path.startswith("/_fake/"):
+            return self._send(200, {"request_count": state.request_count})
+        with state.lock:
+            state.request_count += 1
+            latency = state.latency_seconds
+            fail = state.fail_next > 0
+            if fail:
+                state.fail_next -= 1
+            posts = list(state.posts)
+        if latency:
+            time.sleep(latency)
+        if fail:
+            return self._send(state.fail_status, {"error": {"message": "injected failure", "code": 2}})
+
+        query = parse_qs(url.query)
+        if not url.path.endswith("/media"):
+            return self._send(404, {"error": {"message": "Unsupported get request", "code": 100}})
+        if not query.get("access_token", [""])[0]:
+            return self._send(400, {"error": {"message": "An active access token must be used", "code": 2500}})
+        limit = int(query.get("limit", ["25"])[0])
+        self._send(200, {"data": posts[:limit]})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self._read_json()
+        state = self.state
+        if url.path == "/_fake/posts":
+            # A list of media objects, or {"count": n} for generated ones
+            with state.lock:
+                state.posts = body if isinstance(body, list) else sample_posts(int(body.get("count", 6)))
+            return self._send(200, {"posts": len(state.posts)})
+        if url.path == "/_fake/faults":
+            with state.lock:
+                state.latency_seconds = float(body.get("latency_seconds", 0.0))
+                state.fail_next = int(body.get("fail_next", 0))
+                state.fail_status = int(body.get("fail_status", 500))
+            return self._send(200, {})
+        self._send(404, {"error": {"message": "Not found"}})
+
+
+class FakeInstagramServer:
+    """Runs the fake API on a background thread; usable as a context manager."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.state = FakeInstagramState()
+        handler = type("Handler", (FakeInstagramHandler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Instagram Graph API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = FakeInstagramServer(args.host, args.port)
+    print(f"Fake Instagram listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
@@ -0,0 +1,194 @@
+"""Local stand-in for the Mercado Pago REST API.
+
+Implements the subset of endpoints the API uses (preferences, payment lookup
+and payment search) plus a few ``/_fake`` control endpoints to seed payments
+and inject latency or failures. Run it with:
+
+    python -m scripts.fake_mp --port 8765
+
+and point the API at it with ``MP_API_BASE_URL=http://localhost:8765``.
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeMercadoPagoState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.preferences: dict[str, dict] = {}
+        self.payments: dict[int, dict] = {}
+        self.ids = itertools.count(1000000)
+        self.latency_seconds = 0.0
+        self.fail_next = 0
+        self.fail_status = 503
+        self.request_count = 0
+        self.idempotency_keys: dict[str, dict] = {}
+
+    def add_payment(self, external_reference: str, status: str = "approved",
+                    transaction_amount: float = 0.0, date_created: str | None = None) -> dict:
+        with self.lock:
+            payment_id = next(self.ids)
+            payment = {
+                "id": payment_id,
+                "status": status,
+                "external_reference": external_reference,
+                "transaction_amount": transaction_amount,
+                "date_created": date_created or datetime.now(timezone.utc).isoformat(),
+            }
+            self.payments[payment_id] = payment
+            return payment
+
+
+class FakeMercadoPagoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    state: FakeMercadoPagoState
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: dict | None = None):
+        payload = json.dumps(body or {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _inject_faults(self) -> bool:
+        state = self.state
+        with state.lock:
+            state.request_count += 1
+            latency = state.latency_seconds
+            fail = state.fail_next > 0
+            if fail:
+                state.fail_next -= 1
+        if latency:
+            time.sleep(latency)
+        if fail:
+            self._send(state.fail_status, {"message": "injected failure"})
+        return fail
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.startswith("/_fake/"):
+            return self._send(200, {"request_count": self.state.request_count})
+        if self._inject_faults():
+            return
+
+        if url.path == "/v1/payments/search":
+            return self._search(parse_qs(url.query))
+        if url.path.startswith("/v1/payments/"):
+            payment_id = url.path.rsplit("/", 1)[-1]
+            payment = self.state.payments.get(int(payment_id)) if payment_id.isdigit() else None
+            if payment is None:
+                return self._send(404, {"message": "Payment not found"})
+            return self._send(200, payment)
+        self._send(404, {"message": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self._read_json()
+        state = self.state
+
+        if url.path == "/_fake/payments":
+            return self._send(201, state.add_payment(**body))
+        if url.path == "/_fake/faults":
+            with state.lock:
+                state.latency_seconds = float(body.get("latency_seconds", 0.0))
+                state.fail_next = int(body.get("fail_next", 0))
+                state.fail_status = int(body.get("fail_status", 503))
+            return self._send(200, {})
+        if self._inject_faults():
+            return
+
+        if url.path == "/checkout/preferences":
+            key = self.headers.get("X-Idempotency-Key")
+            with state.lock:
+                if key and key in state.idempotency_keys:
+                    return self._send(201, state.idempotency_keys[key])
+                preference_id = f"pref-{next(state.ids)}"
+                host, port = self.server.server_address[:2]
+                preference = dict(
+                    body,
+                    id=preference_id,
+                    init_point=f"http://{host}:{port}/checkout?pref_id={preference_id}",
+                    date_created=datetime.now(timezone.utc).isoformat(),
+                )
+                state.preferences[preference_id] = preference
+                if key:
+                    state.idempotency_keys[key] = preference
+            return self._send(201, preference)
+        self._send(404, {"message": "Not found"})
+
+    def _search(self, query: dict):
+        def param(name, default=None):
+            return query.get(name, [default])[0]
+
+        begin = param("begin_date")
+        end = param("end_date")
+        offset = int(param("offset", 0))
+        limit = int(param("limit", 30))
+        with self.state.lock:
+            payments = sorted(self.state.payments.values(), key=lambda p: (p["date_created"], p["id"]))
+        if begin:
+            payments = [p for p in payments if p["date_created"] >= begin]
+        if end:
+            payments = [p for p in payments if p["date_created"] <= end]
+        self._send(200, {
+            "paging": {"total": len(payments), "offset": offset, "limit": limit},
+            "results": payments[offset:offset + limit],
+        })
+
+
+class FakeMercadoPagoServer:
+    """Runs the fake API on a background thread; usable as a context manager."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.state = FakeMercadoPagoState()
+        handler = type("Handler", (FakeMercadoPagoHandler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Mercado Pago API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = FakeMercadoPagoServer(args.host, args.port)
+    print(f"Fake Mercado Pago listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
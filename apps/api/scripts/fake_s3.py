@@ -0,0 +1,196 @@
+"""Local stand-in for an S3-compatible object store.
+
+Implements path-style object PUT/GET/HEAD/DELETE and multipart uploads,
+which is what ``core.storage.S3Storage`` uses. Signatures are not checked,
+so presigned URLs work too. Run it with:
+
+    python -m scripts.fake_s3 --port 8766
+
+and point the API at it with ``STORAGE_BACKEND=s3 S3_ENDPOINT=http://localhost:8766``
+(any access key and secret will do).
+"""
+import argparse
+import hashlib
+import itertools
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+class FakeS3State:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.objects: dict[tuple[str, str], dict] = {}
+        self.uploads: dict[str, dict] = {}
+        self.ids = itertools.count(1)
+        self.request_count = 0
+        self.max_request_bytes = 0 # Largest single request body seen
+
+
+def _decode_aws_chunked(body: bytes) -> bytes:
+    # <hex size>[;chunk-signature=...]\r\n<data>\r\n ... 0\r\n<trailers>\r\n\r\n
+    out = bytearray()
+    position = 0
+    while True:
+        line_end = body.index(b"\r\n", position)
+        size = int(body[position:line_end].split(b";")[0], 16)
+        position = line_end + 2
+        if size == 0:
+            return bytes(out)
+        out += body[position:position + size]
+        position += size + 2
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: FakeS3State
+
+    def log_message(self, format, *args):
+        pass
+
+    def _target(self) -> tuple[str, str, dict]:
+        url = urlparse(self.path)
+        bucket, _, key = url.path.lstrip("/").partition("/")
+        return bucket, unquote(key), parse_qs(url.query, keep_blank_values=True)
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        with self.state.lock:
+            self.state.request_count += 1
+            self.state.max_request_bytes = max(self.state.max_request_bytes, length)
+        encoding = self.headers.get("Content-Encoding", "")
+        if "aws-chunked" in encoding or self.headers.get("x-amz-content-sha256", "").startswith("STREAMING"):
+            body = _decode_aws_chunked(body)
+        return body
+
+    def _send(self, status: int, body: bytes = b"", headers: dict | None = None, content_type: str = "application/xml"):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body or status != 204:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _not_found(self):
+        self._send(404, b"<Error><Code>NoSuchKey</Code><Message>Not found</Message></Error>")
+
+    def do_PUT(self):
+        bucket, key, query = self._target()
+        body = self._body()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        with self.state.lock:
+            if "uploadId" in query:
+                upload = self.state.uploads.get(query["uploadId"][0])
+                if upload is None:
+                    return self._send(404, b"<Error><Code>NoSuchUpload</Code></Error>")
+                upload["parts"][int(query["partNumber"][0])] = body
+            else:
+                self.state.objects[(bucket, key)] = {
+                    "body": body,
+                    "etag": etag,
+                    "content_type": self.headers.get("Content-Type") or "binary/octet-stream",
+                }
+        self._send(200, headers={"ETag": etag})
+
+    def do_POST(self):
+        bucket, key, query = self._target()
+        body = self._body()
+        with self.state.lock:
+            if "uploads" in query:
+                upload_id = f"upload-{next(self.state.ids)}"
+                self.state.uploads[upload_id] = {
+                    "bucket": bucket, "key": key, "parts": {},
+                    "content_type": self.headers.get("Content-Type") or "binary/octet-stream",
+                }
+                return self._send(200, (
+                    "<InitiateMultipartUploadResult>"
+                    f"<Bucket>{bucket}</Bucket><Key>{key}</Key><UploadId>{upload_id}</UploadId>"
+                    "</InitiateMultipartUploadResult>"
+                ).encode())
+            if "uploadId" in query:
+                upload = self.state.uploads.pop(query["uploadId"][0], None)
+                if upload is None:
+                    return self._send(404, b"<Error><Code>NoSuchUpload</Code></Error>")
+                numbers = [int(n) for n in re.findall(rb"<PartNumber>(\d+)</PartNumber>", body)]
+                data = b"".join(upload["parts"][n] for n in numbers)
+                etag = f'"{hashlib.md5(data).hexdigest()}-{len(numbers)}"'
+                self.state.objects[(bucket, key)] = {
+                    "body": data, "etag": etag, "content_type": upload["content_type"],
+                }
+                return self._send(200, (
+                    "<CompleteMultipartUploadResult>"
+                    f"<Bucket>{bucket}</Bucket><Key>{key}</Key><ETag>{etag}</ETag>"
+                    "</CompleteMultipartUploadResult>"
+                ).encode())
+        self._send(400, b"<Error><Code>InvalidRequest</Code></Error>")
+
+    def do_GET(self):
+        bucket, key, _ = self._target()
+        with self.state.lock:
+            self.state.request_count += 1
+            obj = self.state.objects.get((bucket, key))
+        if obj is None:
+            return self._not_found()
+        self._send(200, obj["body"], headers={"ETag": obj["etag"]}, content_type=obj["content_type"])
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_DELETE(self):
+        bucket, key, query = self._target()
+        with self.state.lock:
+            self.state.request_count += 1
+            if "uploadId" in query:
+                self.state.uploads.pop(query["uploadId"][0], None)
+            else:
+                self.state.objects.pop((bucket, key), None)
+        self._send(204)
+
+
+class FakeS3Server:
+    """Runs the fake store on a background thread; usable as a context manager."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.state = FakeS3State()
+        handler = type("Handler", (FakeS3Handler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake S3-compatible object store")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = FakeS3Server(args.host, args.port)
+    print(f"Fake S3 listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
@@ -0,0 +1,21 @@
+import os
+import sys
+import time
+
+# Add the parent directory to the sys.path to allow imports from core and services
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.db import SessionLocal
+from services.report_rollups import overview, rebuild_rollups
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        rebuild_rollups(db)
+        totals = overview(db)
+    finally:
+        db.close()
+    print(f"Rebuilt report rollups in {time.perf_counter() - started:.1f}s: "
+          f"{totals['total_leads']} leads, {totals['confirmed_bookings']} confirmed bookings, "
+          f"{totals['total_revenue']:.2f} ARS revenue")
@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Add the parent directory to the sys.path to allow imports from core and services
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.db import SessionLocal
+from services.payment_gateway import get_payment_gateway
+from services.reconciliation import ReconciliationReport, reconcile_payments
+
+def parse_date(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile local payments against Mercado Pago")
+    parser.add_argument("--since", type=parse_date, help="Start of the window (ISO date), defaults to --days ago")
+    parser.add_argument("--until", type=parse_date, help="End of the window (ISO date), defaults to now")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--report", help="Write the mismatch report CSV here instead of stdout")
+    parser.add_argument("--dry-run", action="store_true", help="Report mismatches without writing")
+    args = parser.parse_args()
+
+    until = args.until or datetime.now(timezone.utc)
+    since = args.since or until - timedelta(days=args.days)
+    out = open(args.report, "w", newline="") if args.report else sys.stdout
+    db = SessionLocal()
+    try:
+        report = reconcile_payments(
+            db, get_payment_gateway(), since, until, ReconciliationReport(out),
+            batch_size=args.batch_size, dry_run=args.dry_run,
+        )
+    finally:
+        db.close()
+        if args.report:
+            out.close()
+    print(f"Reconciled {since.isoformat()} .. {until.isoformat()}: {report.summary()}", file=sys.stderr)
@@ -0,0 +1,119 @@
+import threading
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.db import SessionLocal
+from core.notify import notification_hub
+from models.settings import AppSetting
+
+SETTINGS_CHANNEL = "app_settings"
+SETTINGS_ID = 1
+
+# Used for keys never saved from the admin
+DEFAULTS = {
+    "default_deposit_percentage": settings.quote_deposit_fraction,
+    "coverage_zones": ["AMBA", "La Plata"],
+}
+
+
+class StaleSettingsError(Exception):
+    def __init__(self, current_version: int):
+        super().__init__(f"Settings were changed meanwhile (now version {current_version})")
+        self.current_version = current_version
+
+
+class AppSettingsCache:
+    """In-process copy of the app_settings row, so reads are dict lookups.
+
+    Updates bump the row's version and announce it on the notification hub;
+    a worker drops its copy when it hears of a newer version and reloads on
+    the next read. ``refresh`` polls the version in the background, which
+    bounds staleness when a notification is lost.
+    """
+
+    def __init__(self):
+        self.version: int | None = None # Version of the cached values
+        self._values: dict | None = None
+        self._latest = 0 # Newest version announced so far
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        values = self._values
+        if values is None:
+            values = self.load()
+        return values.get(key, default)
+
+    def all(self) -> dict:
+        values = self._values
+        return dict(values if values is not None else self.load())
+
+    def load(self) -> dict:
+        db = SessionLocal()
+        try:
+            row = db.execute(
+                select(AppSetting.values, AppSetting.version).where(AppSetting.id == SETTINGS_ID)
+            ).first()
+        finally:
+            db.close()
+        values = {**DEFAULTS, **(row.values if row else {})}
+        version = row.version if row else 0
+        with self._lock:
+            # An update announced while we were reading wins over what we read
+            if version >= self._latest:
+                self._values, self.version = values, version
+        return values
+
+    def invalidate(self, payload: dict | None = None):
+        version = (payload or {}).get("version")
+        with self._lock:
+            if version is not None:
+                if self.version is not None and version <= self.version:
+                    return
+                self._latest = max(self._latest, version)
+            self._values = None
+
+    def refresh(self):
+        # Background poll: a single-row read, reloading only when the version moved
+        db = SessionLocal()
+        try:
+            version = db.scalar(select(AppSetting.version).where(AppSetting.id == SETTINGS_ID)) or 0
+        finally:
+            db.close()
+        if version != self.version:
+            self.invalidate({"version": version})
+            self.load()
+
+
+settings_cache = AppSettingsCache()
+notification_hub.subscribe(SETTINGS_CHANNEL, settings_cache.invalidate)
+
+
+def update_app_settings(db: Session, values: dict, expected_version: int | None = None) -> int:
+    """Replaces the stored settings and returns the new version.
+
+    With ``expected_version`` the write only happens if nobody saved in
+    between; otherwise StaleSettingsError is raised.
+    """
+    conditions = [AppSetting.id == SETTINGS_ID]
+    if expected_version is not None:
+        conditions.append(AppSetting.version == expected_version)
+    version = db.scalar(
+        update(AppSetting)
+        .where(*conditions)
+        .values(values=values, version=AppSetting.version + 1, updated_at=datetime.utcnow())
+        .returning(AppSetting.version)
+    )
+    if version is None:
+        current = db.scalar(select(AppSetting.version).where(AppSetting.id == SETTINGS_ID))
+        if current is not None or expected_version not in (None, 0):
+            db.rollback()
+            raise StaleSettingsError(current or 0)
+        # First save on a database created without the migration's seed row
+        db.add(AppSetting(id=SETTINGS_ID, values=values, version=1))
+        version = 1
+    notification_hub.publish(db, SETTINGS_CHANNEL, {"version": version})
+    db.commit()
+    return version
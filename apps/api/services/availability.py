@@ -0,0 +1,209 @@
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.db import SessionLocal
+from core.interval_tree import IntervalTree
+from models.event import Booking, BookingSlot, Event
+
+MAIN_RESOURCE = "main"
+
+
+class SlotConflictError(Exception):
+    def __init__(self, booking_id: int | None, conflicting_booking_ids: list[int]):
+        if conflicting_booking_ids:
+            message = f"Booking {booking_id} overlaps confirmed bookings {conflicting_booking_ids}"
+        else:
+            message = "Booking overlaps a booking confirmed concurrently"
+        super().__init__(message)
+        self.booking_id = booking_id
+        self.conflicting_booking_ids = conflicting_booking_ids
+
+
+def provider_resource(provider_id: int) -> str:
+    return f"provider:{provider_id}"
+
+
+def event_window(event: Event) -> tuple[datetime, datetime]:
+    hours = event.duration_hours or settings.default_event_duration_hours
+    return event.date, event.date + timedelta(hours=hours)
+
+
+def event_resources(event: Event) -> list[str]:
+    resources = [MAIN_RESOURCE]
+    if event.provider_id:
+        resources.append(provider_resource(event.provider_id))
+    return resources
+
+
+class AvailabilityIndex:
+    """Per-worker interval index of slots held by confirmed bookings.
+
+    It answers availability questions without touching the DB; the exclusion
+    constraint on ``booking_slots`` stays the source of truth, so a stale
+    index can at worst cost a rejected write, never a double booking.
+    """
+
+    def __init__(self):
+        self._trees: dict[str, IntervalTree] = {}
+        self._by_booking: dict[int, list[tuple[str, datetime]]] = {}
+        self._lock = threading.RLock()
+
+    def rebuild(self, db: Session):
+        trees: dict[str, IntervalTree] = {}
+        by_booking: dict[int, list] = {}
+        rows = db.execute(select(
+            BookingSlot.booking_id, BookingSlot.resource, BookingSlot.starts_at, BookingSlot.ends_at
+        ))
+        for booking_id, resource, starts_at, ends_at in rows:
+            trees.setdefault(resource, IntervalTree()).insert(starts_at, ends_at, booking_id)
+            by_booking.setdefault(booking_id, []).append((resource, starts_at))
+        with self._lock:
+            self._trees, self._by_booking = trees, by_booking
+
+    def add(self, booking_id: int, resources: list[str], start: datetime, end: datetime):
+        with self._lock:
+            self.remove(booking_id)
+            for resource in resources:
+                self._trees.setdefault(resource, IntervalTree()).insert(start, end, booking_id)
+            self._by_booking[booking_id] = [(resource, start) for resource in resources]
+
+    def remove(self, booking_id: int):
+        with self._lock:
+            for resource, start in self._by_booking.pop(booking_id, []):
+                self._trees[resource].remove(start, booking_id)
+
+    def conflicts(self, resources: list[str], start: datetime, end: datetime,
+                  ignore_booking_id: int | None = None) -> list[int]:
+        with self._lock:
+            found = {
+                key
+                for resource in resources if resource in self._trees
+                for _, _, key in self._trees[resource].overlapping(start, end)
+            }
+        found.discard(ignore_booking_id)
+        return sorted(found)
+
+    def busy(self, resources: list[str], start: datetime, end: datetime) -> list[tuple[datetime, datetime]]:
+        with self._lock:
+            intervals = sorted(
+                (s, e)
+                for resource in resources if resource in self._trees
+                for s, e, _ in self._trees[resource].overlapping(start, end)
+            )
+        merged: list[list[datetime]] = []
+        for s, e in intervals:
+            if merged and s <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], e)
+            else:
+                merged.append([s, e])
+        return [(s, e) for s, e in merged]
+
+    def free_slots(self, resources: list[str], start: datetime, end: datetime,
+                   duration: timedelta) -> list[tuple[datetime, datetime]]:
+        free = []
+        cursor = start
+        for busy_start, busy_end in self.busy(resources, start, end):
+            if busy_start - cursor >= duration:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+        if end - cursor >= duration:
+            free.append((cursor, end))
+        return free
+
+
+availability_index = AvailabilityIndex()
+
+
+def _verify_conflicts(db: Session, conflicting_ids: list[int]) -> list[int]:
+    # The index may still hold bookings another worker has since released
+    if not conflicting_ids:
+        return []
+    live = set(db.scalars(
+        select(BookingSlot.booking_id).where(BookingSlot.booking_id.in_(conflicting_ids))
+    ))
+    for booking_id in set(conflicting_ids) - live:
+        availability_index.remove(booking_id)
+    return sorted(live)
+
+
+def reserve_slots(db: Session, bookings: list[Booking]) -> tuple[list[Booking], dict[int, list[int]]]:
+    """Inserts slot rows for the given bookings without committing.
+
+    Returns the bookings that fit and a map of rejected booking id to the
+    bookings it overlaps. Pass :func:`index_entries` of the reserved bookings
+    to :func:`publish_reserved` once committed.
+    """
+    reserved, rejected = [], {}
+    pending: dict[str, IntervalTree] = {}
+    for booking in bookings:
+        start, end = event_window(booking.event)
+        resources = event_resources(booking.event)
+        conflicts = _verify_conflicts(db, availability_index.conflicts(resources, start, end, booking.id))
+        # Bookings in the same batch must not overlap each other either
+        conflicts += [
+            key for resource in resources if resource in pending
+            for _, _, key in pending[resource].overlapping(start, end)
+        ]
+        if conflicts:
+            rejected[booking.id] = sorted(set(conflicts))
+            continue
+        for resource in resources:
+            pending.setdefault(resource, IntervalTree()).insert(start, end, booking.id)
+        reserved.append(booking)
+
+    if reserved:
+        try:
+            # Savepoint, so a constraint violation leaves the caller's other changes intact
+            with db.begin_nested():
+                db.execute(delete(BookingSlot).where(BookingSlot.booking_id.in_([b.id for b in reserved])))
+                db.add_all([
+                    BookingSlot(booking_id=booking.id, event_id=booking.event_id, resource=resource,
+                                starts_at=event_window(booking.event)[0], ends_at=event_window(booking.event)[1])
+                    for booking in reserved
+                    for resource in event_resources(booking.event)
+                ])
+        except IntegrityError as e:
+            # Another worker confirmed an overlapping booking first
+            raise SlotConflictError(None, []) from e
+    return reserved, rejected
+
+
+def index_entries(bookings: list[Booking]) -> list[tuple[int, list[str], datetime, datetime]]:
+    # Snapshot before committing: expired instances would reload one by one
+    return [(booking.id, event_resources(booking.event), *event_window(booking.event)) for booking in bookings]
+
+
+def publish_reserved(entries: list[tuple[int, list[str], datetime, datetime]]):
+    for booking_id, resources, start, end in entries:
+        availability_index.add(booking_id, resources, start, end)
+
+
+def reserve_booking_slot(db: Session, booking: Booking):
+    _, rejected = reserve_slots(db, [booking])
+    if rejected:
+        raise SlotConflictError(booking.id, rejected[booking.id])
+
+
+def release_slots(db: Session, booking_ids: list[int]):
+    # Deletes slot rows without committing; call publish_released afterwards
+    if booking_ids:
+        db.execute(delete(BookingSlot).where(BookingSlot.booking_id.in_(booking_ids)))
+
+
+def publish_released(booking_ids: list[int]):
+    for booking_id in booking_ids:
+        availability_index.remove(booking_id)
+
+
+def rebuild_availability():
+    db = SessionLocal()
+    try:
+        availability_index.rebuild(db)
+    finally:
+        db.close()
+
@@ -0,0 +1,134 @@
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.db import SessionLocal
+from core.storage import StorageBackend, StorageError, StoredObject, copy_object, get_storage
+from models.document import Blob
+
+
+def acquire_blob(db: Session, stored: StoredObject) -> str:
+    """References the blob for ``stored.sha256`` inside the caller's transaction.
+
+    Returns the key of the object to use: ``stored.key`` when the content is
+    new, otherwise the key of the existing copy (and ``stored.key`` becomes
+    redundant once the transaction commits).
+    """
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(Blob).values(
+        sha256=stored.sha256,
+        storage_key=stored.key,
+        size_bytes=stored.size,
+        content_type=stored.content_type,
+        ref_count=1,
+        created_at=datetime.utcnow(),
+    )
+    # One atomic upsert, so concurrent uploads of the same file agree on the winner
+    return db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[Blob.sha256],
+            set_={"ref_count": Blob.ref_count + 1, "unreferenced_at": None},
+        ).returning(Blob.storage_key)
+    ).scalar_one()
+
+
+def reuse_blob(db: Session, sha256: str, size: int) -> Blob | None:
+    # Adds a reference only if the blob is still there; the row lock keeps the collector off it
+    row = db.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256.lower(), Blob.size_bytes == size)
+        .values(ref_count=Blob.ref_count + 1, unreferenced_at=None)
+        .returning(Blob.storage_key, Blob.content_type)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return None
+    return Blob(sha256=sha256.lower(), storage_key=row.storage_key, content_type=row.content_type, size_bytes=size)
+
+
+def release_blob(db: Session, sha256: str):
+    db.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256, Blob.ref_count > 0)
+        .values(
+            ref_count=Blob.ref_count - 1,
+            unreferenced_at=case((Blob.ref_count == 1, datetime.utcnow()), else_=Blob.unreferenced_at),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def hash_object(storage: StorageBackend, key: str) -> str:
+    # For presigned uploads, whose bytes never went through the API
+    digest = hashlib.sha256()
+    for chunk in storage.open(key):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_key(sha256: str) -> str:
+    # Never handed out for upload. The random suffix keeps a re-upload from
+    # landing on a key the garbage collector is about to delete.
+    return f"blobs/{sha256[:2]}/{sha256}/{uuid.uuid4().hex}"
+
+
+def adopt_upload(storage: StorageBackend, stored: StoredObject, max_bytes: int, part_size: int) -> StoredObject:
+    """Copies a presigned upload to a blob key clients cannot write to.
+
+    The presigned URL may still be valid, so the copy is hashed again as it is
+    written; bytes swapped in meanwhile raise StorageError. The caller deletes
+    ``stored.key`` once the document is saved.
+    """
+    sha256 = hash_object(storage, stored.key)
+    copy = copy_object(storage, stored.key, blob_key(sha256), stored.content_type, max_bytes, part_size)
+    if copy.sha256 != sha256:
+        storage.delete(copy.key)
+        raise StorageError("The upload changed while it was being verified")
+    return copy
+
+
+def collect_garbage(db: Session, storage: StorageBackend, grace_minutes: int, batch_size: int = 500) -> int:
+    """Deletes blobs nobody has referenced for ``grace_minutes``; returns how many."""
+    cutoff = datetime.utcnow() - timedelta(minutes=grace_minutes)
+    collected = 0
+    while True:
+        candidates = (
+            select(Blob.sha256)
+            .where(Blob.ref_count == 0, Blob.unreferenced_at < cutoff)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        # ref_count is re-checked on delete: an upload may have picked the blob up again
+        rows = db.execute(
+            delete(Blob)
+            .where(Blob.sha256.in_(candidates), Blob.ref_count == 0)
+            .returning(Blob.storage_key, Blob.preview_key)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        # Rows go first: a later upload of the same content then stores a fresh copy
+        for key in [key for row in rows for key in row if key]:
+            try:
+                storage.delete(key)
+            except Exception as e:
+                print(f"Could not delete blob object {key}: {e}")
+        collected += len(rows)
+        if len(rows) < batch_size:
+            return collected
+
+
+def collect_blob_garbage() -> int:
+    # Background job
+    db = SessionLocal()
+    try:
+        collected = collect_garbage(db, get_storage(), settings.blob_gc_grace_minutes)
+    finally:
+        db.close()
+    if collected:
+        print(f"Collected {collected} unreferenced blobs")
+    return collected
@@ -0,0 +1,152 @@
+from datetime import datetime
+
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload
+
+from models.event import Booking, BookingSlot, BookingStatus, Payment, PaymentStatus
+from services.availability import (
+    SlotConflictError,
+    index_entries,
+    publish_released,
+    publish_reserved,
+    release_slots,
+    reserve_slots,
+)
+from services.report_rollups import RollupDeltas, booking_contribution
+
+ALLOWED_TRANSITIONS: dict[BookingStatus, set[BookingStatus]] = {
+    BookingStatus.PENDING_DEPOSIT: {BookingStatus.CONFIRMED, BookingStatus.CANCELLED},
+    BookingStatus.CONFIRMED: {BookingStatus.CANCELLED},
+    BookingStatus.CANCELLED: set(),
+}
+
+# Per-id outcomes reported by transition_bookings
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+VERSION_CONFLICT = "version_conflict"
+ILLEGAL_TRANSITION = "illegal_transition"
+SLOT_CONFLICT = "slot_conflict"
+
+
+def can_transition(current: BookingStatus, target: BookingStatus) -> bool:
+    return target in ALLOWED_TRANSITIONS[current]
+
+
+def bookings_with_live_payments(
+    db: Session,
+    booking_ids: list[int],
+    exclude_payment_ids: list[int] = (),
+) -> set[int]:
+    """Returns the bookings among ``booking_ids`` that still have an approved or
+    pending payment, ignoring ``exclude_payment_ids``.
+
+    A rejected attempt only cancels its booking when this is empty for it.
+    """
+    if not booking_ids:
+        return set()
+    query = select(Payment.booking_id).where(
+        Payment.booking_id.in_(booking_ids),
+        Payment.status.in_([PaymentStatus.APPROVED, PaymentStatus.PENDING]),
+    )
+    if exclude_payment_ids:
+        query = query.where(Payment.id.notin_(exclude_payment_ids))
+    return set(db.scalars(query))
+
+
+def transition_bookings(
+    db: Session,
+    target: BookingStatus,
+    expected_versions: dict[int, int | None],
+) -> list[dict]:
+    """Moves many bookings to ``target`` in one set-based UPDATE.
+
+    ``expected_versions`` maps booking id to the version the caller last saw
+    (``None`` means "whatever is current now"). Rows whose version moved on
+    are reported as conflicts instead of being overwritten.
+    """
+    bookings = {
+        booking.id: booking
+        for booking in db.query(Booking)
+        .options(joinedload(Booking.event))
+        .filter(Booking.id.in_(expected_versions.keys()))
+    }
+
+    results: dict[int, dict] = {}
+    candidates: dict[int, int] = {}
+    for booking_id, expected in expected_versions.items():
+        booking = bookings.get(booking_id)
+        if booking is None:
+            results[booking_id] = {"id": booking_id, "result": NOT_FOUND}
+            continue
+        outcome = {"id": booking_id, "status": booking.status, "version": booking.version}
+        if expected is not None and expected != booking.version:
+            results[booking_id] = dict(outcome, result=VERSION_CONFLICT)
+        elif booking.status == target:
+            results[booking_id] = dict(outcome, result=UNCHANGED)
+        elif not can_transition(booking.status, target):
+            results[booking_id] = dict(outcome, result=ILLEGAL_TRANSITION,
+                                       detail=f"{booking.status.value} -> {target.value}")
+        else:
+            candidates[booking_id] = booking.version
+
+    reserved = []
+    if target == BookingStatus.CONFIRMED and candidates:
+        try:
+            reserved, rejected = reserve_slots(db, [bookings[i] for i in candidates])
+        except SlotConflictError:
+            reserved, rejected = [], {booking_id: [] for booking_id in candidates}
+        for booking_id, overlapping in rejected.items():
+            booking = bookings[booking_id]
+            results[booking_id] = {
+                "id": booking_id, "status": booking.status, "version": booking.version,
+                "result": SLOT_CONFLICT, "detail": f"overlaps bookings {overlapping}",
+            }
+            candidates.pop(booking_id)
+
+    updated: dict[int, int] = {}
+    if candidates:
+        values = {"status": target, "version": Booking.version + 1}
+        if target == BookingStatus.CONFIRMED:
+            values["confirmed_at"] = datetime.utcnow()
+        rows = db.execute(
+            update(Booking)
+            .where(
+                tuple_(Booking.id, Booking.version).in_(list(candidates.items())),
+                Booking.status.in_([s for s, targets in ALLOWED_TRANSITIONS.items() if target in targets]),
+            )
+            .values(**values)
+            .returning(Booking.id, Booking.version, Booking.confirmed_at)
+            .execution_options(synchronize_session=False)
+        )
+        # The version check guarantees the rows still hold what was read above
+        deltas = RollupDeltas()
+        for booking_id, version, confirmed_at in rows:
+            updated[booking_id] = version
+            booking = bookings[booking_id]
+            deltas.change(
+                booking_contribution(booking.confirmed_at, booking.status, booking.total_price_ars),
+                booking_contribution(confirmed_at, target, booking.total_price_ars),
+            )
+        deltas.apply(db)
+
+    # Rows changed by someone else between our read and the UPDATE
+    lost = [booking_id for booking_id in candidates if booking_id not in updated]
+    if lost and target == BookingStatus.CONFIRMED:
+        db.execute(delete(BookingSlot).where(BookingSlot.booking_id.in_(lost)))
+    if target == BookingStatus.CANCELLED:
+        release_slots(db, list(updated))
+    entries = index_entries([booking for booking in reserved if booking.id in updated])
+    db.commit()
+
+    publish_reserved(entries)
+    if target == BookingStatus.CANCELLED:
+        publish_released(list(updated))
+
+    for booking_id in candidates:
+        if booking_id in updated:
+            results[booking_id] = {"id": booking_id, "status": target, "version": updated[booking_id],
+                                   "result": UPDATED}
+        else:
+            results[booking_id] = {"id": booking_id, "result": VERSION_CONFLICT}
+    return [results[booking_id] for booking_id in expected_versions]
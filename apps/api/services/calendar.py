@@ -0,0 +1,170 @@
+import json
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import chain
+
+from sqlalchemy import event as orm_event, inspect, select
+from sqlalchemy.orm import Session
+
+from core.db import SessionLocal
+from core.http import strong_etag
+from core.notify import notification_hub
+from models.event import Event, EventStatus
+
+Month = tuple[int, int]
+
+CALENDAR_CHANNEL = "calendar"
+
+
+@dataclass
+class MonthBucket:
+    month: Month
+    events: list[dict]
+    body: bytes
+    etag: str
+    # The agenda page renders the same data, but must not share the JSON's strong ETag
+    html_etag: str
+    # Rendered agenda HTML, filled lazily by the frontend router
+    fragments: dict[str, str] = field(default_factory=dict)
+
+
+def month_of(value: datetime | date) -> Month:
+    return (value.year, value.month)
+
+
+def month_label(month: Month) -> str:
+    return f"{month[0]:04d}-{month[1]:02d}"
+
+
+def _public_event(event) -> dict:
+    # Only what the public agenda may show; location and notes stay private
+    return {
+        "id": event.id,
+        "date": event.date.isoformat(),
+        "duration_hours": event.duration_hours,
+        "event_type": event.event_type,
+        "status": event.status.value,
+    }
+
+
+def _build_bucket(month: Month, events: list[dict]) -> MonthBucket:
+    events = sorted(events, key=lambda e: (e["date"], e["id"]))
+    body = json.dumps({"month": month_label(month), "events": events}, ensure_ascii=False).encode()
+    etag = strong_etag(body)
+    return MonthBucket(month=month, events=events, body=body, etag=etag,
+                       html_etag=strong_etag(f"html:{etag}".encode()))
+
+
+class CalendarService:
+    """Per-month buckets of public events, rebuilt only when events change."""
+
+    def __init__(self):
+        self._buckets: dict[Month, MonthBucket] = {}
+        self._dirty: set[Month] = set()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _query(self, db: Session, start: datetime | None = None, end: datetime | None = None):
+        query = select(Event.id, Event.date, Event.duration_hours, Event.event_type, Event.status).where(
+            Event.status != EventStatus.CANCELLED
+        )
+        if start is not None:
+            query = query.where(Event.date >= start, Event.date < end)
+        return db.execute(query)
+
+    def load_all(self, db: Session):
+        grouped: dict[Month, list[dict]] = {}
+        for row in self._query(db):
+            grouped.setdefault(month_of(row.date), []).append(_public_event(row))
+        buckets = {month: _build_bucket(month, events) for month, events in grouped.items()}
+        with self._lock:
+            self._buckets = buckets
+            self._dirty.clear()
+            self._loaded = True
+
+    def _reload_month(self, db: Session, month: Month) -> MonthBucket:
+        year, number = month
+        start = datetime(year, number, 1)
+        end = datetime(year + number // 12, number % 12 + 1, 1)
+        bucket = _build_bucket(month, [_public_event(row) for row in self._query(db, start, end)])
+        with self._lock:
+            previous = self._buckets.get(month)
+            if previous is not None and previous.etag == bucket.etag:
+                bucket = previous  # unchanged: keep rendered fragments
+            self._buckets[month] = bucket
+            self._dirty.discard(month)
+        return bucket
+
+    def get_month(self, month: Month) -> MonthBucket:
+        with self._lock:
+            bucket = self._buckets.get(month)
+            fresh = self._loaded and month not in self._dirty
+        if fresh:
+            return bucket or self._empty(month)
+
+        db = SessionLocal()
+        try:
+            if not self._loaded:
+                self.load_all(db)
+                return self.get_month(month)
+            return self._reload_month(db, month)
+        finally:
+            db.close()
+
+    def _empty(self, month: Month) -> MonthBucket:
+        with self._lock:
+            return self._buckets.setdefault(month, _build_bucket(month, []))
+
+    def get_range(self, start: date, end: date) -> list[MonthBucket]:
+        months = []
+        year, number = start.year, start.month
+        while (year, number) <= month_of(end):
+            months.append(self.get_month((year, number)))
+            year, number = (year + 1, 1) if number == 12 else (year, number + 1)
+        return months
+
+    def invalidate(self, months: set[Month]):
+        with self._lock:
+            self._dirty.update(months)
+
+    def invalidate_all(self):
+        # The next read reloads every month
+        with self._lock:
+            self._loaded = False
+
+
+calendar_service = CalendarService()
+
+
+def load_calendar():
+    db = SessionLocal()
+    try:
+        calendar_service.load_all(db)
+    finally:
+        db.close()
+
+
+def _on_calendar_changed(payload: dict | None):
+    if payload is None:
+        calendar_service.invalidate_all()
+    else:
+        calendar_service.invalidate({tuple(month) for month in payload["months"]})
+
+
+notification_hub.subscribe(CALENDAR_CHANNEL, _on_calendar_changed)
+
+
+# Any ORM write touching an Event marks its old and new month dirty, here and
+# on every other worker, once committed
+@orm_event.listens_for(Session, "after_flush")
+def _publish_changed_months(session, flush_context):
+    months = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Event):
+            history = inspect(obj).attrs.date.history
+            for value in chain(history.added or (), history.deleted or (), [obj.date]):
+                if value is not None:
+                    months.add(month_of(value))
+    if months:
+        notification_hub.publish(session, CALENDAR_CHANNEL, {"months": sorted(months)})
@@ -0,0 +1,77 @@
+import json
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from core.http import strong_etag
+from core.notify import notification_hub
+from services.pricing import PricingEngine, load_pricing_engine
+
+CATALOG_CHANNEL = "catalog"
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    body: bytes
+    etag: str
+
+
+class CatalogCache:
+    """In-process cache of catalog reads, dropped as a whole on any catalog write.
+
+    The catalog changes a few times a month, so a single version counter is
+    enough: a write bumps it, stale loads that raced with the write are
+    discarded, and the next read reloads from the DB.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._bodies: dict[str, CachedBody] = {}
+        self._engine: PricingEngine | None = None
+        self._lock = threading.Lock()
+
+    def peek(self, name: str) -> CachedBody | None:
+        return self._bodies.get(name)
+
+    def get_body(self, name: str, db: Session, load: Callable[[Session], list]) -> CachedBody:
+        cached = self._bodies.get(name)
+        if cached is not None:
+            return cached
+        version = self.version
+        payload = json.dumps(load(db), ensure_ascii=False, separators=(",", ":")).encode()
+        cached = CachedBody(body=payload, etag=strong_etag(payload))
+        with self._lock:
+            if version == self.version:
+                self._bodies[name] = cached
+        return cached
+
+    def get_pricing_engine(self, db: Session) -> PricingEngine:
+        engine = self._engine
+        if engine is not None:
+            return engine
+        version = self.version
+        engine = load_pricing_engine(db)
+        # Shared across requests, so it must not be expired by this session's commits
+        for item in [*engine.packages.values(), *engine.addons.values()]:
+            db.expunge(item)
+        with self._lock:
+            if version == self.version:
+                self._engine = engine
+        return engine
+
+    def invalidate(self, payload: dict | None = None):
+        with self._lock:
+            self.version += 1
+            self._bodies = {}
+            self._engine = None
+
+
+catalog_cache = CatalogCache()
+notification_hub.subscribe(CATALOG_CHANNEL, catalog_cache.invalidate)
+
+
+def invalidate_catalog(db: Session):
+    # Takes effect here and on every other worker once the write commits
+    notification_hub.publish(db, CATALOG_CHANNEL)
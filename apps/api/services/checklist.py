@@ -0,0 +1,118 @@
+from typing import Any
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from models.inventory import ChecklistItem, Equipment, EquipmentAssignment, EquipmentStatus
+from services.equipment import publish_equipment_status, update_equipment_status
+
+CHECK_OUT = "check_out"
+CHECK_IN = "check_in"
+
+# Per-scan outcomes
+CHECKED_OUT = "checked_out"
+CHECKED_IN = "checked_in"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+AMBIGUOUS = "ambiguous"
+UNAVAILABLE = "unavailable"
+INVALID = "invalid"
+
+# Scans applied per UPDATE round trip
+SCAN_BATCH_SIZE = 200
+
+
+class ChecklistScanner:
+    """Applies load-in/load-out scans for one event in batches.
+
+    The event's checklist is loaded once; a scan is an item id or the name
+    of a checklist item or of an assigned piece of equipment (which covers
+    all of that equipment's items). Each :meth:`apply` call issues one UPDATE
+    for the checklist and one for the equipment status, then commits.
+    """
+
+    def __init__(self, db: Session, event_id: int):
+        self.db = db
+        self.event_id = event_id
+        self.position = 0
+        self.items: dict[int, dict[str, Any]] = {}
+        self.by_name: dict[str, set[int]] = {}
+        self.equipment_items: dict[int, set[int]] = {}
+        self.equipment_status: dict[int, EquipmentStatus] = {}
+        rows = db.execute(
+            select(ChecklistItem.id, ChecklistItem.name, ChecklistItem.checked_out, ChecklistItem.checked_in,
+                   Equipment.id, Equipment.name, Equipment.status)
+            .join(EquipmentAssignment, ChecklistItem.assignment_id == EquipmentAssignment.id)
+            .join(Equipment, EquipmentAssignment.equipment_id == Equipment.id)
+            .where(EquipmentAssignment.event_id == event_id)
+        )
+        for item_id, item_name, checked_out, checked_in, equipment_id, equipment_name, status in rows:
+            self.items[item_id] = {
+                "equipment_id": equipment_id,
+                "checked_out": bool(checked_out),
+                "checked_in": bool(checked_in),
+            }
+            self.by_name.setdefault(item_name.strip().lower(), set()).add(item_id)
+            self.by_name.setdefault(equipment_name.strip().lower(), set()).add(item_id)
+            self.equipment_items.setdefault(equipment_id, set()).add(item_id)
+            self.equipment_status[equipment_id] = status
+
+    def resolve(self, scan: Any) -> tuple[list[int], str | None]:
+        if isinstance(scan, dict):
+            scan = scan.get("item_id", scan.get("name"))
+        if isinstance(scan, bool) or not isinstance(scan, (int, str)) or scan == "":
+            return [], INVALID
+        if isinstance(scan, int):
+            return ([scan], None) if scan in self.items else ([], NOT_FOUND)
+        item_ids = self.by_name.get(scan.strip().lower())
+        if not item_ids:
+            return [], NOT_FOUND
+        if len({self.items[i]["equipment_id"] for i in item_ids}) > 1:
+            return sorted(item_ids), AMBIGUOUS
+        return sorted(item_ids), None
+
+    def apply(self, action: str, scans: list) -> list[dict]:
+        flag, done = ("checked_out", CHECKED_OUT) if action == CHECK_OUT else ("checked_in", CHECKED_IN)
+        results = []
+        pending: set[int] = set()
+        for scan in scans:
+            self.position += 1
+            result = {"position": self.position, "scan": scan}
+            item_ids, error = self.resolve(scan)
+            if error:
+                results.append(dict(result, item_ids=item_ids, result=error))
+                continue
+            equipment_id = self.items[item_ids[0]]["equipment_id"]
+            if action == CHECK_OUT and self.equipment_status[equipment_id] == EquipmentStatus.MAINTENANCE:
+                results.append(dict(result, item_ids=item_ids, result=UNAVAILABLE, detail="in maintenance"))
+                continue
+            changes = [i for i in item_ids if not self.items[i][flag] and i not in pending]
+            pending.update(changes)
+            results.append(dict(result, item_ids=item_ids, result=done if changes else UNCHANGED))
+
+        if pending:
+            self.db.execute(
+                update(ChecklistItem)
+                .where(ChecklistItem.id.in_(pending))
+                .values({flag: True})
+                .execution_options(synchronize_session=False)
+            )
+        for item_id in pending:
+            self.items[item_id][flag] = True
+
+        touched = {self.items[i]["equipment_id"] for i in pending}
+        if action == CHECK_OUT:
+            status = EquipmentStatus.IN_USE
+            changed = update_equipment_status(self.db, sorted(touched), status,
+                                              only_from={EquipmentStatus.AVAILABLE, EquipmentStatus.MISSING})
+        else:
+            # Equipment is back once every one of its items for this event is
+            status = EquipmentStatus.AVAILABLE
+            returned = [e for e in touched if all(self.items[i]["checked_in"] for i in self.equipment_items[e])]
+            changed = update_equipment_status(self.db, sorted(returned), status,
+                                              only_from={EquipmentStatus.IN_USE, EquipmentStatus.MISSING})
+        self.db.commit()
+        publish_equipment_status(changed, status)
+        for equipment_id, _, _ in changed:
+            self.equipment_status[equipment_id] = status
+        return results
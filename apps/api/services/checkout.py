@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.cache import TTLCache
+from core.config import settings
+from core.notify import notification_hub
+from models.event import Payment, PaymentStatus
+from services.payment_gateway import MercadoPagoClient
+
+# A reused preference must stay payable for at least this long
+REUSE_MARGIN = timedelta(minutes=10)
+
+CHECKOUT_CHANNEL = "checkout"
+
+checkout_cache = TTLCache(ttl=settings.checkout_cache_seconds, maxsize=4096)
+
+
+def _drop_cached_checkout(payload: dict | None):
+    if payload is None:
+        checkout_cache.clear()
+    else:
+        checkout_cache.pop(payload["key"])
+
+
+notification_hub.subscribe(CHECKOUT_CHANNEL, _drop_cached_checkout)
+
+
+class CheckoutConflictError(Exception):
+    pass
+
+
+def checkout_key(booking_id: int, payment_type: str, amount_ars: int) -> str:
+    return f"{booking_id}:{payment_type}:{amount_ars}"
+
+
+def release_checkout(db: Session, key: str | None):
+    # Called whenever a payment leaves PENDING so the key can be claimed again;
+    # other workers drop their cached copy once the change commits
+    if key:
+        checkout_cache.pop(key)
+        notification_hub.publish(db, CHECKOUT_CHANNEL, {"key": key})
+
+
+def _reusable(payment: Payment, now: datetime) -> bool:
+    return (
+        payment.status == PaymentStatus.PENDING
+        and payment.mp_init_point is not None
+        and payment.expires_at is not None
+        and payment.expires_at > now + REUSE_MARGIN
+    )
+
+
+def _checkout_response(payment: Payment, reused: bool) -> dict:
+    return {
+        "payment_id": payment.id,
+        "preference_id": payment.mp_preference_id,
+        "init_point": payment.mp_init_point,
+        "expires_at": payment.expires_at,
+        "reused": reused,
+    }
+
+
+def get_cached_checkout(key: str) -> dict | None:
+    cached = checkout_cache.get(key)
+    if cached and cached["expires_at"] > datetime.utcnow() + REUSE_MARGIN:
+        return dict(cached, reused=True)
+    return None
+
+
+def get_or_create_checkout(
+    db: Session,
+    gateway: MercadoPagoClient,
+    booking_id: int,
+    payment_type: str,
+    amount: float,
+    description: str,
+    payer_email: str,
+) -> dict:
+    amount_ars = int(round(amount * 100)) # Store in cents
+    key = checkout_key(booking_id, payment_type, amount_ars)
+    cached = get_cached_checkout(key)
+    if cached:
+        return cached
+
+    now = datetime.utcnow()
+    existing = db.query(Payment).filter(Payment.checkout_key == key).first()
+    if existing:
+        if _reusable(existing, now):
+            response = _checkout_response(existing, reused=False)
+            checkout_cache.set(key, response)
+            return dict(response, reused=True)
+        # Expired or settled: free the key for the new preference
+        existing.checkout_key = None
+        db.flush()
+
+    expires_at = now + timedelta(minutes=settings.mp_preference_ttl_minutes)
+    payment = Payment(
+        booking_id=booking_id,
+        type=payment_type,
+        amount_ars=amount_ars,
+        status=PaymentStatus.PENDING,
+        checkout_key=key,
+        expires_at=expires_at,
+    )
+    db.add(payment)
+    try:
+        # Claims the unique key; a concurrent request for the same checkout
+        # blocks here until we commit and then fails the constraint.
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        winner = db.query(Payment).filter(Payment.checkout_key == key).first()
+        if winner and _reusable(winner, now):
+            return _checkout_response(winner, reused=True)
+        raise CheckoutConflictError("A checkout for this booking is already being created")
+
+    preference = {
+        "items": [
+            {
+                "title": description,
+                "quantity": 1,
+                "unit_price": amount,
+            }
+        ],
+        "payer": {
+            "email": payer_email
+        },
+        "back_urls": {
+            "success": "https://your-frontend.com/success", # TODO: Replace with actual frontend URL
+            "failure": "https://your-frontend.com/failure", # TODO: Replace with actual frontend URL
+            "pending": "https://your-frontend.com/pending", # TODO: Replace with actual frontend URL
+        },
+        "auto_return": "approved",
+        "notification_url": f"https://your-backend.com/payments/webhooks/mp?payment_id={payment.id}", # TODO: Replace with actual backend URL
+        "external_reference": str(payment.id), # Our internal payment ID
+        "expires": True,
+        "expiration_date_to": expires_at.replace(tzinfo=timezone.utc).isoformat(timespec="milliseconds"),
+    }
+
+    try:
+        # Keyed on our payment id so a retried POST cannot create two preferences
+        mp_preference = gateway.create_preference(preference, idempotency_key=f"payment-{payment.id}")
+    except Exception:
+        # Nothing was committed, so a failed call leaves no orphan payment behind
+        db.rollback()
+        raise
+
+    payment.mp_preference_id = mp_preference["id"]
+    payment.mp_init_point = mp_preference["init_point"]
+    db.commit()
+
+    response = _checkout_response(payment, reused=False)
+    checkout_cache.set(key, response)
+    return response
@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+from jinja2 import Template, TemplateError
+from jinja2.sandbox import SandboxedEnvironment
+from sqlalchemy.orm import Session, joinedload
+
+from core.cache import TTLCache
+from core.config import settings
+from core.storage import MB, StorageBackend, store_fileobj
+from models.document import Contract, ContractTemplate
+from models.event import Booking
+
+FORMATS = {"html": "text/html; charset=utf-8", "pdf": "application/pdf"}
+
+# Bumping this invalidates every rendered output (e.g. after changing the context)
+RENDERER_VERSION = 1
+
+
+class ContractRenderError(Exception):
+    pass
+
+
+# --- Runs inside the worker processes -------------------------------------
+
+_environment = SandboxedEnvironment(autoescape=True)
+_compiled: dict[tuple[str, str], Template] = {}
+
+
+def _compile(template_id: str, content_hash: str, content: str) -> Template:
+    # Compiled once per worker; an edited template has a new hash and a new entry
+    key = (template_id, content_hash)
+    template = _compiled.get(key)
+    if template is None:
+        for stale in [k for k in _compiled if k[0] == template_id]:
+            del _compiled[stale]
+        template = _compiled[key] = _environment.from_string(content)
+    return template
+
+
+def render_contract(template_id: str, content_hash: str, content: str, context: dict, output_format: str) -> bytes:
+    try:
+        html = _compile(template_id, content_hash, content).render(**context)
+    except TemplateError as e:
+        raise ContractRenderError(f"Template {template_id}: {e}") from e
+    if output_format == "html":
+        return html.encode()
+    try:
+        from weasyprint import HTML
+    except ImportError as e:
+        raise ContractRenderError("PDF output needs the optional weasyprint package") from e
+    return HTML(string=html).write_pdf()
+
+
+# --- Runs in the API process ----------------------------------------------
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+# Output keys already known to exist in storage, to skip the HEAD request
+_rendered_keys = TTLCache(ttl=3600, maxsize=4096)
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: the API process runs threads
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.contract_render_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_render_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def contract_context(contract: Contract) -> dict:
+    """Plain, JSON-serializable data the template can use."""
+    booking = contract.booking
+    event = booking.event
+    client = booking.client
+    return {
+        "contract": {"id": contract.id, "version": contract.version},
+        "booking": {
+            "id": booking.id,
+            "total_price_ars": booking.total_price_ars,
+            "status": booking.status.value,
+        },
+        "client": {
+            "full_name": client.full_name if client else None,
+            "email": client.email if client else None,
+            "phone_number": client.phone_number if client else None,
+        },
+        "event": {
+            "event_type": event.event_type,
+            "date": event.date.strftime("%d/%m/%Y"),
+            "time": event.date.strftime("%H:%M"),
+            "location": event.location,
+            "duration_hours": event.duration_hours,
+        },
+    }
+
+
+def load_render_job(db: Session, contract_id: int) -> tuple[ContractTemplate, dict] | None:
+    contract = (
+        db.query(Contract)
+        .options(joinedload(Contract.booking).joinedload(Booking.event),
+                 joinedload(Contract.booking).joinedload(Booking.client))
+        .filter(Contract.id == contract_id)
+        .first()
+    )
+    if contract is None:
+        return None
+    template = db.get(ContractTemplate, contract.template_id) if contract.template_id else None
+    if template is None:
+        raise ContractRenderError(f"Contract {contract_id} has no valid template")
+    return template, contract_context(contract)
+
+
+def output_key(template: ContractTemplate, context: dict, output_format: str) -> str:
+    # Same template text + same data = same document, whoever asks for it
+    digest = hashlib.sha256(json.dumps(
+        [RENDERER_VERSION, template.id, content_hash(template.content), context, output_format],
+        sort_keys=True, default=str,
+    ).encode()).hexdigest()
+    return f"contracts/rendered/{digest}.{output_format}"
+
+
+async def render_to_storage(storage: StorageBackend, template: ContractTemplate, context: dict,
+                            output_format: str) -> tuple[str, bool]:
+    """Returns the storage key of the rendered output and whether it was cached."""
+    key = output_key(template, context, output_format)
+    if _rendered_keys.get(key):
+        return key, True
+    if await run_in_threadpool(storage.head, key) is not None:
+        _rendered_keys.set(key, True)
+        return key, True
+
+    output = await asyncio.wrap_future(get_render_pool().submit(
+        render_contract, template.id, content_hash(template.content), template.content, context, output_format,
+    ))
+    await run_in_threadpool(
+        store_fileobj, storage, key, io.BytesIO(output), FORMATS[output_format],
+        settings.document_max_upload_mb * MB, settings.storage_part_size_mb * MB,
+    )
+    _rendered_keys.set(key, True)
+    return key, False
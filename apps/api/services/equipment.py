@@ -0,0 +1,260 @@
+import threading
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.db import SessionLocal
+from core.interval_tree import IntervalTree
+from models.catalog import PackageEquipment
+from models.event import Event
+from models.inventory import ChecklistItem, Equipment, EquipmentAssignment, EquipmentStatus
+from services.availability import event_window
+from services.inventory_counters import apply_counter_deltas, status_change_deltas
+
+# Items in these states are never handed out, whatever their calendar says
+UNALLOCATABLE_STATUSES = {EquipmentStatus.MAINTENANCE, EquipmentStatus.MISSING}
+
+# Retries when the index turns out to be stale for the picked items
+MAX_ALLOCATION_ATTEMPTS = 3
+
+
+class AllocationError(Exception):
+    def __init__(self, shortages: dict[str, tuple[int, int]]):
+        # category -> (needed, free)
+        details = ", ".join(f"{c}: need {n}, {f} free" for c, (n, f) in sorted(shortages.items()))
+        super().__init__(f"Not enough free equipment ({details})")
+        self.shortages = shortages
+
+
+class EquipmentConflictError(Exception):
+    pass
+
+
+class EquipmentIndex:
+    """Per-worker interval index of equipment assignments.
+
+    Like the availability index it only speeds up the search for free items;
+    the exclusion constraint on ``equipment_assignments`` decides conflicts.
+    """
+
+    def __init__(self):
+        self._trees: dict[int, IntervalTree] = {}
+        self._by_assignment: dict[int, tuple[int, datetime]] = {}
+        self._categories: dict[str, set[int]] = {}
+        self._equipment: dict[int, tuple[str | None, EquipmentStatus]] = {}
+        self._lock = threading.RLock()
+
+    def rebuild(self, db: Session):
+        trees: dict[int, IntervalTree] = {}
+        by_assignment: dict[int, tuple[int, datetime]] = {}
+        categories: dict[str, set[int]] = {}
+        equipment: dict[int, tuple] = {}
+        for equipment_id, category, status in db.execute(
+            select(Equipment.id, Equipment.category, Equipment.status)
+        ):
+            equipment[equipment_id] = (category, status)
+            categories.setdefault(category, set()).add(equipment_id)
+        for assignment_id, equipment_id, starts_at, ends_at in db.execute(select(
+            EquipmentAssignment.id, EquipmentAssignment.equipment_id,
+            EquipmentAssignment.starts_at, EquipmentAssignment.ends_at,
+        )):
+            trees.setdefault(equipment_id, IntervalTree()).insert(starts_at, ends_at, assignment_id)
+            by_assignment[assignment_id] = (equipment_id, starts_at)
+        with self._lock:
+            self._trees, self._by_assignment = trees, by_assignment
+            self._categories, self._equipment = categories, equipment
+
+    def set_equipment(self, equipment_id: int, category: str | None, status: EquipmentStatus):
+        with self._lock:
+            previous = self._equipment.get(equipment_id)
+            if previous is not None:
+                self._categories.get(previous[0], set()).discard(equipment_id)
+            self._equipment[equipment_id] = (category, status)
+            self._categories.setdefault(category, set()).add(equipment_id)
+
+    def add(self, assignment_id: int, equipment_id: int, start: datetime, end: datetime):
+        with self._lock:
+            self.remove(assignment_id)
+            self._trees.setdefault(equipment_id, IntervalTree()).insert(start, end, assignment_id)
+            self._by_assignment[assignment_id] = (equipment_id, start)
+
+    def remove(self, assignment_id: int):
+        with self._lock:
+            entry = self._by_assignment.pop(assignment_id, None)
+            if entry is not None:
+                self._trees[entry[0]].remove(entry[1], assignment_id)
+
+    def conflicts(self, equipment_id: int, start: datetime, end: datetime) -> list[int]:
+        with self._lock:
+            tree = self._trees.get(equipment_id)
+            return [key for _, _, key in tree.overlapping(start, end)] if tree else []
+
+    def free(self, category: str | None, start: datetime, end: datetime) -> list[int]:
+        with self._lock:
+            return sorted(
+                equipment_id
+                for equipment_id in self._categories.get(category, ())
+                if self._equipment[equipment_id][1] not in UNALLOCATABLE_STATUSES
+                and not self.conflicts(equipment_id, start, end)
+            )
+
+
+equipment_index = EquipmentIndex()
+
+
+def update_equipment_status(
+    db: Session,
+    equipment_ids: list[int],
+    status: EquipmentStatus,
+    only_from: set[EquipmentStatus] | None = None,
+) -> list[tuple[int, str | None, EquipmentStatus]]:
+    """Moves equipment to ``status`` in one UPDATE without committing.
+
+    Rows are locked first so concurrent scans of the same item serialize,
+    and the inventory counters move in the same transaction. Returns (id, category, previous status) for the rows that changed; pass
+    them to :func:`publish_equipment_status` once committed.
+    """
+    if not equipment_ids:
+        return []
+    rows = db.execute(
+        select(Equipment.id, Equipment.category, Equipment.status)
+        .where(Equipment.id.in_(equipment_ids))
+        .with_for_update()
+    ).all()
+    changed = [
+        (equipment_id, category, previous)
+        for equipment_id, category, previous in rows
+        if previous != status and (only_from is None or previous in only_from)
+    ]
+    if changed:
+        db.execute(
+            update(Equipment)
+            .where(Equipment.id.in_([row[0] for row in changed]))
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        apply_counter_deltas(db, status_change_deltas(
+            [(category, previous, status) for _, category, previous in changed]
+        ))
+    return changed
+
+
+def publish_equipment_status(changed: list[tuple[int, str | None, EquipmentStatus]], status: EquipmentStatus):
+    for equipment_id, category, _ in changed:
+        equipment_index.set_equipment(equipment_id, category, status)
+
+
+def package_requirements(db: Session, package_id: int) -> dict[str, int]:
+    rows = db.execute(
+        select(PackageEquipment.category, PackageEquipment.quantity)
+        .where(PackageEquipment.package_id == package_id)
+    )
+    requirements: dict[str, int] = {}
+    for category, quantity in rows:
+        requirements[category] = requirements.get(category, 0) + quantity
+    return requirements
+
+
+def _pick(db: Session, event: Event, requirements: dict[str, int],
+          start: datetime, end: datetime) -> dict[str, list[int]]:
+    held = {}
+    for category, in db.execute(
+        select(Equipment.category)
+        .join(EquipmentAssignment, EquipmentAssignment.equipment_id == Equipment.id)
+        .where(EquipmentAssignment.event_id == event.id)
+    ):
+        held[category] = held.get(category, 0) + 1
+
+    for _ in range(MAX_ALLOCATION_ATTEMPTS):
+        picks: dict[str, list[int]] = {}
+        shortages: dict[str, tuple[int, int]] = {}
+        for category, quantity in requirements.items():
+            needed = quantity - held.get(category, 0)
+            if needed <= 0:
+                continue
+            free = equipment_index.free(category, start, end)
+            if len(free) < needed:
+                shortages[category] = (needed, len(free))
+            picks[category] = free[:needed]
+        if shortages:
+            raise AllocationError(shortages)
+
+        # One query confirms the picks are still free; another worker may
+        # have allocated them since our index was last refreshed.
+        picked = [equipment_id for ids in picks.values() for equipment_id in ids]
+        taken = db.execute(
+            select(EquipmentAssignment.id, EquipmentAssignment.equipment_id,
+                   EquipmentAssignment.starts_at, EquipmentAssignment.ends_at)
+            .where(
+                EquipmentAssignment.equipment_id.in_(picked),
+                EquipmentAssignment.starts_at < end,
+                EquipmentAssignment.ends_at > start,
+            )
+        ).all()
+        if not taken:
+            return picks
+        for assignment_id, equipment_id, starts_at, ends_at in taken:
+            equipment_index.add(assignment_id, equipment_id, starts_at, ends_at)
+    raise EquipmentConflictError("Equipment is being allocated concurrently, try again")
+
+
+def allocate_equipment(db: Session, event: Event, requirements: dict[str, int]) -> list[EquipmentAssignment]:
+    """Assigns free items of each required category to the event, all or nothing.
+
+    Items the event already holds count towards the requirement. Each new
+    assignment gets a checklist item named after its equipment, which the
+    load-in/load-out scans tick off. Nothing is committed; pass
+    :func:`assignment_entries` of the result to :func:`publish_assignments`
+    once the caller has committed.
+    """
+    start, end = event_window(event)
+    picks = _pick(db, event, requirements, start, end)
+    assignments = [
+        EquipmentAssignment(event_id=event.id, equipment_id=equipment_id, starts_at=start, ends_at=end)
+        for ids in picks.values()
+        for equipment_id in ids
+    ]
+    if not assignments:
+        return []
+    names = dict(db.execute(
+        select(Equipment.id, Equipment.name)
+        .where(Equipment.id.in_([a.equipment_id for a in assignments]))
+    ).all())
+    try:
+        with db.begin_nested():
+            db.add_all(assignments)
+            db.add_all([ChecklistItem(assignment=a, name=names[a.equipment_id]) for a in assignments])
+    except IntegrityError as e:
+        raise EquipmentConflictError("Equipment was allocated concurrently, try again") from e
+    return assignments
+
+
+def assignment_entries(assignments: list[EquipmentAssignment]) -> list[tuple[int, int, datetime, datetime]]:
+    return [(a.id, a.equipment_id, a.starts_at, a.ends_at) for a in assignments]
+
+
+def publish_assignments(entries: list[tuple[int, int, datetime, datetime]]):
+    for assignment_id, equipment_id, start, end in entries:
+        equipment_index.add(assignment_id, equipment_id, start, end)
+
+
+def release_assignments(db: Session, assignment_ids: list[int]):
+    # Deletes without committing; call publish_unassigned afterwards
+    if assignment_ids:
+        db.execute(delete(ChecklistItem).where(ChecklistItem.assignment_id.in_(assignment_ids)))
+        db.execute(delete(EquipmentAssignment).where(EquipmentAssignment.id.in_(assignment_ids)))
+
+
+def publish_unassigned(assignment_ids: list[int]):
+    for assignment_id in assignment_ids:
+        equipment_index.remove(assignment_id)
+
+
+def rebuild_equipment_index():
+    db = SessionLocal()
+    try:
+        equipment_index.rebuild(db)
+    finally:
+        db.close()
@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Iterator
+
+from sqlalchemy import Column, Date, DateTime, Enum, select
+
+from core.db import SessionLocal
+from models.event import Booking, Event, Lead, Payment
+
+# Rows fetched per round trip; on Postgres this is a server-side cursor
+FETCH_SIZE = 2000
+# Encoded output is handed to the response in chunks of about this size
+CHUNK_BYTES = 64 * 1024
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@dataclass(frozen=True)
+class Export:
+    columns: list[Column]
+    # Column the date range applies to
+    date_column: Column
+    joins: tuple = ()
+
+
+EXPORTS = {
+    "leads": Export(
+        columns=[
+            Lead.id, Lead.created_at, Lead.status, Lead.source, Lead.contact_name, Lead.contact_email,
+            Lead.contact_phone, Lead.event_type, Lead.event_date, Lead.event_location, Lead.num_guests,
+            Lead.interested_services, Lead.message, Lead.duplicate_of_id,
+        ],
+        date_column=Lead.created_at,
+    ),
+    "bookings": Export(
+        columns=[
+            Booking.id, Booking.status, Booking.confirmed_at, Booking.client_id, Booking.event_id,
+            Event.date.label("event_date"), Event.event_type, Booking.total_price_ars,
+        ],
+        date_column=Booking.confirmed_at,
+        joins=((Event, Event.id == Booking.event_id),),
+    ),
+    "payments": Export(
+        columns=[
+            Payment.id, Payment.booking_id, Payment.type, Payment.status, Payment.approved_at,
+            Payment.amount_ars, Payment.mp_preference_id,
+        ],
+        date_column=Payment.approved_at,
+    ),
+}
+
+
+def export_query(dataset: str, start: date | None = None, end: date | None = None):
+    export = EXPORTS[dataset]
+    query = select(*export.columns)
+    for target, on in export.joins:
+        query = query.join(target, on)
+    # Whole days, end inclusive; rows without the date are left out of ranged exports
+    if start:
+        query = query.where(export.date_column >= datetime.combine(start, time.min))
+    if end:
+        query = query.where(export.date_column < datetime.combine(end + timedelta(days=1), time.min))
+    return query.order_by(export.columns[0])
+
+
+def _converters(query) -> list:
+    # Per column, how to make its values CSV/JSON friendly; None leaves them as they are
+    converters = []
+    for column in query.selected_columns:
+        if isinstance(column.type, Enum):
+            converters.append(lambda value: value.value if value is not None else None)
+        elif isinstance(column.type, (Date, DateTime)):
+            converters.append(lambda value: value.isoformat() if value is not None else None)
+        else:
+            converters.append(None)
+    return converters
+
+
+def iter_rows(dataset: str, start: date | None = None, end: date | None = None) -> Iterator:
+    """Yields the column names, then the rows, holding at most FETCH_SIZE rows at a time."""
+    query = export_query(dataset, start, end)
+    converted = [(index, convert) for index, convert in enumerate(_converters(query)) if convert]
+    db = SessionLocal()
+    try:
+        # Core connection: plain tuples, no ORM row processing
+        result = db.connection().execute(query, execution_options={"yield_per": FETCH_SIZE})
+        yield list(result.keys())
+        for row in result:
+            values = list(row)
+            for index, convert in converted:
+                values[index] = convert(values[index])
+            yield values
+    finally:
+        db.close()
+
+
+def encode_rows(rows: Iterator, fmt: str) -> Iterator[bytes]:
+    header = next(rows)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(header)
+        # The header goes out on its own, so the download starts before the first batch is fetched
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    for values in rows:
+        if fmt == "csv":
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(header, values)), ensure_ascii=False) + "\n")
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        # Sync flush so every chunk reaches the client now instead of sitting in the compressor
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def stream_export(dataset: str, fmt: str, start: date | None = None, end: date | None = None,
+                  compress: bool = False) -> Iterator[bytes]:
+    chunks = encode_rows(iter_rows(dataset, start, end), fmt)
+    return gzip_chunks(chunks) if compress else chunks
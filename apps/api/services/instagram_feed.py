@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+import requests
+from fastapi.concurrency import run_in_threadpool
+
+from core.config import settings
+
+MEDIA_FIELDS = "id,caption,media_type,media_url,thumbnail_url,permalink,timestamp"
+
+
+class InstagramFeedError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class FeedSnapshot:
+    posts: list[dict] = field(default_factory=list)
+    fetched_at: str | None = None # ISO timestamp of the fetch that produced the posts
+
+
+def to_post(media: dict) -> dict:
+    # Videos have no image in media_url; their cover is the thumbnail
+    image = media.get("thumbnail_url") if media.get("media_type") == "VIDEO" else media.get("media_url")
+    return {
+        "id": str(media["id"]),
+        "caption": media.get("caption") or "",
+        "media_url": image or media.get("media_url") or "",
+        "permalink": media.get("permalink") or "",
+        "timestamp": media.get("timestamp") or "",
+    }
+
+
+def retry_delay(failures: int, base: float, cap: float) -> float:
+    # Exponential backoff with jitter, so workers do not retry in lockstep
+    delay = min(cap, base * 2 ** max(failures - 1, 0))
+    return random.uniform(delay / 2, delay)
+
+
+class InstagramFeed:
+    """Instagram posts for the site, served from memory and refreshed in the background.
+
+    Readers never touch the network: they get the last good snapshot, which
+    survives upstream errors and (via a JSON file) restarts. Only ``run``
+    talks to the Graph API.
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        user_id: str = "me",
+        base_url: str = "https://graph.instagram.com",
+        limit: int = 12,
+        timeout: float = 5.0,
+        snapshot_path: str | None = None,
+    ):
+        self.access_token = access_token
+        self.url = f"{base_url.rstrip('/')}/{user_id}/media"
+        self.limit = limit
+        self.timeout = timeout
+        self.snapshot_path = snapshot_path
+        self.snapshot = FeedSnapshot()
+        self.failures = 0
+        self.last_error: str | None = None
+        self.last_attempt_at: str | None = None
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.access_token)
+
+    def posts(self) -> list[dict]:
+        return self.snapshot.posts
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "posts": len(self.snapshot.posts),
+            "fetched_at": self.snapshot.fetched_at,
+            "last_attempt_at": self.last_attempt_at,
+            "consecutive_failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+    def fetch(self) -> list[dict]:
+        try:
+            response = self._session.get(
+                self.url,
+                params={"fields": MEDIA_FIELDS, "limit": self.limit, "access_token": self.access_token},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            # The token travels in the query string, which requests puts in its messages
+            raise InstagramFeedError(f"Instagram request failed: {str(e).replace(self.access_token, '***')}") from e
+        if response.status_code != 200:
+            raise InstagramFeedError(f"Instagram returned {response.status_code}: {response.text[:200]}")
+        try:
+            posts = [to_post(item) for item in response.json()["data"]]
+            return [post for post in posts if post["media_url"]]
+        except (ValueError, KeyError, TypeError) as e:
+            raise InstagramFeedError(f"Unexpected Instagram response: {e}") from e
+
+    def refresh(self) -> bool:
+        """One fetch; on success the snapshot is replaced, on failure it is kept."""
+        with self._lock:
+            self.last_attempt_at = datetime.utcnow().isoformat()
+            try:
+                posts = self.fetch()
+            except InstagramFeedError as e:
+                self.failures += 1
+                self.last_error = str(e)
+                return False
+            # Swapped in one assignment, so readers see the old or the new feed, never a mix
+            self.snapshot = FeedSnapshot(posts=posts, fetched_at=datetime.utcnow().isoformat())
+            self.failures = 0
+            self.last_error = None
+            self.save_snapshot()
+            return True
+
+    def load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                self.snapshot = FeedSnapshot(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Ignoring unreadable Instagram snapshot {self.snapshot_path}: {e}")
+
+    def save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(asdict(self.snapshot), f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"Could not save Instagram snapshot: {e}")
+
+    async def run(self, interval: float, retry: float, max_backoff: float):
+        # First refresh right away; the page shows the saved snapshot meanwhile
+        while True:
+            started = time.monotonic()
+            try:
+                ok = await run_in_threadpool(self.refresh)
+            except Exception as e:
+                ok = False
+                print(f"Instagram refresh crashed: {e}")
+            if ok:
+                delay = random.uniform(0.9, 1.1) * interval
+            else:
+                delay = retry_delay(self.failures, retry, max_backoff)
+                print(f"Instagram refresh failed ({self.failures} in a row, retrying in {delay:.0f}s): {self.last_error}")
+            await asyncio.sleep(max(0.0, delay - (time.monotonic() - started)))
+
+    def close(self):
+        self._session.close()
+
+
+instagram_feed = InstagramFeed(
+    settings.instagram_access_token,
+    user_id=settings.instagram_user_id,
+    base_url=settings.instagram_api_base_url,
+    limit=settings.instagram_feed_limit,
+    timeout=settings.instagram_timeout_seconds,
+    snapshot_path=settings.instagram_snapshot_path,
+)
+
+
+async def instagram_refresh_loop():
+    await instagram_feed.run(
+        settings.instagram_refresh_seconds,
+        settings.instagram_retry_seconds,
+        settings.instagram_max_backoff_seconds,
+    )
@@ -0,0 +1,110 @@
+from collections import Counter
+
+from sqlalchemy import delete, event as orm_event, func, inspect, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.inventory import Equipment, EquipmentStatus, InventoryCounter
+
+CounterKey = tuple[str, EquipmentStatus]
+
+
+def counter_key(category: str | None, status: EquipmentStatus | str | None) -> CounterKey:
+    # Plain strings ("available", as scripts/seed.py sets them) until the row is reloaded
+    return (category or "", EquipmentStatus(status) if status else EquipmentStatus.AVAILABLE)
+
+
+def apply_counter_deltas(db: Session, deltas: dict[CounterKey, int]):
+    """Adds the deltas to the counters inside the caller's transaction."""
+    rows = [
+        {"category": category, "status": status, "count": delta}
+        # Fixed order, so concurrent transactions lock counter rows alike
+        for (category, status), delta in sorted(deltas.items(), key=lambda item: (item[0][0], item[0][1].name))
+        if delta
+    ]
+    if not rows:
+        return
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(InventoryCounter).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[InventoryCounter.category, InventoryCounter.status],
+        set_={"count": InventoryCounter.count + statement.excluded.count},
+    ))
+
+
+def status_change_deltas(changes: list[tuple[str | None, EquipmentStatus, EquipmentStatus]]) -> Counter:
+    # (category, previous status, new status) per changed item
+    deltas: Counter = Counter()
+    for category, previous, status in changes:
+        deltas[counter_key(category, previous)] -= 1
+        deltas[counter_key(category, status)] += 1
+    return deltas
+
+
+def _load_previous(target, value, oldvalue, initiator):
+    pass
+
+
+# Active history loads the committed value before a set on an expired
+# attribute, so the counter being decremented is the real previous one
+for _attribute in (Equipment.category, Equipment.status):
+    orm_event.listen(_attribute, "set", _load_previous, active_history=True)
+
+
+@orm_event.listens_for(Session, "after_flush")
+def _count_equipment_changes(session, flush_context):
+    # Covers ORM writes; set-based updates go through update_equipment_status
+    deltas: Counter = Counter()
+    for obj in session.new:
+        if isinstance(obj, Equipment):
+            deltas[counter_key(obj.category, obj.status)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Equipment):
+            state = inspect(obj)
+            category = state.attrs.category.load_history()
+            status = state.attrs.status.load_history()
+            deltas[counter_key((category.deleted or category.unchanged or [None])[0],
+                               (status.deleted or status.unchanged or [None])[0])] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Equipment):
+            state = inspect(obj)
+            category = state.attrs.category.load_history()
+            status = state.attrs.status.load_history()
+            if not (category.has_changes() or status.has_changes()):
+                continue
+            deltas[counter_key((category.deleted or category.unchanged or [None])[0],
+                               (status.deleted or status.unchanged or [None])[0])] -= 1
+            deltas[counter_key(obj.category, obj.status)] += 1
+    if deltas:
+        apply_counter_deltas(session, deltas)
+
+
+def rebuild_counters(db: Session):
+    """Recounts from the equipment table, e.g. after writes that bypassed the app."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Holds off status changes until the new counts are committed
+        db.execute(text("LOCK TABLE equipment IN SHARE MODE"))
+    db.execute(delete(InventoryCounter))
+    db.execute(insert(InventoryCounter).from_select(
+        ["category", "status", "count"],
+        select(func.coalesce(Equipment.category, ""), Equipment.status, func.count())
+        .group_by(func.coalesce(Equipment.category, ""), Equipment.status),
+    ))
+    db.commit()
+
+
+def inventory_summary(db: Session) -> list[dict]:
+    categories: dict[str, dict] = {}
+    for category, status, count in db.execute(
+        select(InventoryCounter.category, InventoryCounter.status, InventoryCounter.count)
+        .where(InventoryCounter.count != 0)
+        .order_by(InventoryCounter.category)
+    ):
+        entry = categories.setdefault(category, {
+            "category": category or None,
+            **{s.value: 0 for s in EquipmentStatus},
+            "total": 0,
+        })
+        entry[status.value] = count
+        entry["total"] += count
+    return list(categories.values())
@@ -0,0 +1,226 @@
+import hashlib
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
+
+from core.db import SessionLocal
+from models.event import Lead, LeadMatchBlock, LeadMatchKey
+
+DEFAULT_COUNTRY_CODE = "54"
+# Min-hashed name trigrams kept as keys per lead
+NAME_KEYS = 3
+# A key shared by more leads than this ("info@", a very common name) is not selective
+MAX_BLOCK_SIZE = 500
+INSERT_CHUNK_SIZE = 1000
+
+
+def normalize_text(value: str | None) -> str:
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(c for c in value if not unicodedata.combining(c)).lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", value).split())
+
+
+def normalize_phone(raw: str | None, country_code: str = DEFAULT_COUNTRY_CODE) -> str | None:
+    """E.164-style phone key; "011 15-1234-5678" and "+54 9 11 1234 5678" agree.
+
+    Argentine numbers drop the trunk "0", the local mobile "15" and the
+    international mobile "9", since they do not change who is called.
+    """
+    if not raw:
+        return None
+    digits = re.sub(r"\D", "", raw)
+    if raw.strip().startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif not (digits.startswith(country_code) and len(digits) > 11):
+        digits = country_code + digits.lstrip("0")
+    if digits.startswith("54"):
+        national = digits[2:]
+        if national.startswith("9") and len(national) == 11:
+            national = national[1:]
+        if len(national) == 12:
+            # Area codes are 2 to 4 digits long, followed by "15" for mobiles
+            for length in (2, 3, 4):
+                if national[length:length + 2] == "15":
+                    national = national[:length] + national[length + 2:]
+                    break
+        digits = "54" + national
+    if not 8 <= len(digits) <= 15:
+        return None
+    return "+" + digits
+
+
+def normalize_email(raw: str | None) -> tuple[str, str] | None:
+    local, _, domain = (raw or "").strip().lower().rpartition("@")
+    if not local or not domain:
+        return None
+    local = local.split("+")[0]
+    if domain in ("gmail.com", "googlemail.com"):
+        local, domain = local.replace(".", ""), "gmail.com"
+    return local, domain
+
+
+def name_trigrams(name: str | None) -> set[str]:
+    # Tokens sorted, so "Pérez Juan" and "juan perez" produce the same set
+    text = " ".join(sorted(normalize_text(name).split()))
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)} if text else set()
+
+
+def _stable_hash(value: str) -> str:
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+@dataclass
+class LeadProfile:
+    id: int
+    duplicate_of_id: int | None
+    phone: str | None
+    email: tuple[str, str] | None
+    trigrams: set[str]
+    event_day: str | None
+    keys: set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_row(cls, row) -> "LeadProfile":
+        profile = cls(
+            id=row.id,
+            duplicate_of_id=row.duplicate_of_id,
+            phone=normalize_phone(row.contact_phone),
+            email=normalize_email(row.contact_email),
+            trigrams=name_trigrams(row.contact_name),
+            event_day=row.event_date.date().isoformat() if row.event_date else None,
+        )
+        if profile.phone:
+            profile.keys.add(f"p:{profile.phone}")
+        if profile.email:
+            local, domain = profile.email
+            profile.keys.add(f"e:{local}@{domain}"[:200])
+            if len(local) >= 3:
+                profile.keys.add(f"l:{local}"[:200])
+        # Min-hash: similar names very likely share at least one of their lowest-hashing trigrams
+        for trigram in sorted(profile.trigrams, key=_stable_hash)[:NAME_KEYS]:
+            profile.keys.add(f"n:{trigram}")
+        return profile
+
+
+def name_similarity(a: LeadProfile, b: LeadProfile) -> float:
+    if not a.trigrams or not b.trigrams:
+        return 0.0
+    return len(a.trigrams & b.trigrams) / len(a.trigrams | b.trigrams)
+
+
+def duplicate_reason(a: LeadProfile, b: LeadProfile) -> str | None:
+    if a.phone and a.phone == b.phone:
+        return "phone"
+    if a.email and a.email == b.email:
+        return "email"
+    similarity = name_similarity(a, b)
+    if a.email and b.email and a.email[0] == b.email[0] and similarity >= 0.5:
+        return "email_local_part"
+    # Namesakes on the same date happen; different phones mean different people
+    phones_differ = a.phone and b.phone and a.phone != b.phone
+    if a.event_day and a.event_day == b.event_day and similarity >= 0.8 and not phones_differ:
+        return "name_and_event_date"
+    return None
+
+
+def _load_profiles(db: Session, lead_ids) -> dict[int, LeadProfile]:
+    rows = db.execute(
+        select(Lead.id, Lead.duplicate_of_id, Lead.contact_name, Lead.contact_email,
+               Lead.contact_phone, Lead.event_date)
+        .where(Lead.id.in_(lead_ids))
+    )
+    return {row.id: LeadProfile.from_row(row) for row in rows}
+
+
+def check_leads(db: Session, lead_ids: list[int]) -> tuple[dict[int, int], int]:
+    """Indexes the leads' blocking keys and links each to an earlier duplicate.
+
+    Only leads sharing a selective key are compared. Returns the new links
+    (lead id -> original lead id) and how many pairs were compared. Runs in
+    the caller's transaction.
+    """
+    profiles = _load_profiles(db, lead_ids)
+    key_rows = [{"key": key, "lead_id": p.id} for p in profiles.values() for key in p.keys]
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    added: Counter = Counter()
+    for start in range(0, len(key_rows), INSERT_CHUNK_SIZE):
+        added.update(db.execute(
+            dialect.insert(LeadMatchKey)
+            .values(key_rows[start:start + INSERT_CHUNK_SIZE])
+            .on_conflict_do_nothing()
+            .returning(LeadMatchKey.key)
+        ).scalars())
+    # Sorted, so concurrent batches lock block rows in the same order
+    blocks = [{"key": key, "size": count} for key, count in sorted(added.items())]
+    for start in range(0, len(blocks), INSERT_CHUNK_SIZE):
+        statement = dialect.insert(LeadMatchBlock).values(blocks[start:start + INSERT_CHUNK_SIZE])
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[LeadMatchBlock.key],
+            set_={"size": LeadMatchBlock.size + statement.excluded.size},
+        ))
+
+    mine, other = aliased(LeadMatchKey), aliased(LeadMatchKey)
+    candidates: dict[int, set[int]] = {}
+    # Earlier leads only: the oldest lead of a person stays the original
+    for lead_id, candidate_id in db.execute(
+        select(mine.lead_id, other.lead_id)
+        .join(LeadMatchBlock, and_(LeadMatchBlock.key == mine.key, LeadMatchBlock.size <= MAX_BLOCK_SIZE))
+        .join(other, and_(other.key == mine.key, other.lead_id < mine.lead_id))
+        .where(mine.lead_id.in_(lead_ids))
+        .distinct()
+    ):
+        candidates.setdefault(lead_id, set()).add(candidate_id)
+    missing = {c for ids in candidates.values() for c in ids} - profiles.keys()
+    if missing:
+        profiles.update(_load_profiles(db, missing))
+
+    links: dict[int, int] = {}
+    compared = 0
+    for lead_id in sorted(candidates):
+        for candidate_id in sorted(candidates[lead_id]):
+            compared += 1
+            if duplicate_reason(profiles[lead_id], profiles[candidate_id]):
+                candidate = profiles[candidate_id]
+                links[lead_id] = links.get(candidate_id) or candidate.duplicate_of_id or candidate_id
+                break
+
+    if links:
+        db.execute(update(Lead), [{"id": lead_id, "duplicate_of_id": original} for lead_id, original in links.items()])
+    db.execute(
+        update(Lead)
+        .where(Lead.id.in_(lead_ids))
+        .values(dedup_checked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return links, compared
+
+
+def dedupe_pending(batch_size: int = 1000) -> dict:
+    # Background job: leads not checked at creation (write-behind ingestion, imports)
+    checked = linked = 0
+    db = SessionLocal()
+    try:
+        while True:
+            lead_ids = db.execute(
+                select(Lead.id).where(Lead.dedup_checked_at.is_(None)).order_by(Lead.id).limit(batch_size)
+            ).scalars().all()
+            if not lead_ids:
+                break
+            links, _ = check_leads(db, lead_ids)
+            db.commit()
+            checked += len(lead_ids)
+            linked += len(links)
+    finally:
+        db.close()
+    if linked:
+        print(f"Lead dedup: {linked} duplicates among {checked} leads")
+    return {"checked": checked, "linked": linked}
@@ -0,0 +1,209 @@
+import fcntl
+import glob
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from core.config import settings
+from core.db import SessionLocal
+from models.event import Lead, LeadStatus
+from services.report_rollups import RollupDeltas, lead_contribution
+
+# Leads per multi-row INSERT statement
+INSERT_CHUNK_SIZE = 500
+
+
+class _Segment:
+    """One journal file, exclusively locked by the worker that owns it."""
+
+    def __init__(self, path: str, file):
+        self.path = path
+        self.file = file
+        self.entries: list[dict] = []
+
+    @classmethod
+    def create(cls, path: str) -> "_Segment":
+        file = open(path, "ab")
+        fcntl.flock(file, fcntl.LOCK_EX)
+        return cls(path, file)
+
+    @classmethod
+    def adopt(cls, path: str) -> "_Segment | None":
+        # Segments left behind by a worker that stopped; a live worker still holds its lock
+        file = open(path, "rb+")
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            return None
+        segment = cls(path, file)
+        for line in file:
+            try:
+                segment.entries.append(json.loads(line))
+            except ValueError:
+                pass # Torn last line from a crash mid-write; it was never acknowledged
+        return segment
+
+    def append(self, entry: dict, fsync: bool):
+        self.file.write(json.dumps(entry).encode() + b"\n")
+        self.file.flush()
+        if fsync:
+            os.fsync(self.file.fileno())
+        self.entries.append(entry)
+
+    def remove(self):
+        os.remove(self.path)
+        self.file.close()
+
+
+class LeadIngestQueue:
+    """Write-behind buffer for public lead submissions.
+
+    ``submit`` appends the validated lead to a local journal file and returns
+    a receipt; a writer thread moves journal segments into ``leads`` with one
+    multi-row INSERT each, every ``flush_seconds`` or once ``batch_size``
+    leads are waiting. The receipt is a unique column, so replaying a
+    segment after a crash never duplicates a lead.
+    """
+
+    def __init__(self, directory: str, flush_seconds: float, batch_size: int, fsync: bool = True):
+        self.directory = os.path.abspath(directory)
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.worker = uuid.uuid4().hex[:12]
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._active: _Segment | None = None
+        self._sealed: list[_Segment] = []
+        self._queued: set[str] = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _open_segment(self) -> _Segment:
+        self._sequence += 1
+        os.makedirs(self.directory, exist_ok=True)
+        return _Segment.create(os.path.join(self.directory, f"leads-{self.worker}-{self._sequence:06d}.jsonl"))
+
+    def submit(self, data: dict, source: str | None = None) -> str:
+        receipt = str(uuid.uuid4())
+        entry = {"receipt": receipt, "received_at": datetime.utcnow().isoformat(), "source": source, "lead": data}
+        with self._lock:
+            if self._active is None:
+                self._active = self._open_segment()
+            self._active.append(entry, self.fsync)
+            self._queued.add(receipt)
+            full = len(self._active.entries) >= self.batch_size
+        if full:
+            self._wake.set()
+        return receipt
+
+    def is_queued(self, receipt: str) -> bool:
+        return receipt in self._queued
+
+    def recover(self):
+        """Takes over the journal segments of workers that are gone."""
+        for path in sorted(glob.glob(os.path.join(self.directory, "leads-*.jsonl"))):
+            if any(path == s.path for s in self._sealed) or (self._active and path == self._active.path):
+                continue
+            segment = _Segment.adopt(path)
+            if segment is not None:
+                with self._lock:
+                    self._sealed.append(segment)
+
+    def flush(self) -> int:
+        """Writes every waiting lead; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                # New submissions go to a fresh segment while this one is written
+                if self._active is not None and self._active.entries:
+                    self._sealed.append(self._active)
+                    self._active = None
+                segments = list(self._sealed)
+            written = 0
+            for segment in segments:
+                if segment.entries:
+                    insert_leads(segment.entries)
+                    written += len(segment.entries)
+                # Only dropped once the rows are committed
+                segment.remove()
+                with self._lock:
+                    self._sealed.remove(segment)
+                    self._queued.difference_update(entry["receipt"] for entry in segment.entries)
+            return written
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.recover()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="lead-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.recover()
+                self.flush()
+            except Exception as e:
+                # The journal keeps everything; the next round retries
+                print(f"Lead ingestion flush failed: {e}")
+            if self._stop.is_set():
+                return
+
+
+def insert_leads(entries: list[dict]):
+    rows = [
+        dict(
+            entry["lead"],
+            event_date=datetime.fromisoformat(entry["lead"]["event_date"]) if entry["lead"].get("event_date") else None,
+            receipt=entry["receipt"],
+            created_at=datetime.fromisoformat(entry["received_at"]),
+            source=entry.get("source"),
+            status=LeadStatus.NEW,
+        )
+        for entry in entries
+    ]
+    db = SessionLocal()
+    try:
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        # Chunked to stay under the bind parameter limit; one transaction for the segment
+        deltas = RollupDeltas()
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            # RETURNING skips receipts already inserted by an earlier, interrupted flush
+            inserted = db.execute(
+                dialect.insert(Lead)
+                .values(rows[start:start + INSERT_CHUNK_SIZE])
+                .on_conflict_do_nothing(index_elements=[Lead.receipt])
+                .returning(Lead.created_at)
+            )
+            for created_at in inserted.scalars():
+                deltas.add(lead_contribution(created_at, LeadStatus.NEW))
+        deltas.apply(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+lead_ingest_queue = LeadIngestQueue(
+    settings.lead_ingest_dir,
+    settings.lead_ingest_flush_seconds,
+    settings.lead_ingest_batch_size,
+    settings.lead_ingest_fsync,
+)
@@ -0,0 +1,130 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import Integer, String, and_, cast, func, literal, literal_column, null, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from models.event import Lead, LeadStatus
+
+MAX_PAGE_SIZE = 200
+
+
+@dataclass
+class LeadFilters:
+    status: list[LeadStatus] | None = None
+    source: list[str] | None = None
+    event_type: list[str] | None = None
+    event_date_from: datetime | None = None
+    event_date_to: datetime | None = None
+    q: str | None = None
+
+
+def search_vector():
+    # Written exactly as ix_leads_search (GIN, see the migration) so Postgres uses the index
+    return func.to_tsvector(
+        literal_column("'spanish'::regconfig"),
+        func.coalesce(Lead.message, literal_column("''"))
+        .op("||")(literal_column("' '"))
+        .op("||")(func.coalesce(Lead.interested_services, literal_column("''"))),
+    )
+
+
+def text_condition(db: Session, q: str):
+    if db.get_bind().dialect.name == "postgresql":
+        return search_vector().op("@@")(func.websearch_to_tsquery(literal_column("'spanish'::regconfig"), q))
+    # Other databases (tests, local sqlite): every word must appear somewhere
+    return and_(*[
+        or_(Lead.message.ilike(f"%{word}%"), Lead.interested_services.ilike(f"%{word}%"))
+        for word in q.split()
+    ])
+
+
+def filter_conditions(db: Session, filters: LeadFilters, skip: str | None = None) -> list:
+    """WHERE clauses for the filters; ``skip`` leaves one out, for its own facet."""
+    conditions = []
+    if filters.status and skip != "status":
+        conditions.append(Lead.status.in_(filters.status))
+    if filters.source and skip != "source":
+        conditions.append(Lead.source.in_(filters.source))
+    if filters.event_type:
+        conditions.append(Lead.event_type.in_(filters.event_type))
+    if filters.event_date_from:
+        conditions.append(Lead.event_date >= filters.event_date_from)
+    if filters.event_date_to:
+        conditions.append(Lead.event_date < filters.event_date_to)
+    if filters.q and filters.q.strip():
+        conditions.append(text_condition(db, filters.q.strip()))
+    return conditions
+
+
+def encode_cursor(lead_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": lead_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _facet_counts(db: Session, filters: LeadFilters) -> list:
+    """Counts per status and per source as rows of the search union.
+
+    Each facet ignores its own filter, so picking one status still shows
+    how many leads the other statuses would give.
+    """
+    no_lead = cast(null(), Integer).label("lead_id")
+    return [
+        # Enum names as text, so every branch of the union shares a column type
+        select(literal("status").label("facet"), cast(Lead.status, String).label("value"),
+               func.count().label("count"), no_lead)
+        .where(*filter_conditions(db, filters, skip="status"))
+        .group_by(Lead.status),
+        select(literal("source").label("facet"), Lead.source.label("value"), func.count().label("count"), no_lead)
+        .where(*filter_conditions(db, filters, skip="source"))
+        .group_by(Lead.source),
+    ]
+
+
+def search_leads(db: Session, filters: LeadFilters, cursor: str | None = None, limit: int = 50,
+                 facets: bool = False) -> tuple[list[Lead], str | None, dict[str, dict[str, int]] | None]:
+    """Newest first, paged by id; the cursor is the last id seen, never an OFFSET.
+
+    With ``facets`` the status and source counts come back from the same
+    statement: the page ids and the counts are one UNION ALL, joined back
+    to the leads, so the whole search is a single round trip.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    page = (
+        select(literal("lead").label("facet"), cast(null(), String).label("value"),
+               cast(null(), Integer).label("count"), Lead.id.label("lead_id"))
+        .where(*filter_conditions(db, filters))
+    )
+    if cursor:
+        page = page.where(Lead.id < decode_cursor(cursor))
+    # One extra row tells whether there is a next page
+    page = page.order_by(Lead.id.desc()).limit(limit + 1).subquery()
+    results = union_all(select(page), *(_facet_counts(db, filters) if facets else [])).subquery()
+    rows = db.execute(
+        select(Lead, results.c.facet, results.c.value, results.c.count)
+        .select_from(results)
+        .outerjoin(Lead, Lead.id == results.c.lead_id)
+        .order_by(results.c.lead_id.desc())
+    )
+
+    leads: list[Lead] = []
+    counts: dict[str, dict[str, int]] = {"status": {}, "source": {}}
+    for lead, facet, value, count in rows:
+        if facet == "lead":
+            leads.append(lead)
+            continue
+        if facet == "status":
+            value = LeadStatus[value].value
+        counts[facet][value if value is not None else ""] = count
+    next_cursor = None
+    if len(leads) > limit:
+        leads, next_cursor = leads[:limit], encode_cursor(leads[limit - 1].id)
+    return leads, next_cursor, counts if facets else None
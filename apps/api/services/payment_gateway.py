@@ -0,0 +1,175 @@
+import threading
+import time
+import uuid
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from core.config import settings
+
+RETRY_ON_STATUS = (429, 500, 502, 503, 504)
+
+
+class PaymentGatewayError(Exception):
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class GatewayUnavailableError(PaymentGatewayError):
+    # Raised without touching the network while the circuit breaker is open
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """Raises while the circuit is open; returns True for the half-open trial call."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise GatewayUnavailableError("Mercado Pago circuit is open")
+                self.state = self.HALF_OPEN
+            # Half-open: let a single trial call through, fail fast for the rest
+            if self._trial_in_flight:
+                raise GatewayUnavailableError("Mercado Pago circuit is half-open")
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def end_trial(self):
+        # Whatever happened to the trial, the next call may try again
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class MercadoPagoClient:
+    """Thin Mercado Pago REST client over a pooled keep-alive session."""
+
+    def __init__(
+        self,
+        access_token: str,
+        base_url: str = "https://api.mercadopago.com",
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        max_retries: int = 2,
+        pool_size: int = 10,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+
+        # POSTs are retried too: every one carries an X-Idempotency-Key that
+        # urllib3 resends unchanged, so MP deduplicates them on its side.
+        retry = Retry(
+            total=max_retries,
+            status_forcelist=RETRY_ON_STATUS,
+            allowed_methods=frozenset({"GET", "POST"}),
+            backoff_factor=0.2,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+        })
+
+    def _request(self, method: str, path: str, timeout: float | tuple | None = None, **kwargs) -> dict:
+        trial = self.breaker.before_call()
+        try:
+            return self._send(method, path, timeout, **kwargs)
+        finally:
+            # An exception other than the ones recorded below must not leave
+            # the breaker half-open with its only trial slot taken forever
+            if trial:
+                self.breaker.end_trial()
+
+    def _send(self, method: str, path: str, timeout: float | tuple | None, **kwargs) -> dict:
+        try:
+            response = self.session.request(
+                method, f"{self.base_url}{path}", timeout=timeout or self.timeout, **kwargs
+            )
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            raise PaymentGatewayError(f"Mercado Pago request failed: {e}") from e
+
+        if response.status_code in RETRY_ON_STATUS:
+            self.breaker.record_failure()
+            raise PaymentGatewayError(
+                f"Mercado Pago returned {response.status_code}", status_code=response.status_code
+            )
+        # Any other answer means MP is up, even if it rejected this request
+        self.breaker.record_success()
+        if response.status_code >= 400:
+            raise PaymentGatewayError(
+                f"Mercado Pago returned {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code,
+            )
+        try:
+            return response.json()
+        except ValueError as e:
+            raise PaymentGatewayError("Invalid JSON from Mercado Pago", response.status_code) from e
+
+    def create_preference(self, preference: dict, idempotency_key: str | None = None,
+                          timeout: float | None = None) -> dict:
+        headers = {"X-Idempotency-Key": idempotency_key or str(uuid.uuid4())}
+        return self._request("POST", "/checkout/preferences", json=preference, headers=headers, timeout=timeout)
+
+    def get_payment(self, payment_id: str | int, timeout: float | None = None) -> dict:
+        return self._request("GET", f"/v1/payments/{payment_id}", timeout=timeout)
+
+    def search_payments(self, params: dict, timeout: float | None = None) -> dict:
+        return self._request("GET", "/v1/payments/search", params=params, timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
+
+@lru_cache
+def get_payment_gateway() -> MercadoPagoClient:
+    # One client per worker process so the connection pool is actually shared
+    return MercadoPagoClient(
+        access_token=settings.mp_access_token,
+        base_url=settings.mp_api_base_url,
+        connect_timeout=settings.mp_connect_timeout_seconds,
+        read_timeout=settings.mp_read_timeout_seconds,
+        max_retries=settings.mp_max_retries,
+        pool_size=settings.mp_pool_size,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.mp_breaker_failure_threshold,
+            reset_timeout=settings.mp_breaker_reset_seconds,
+        ),
+    )
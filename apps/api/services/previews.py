@@ -0,0 +1,225 @@
+import asyncio
+import io
+import mimetypes
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.db import SessionLocal
+from core.storage import MB, StorageBackend, get_storage, store_fileobj
+from models.document import Blob, PreviewStatus
+
+PREVIEW_CONTENT_TYPE = "image/jpeg"
+# A job stuck in PROCESSING this long (worker died) is picked up again
+STALE_AFTER = timedelta(minutes=15)
+
+
+class PreviewError(Exception):
+    pass
+
+
+class PreviewUnavailable(PreviewError):
+    """The optional imaging libraries are not installed."""
+
+
+# --- Runs inside the worker processes -------------------------------------
+
+def _thumbnail(image, max_px: int) -> bytes:
+    from PIL import ImageOps
+
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_px, max_px))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=80, optimize=True)
+    return out.getvalue()
+
+
+def render_preview(data: bytes, kind: str, max_px: int) -> bytes:
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise PreviewUnavailable("Previews need the optional Pillow package") from e
+    try:
+        if kind == "image":
+            Image.MAX_IMAGE_PIXELS = 50_000_000 # Refuse decompression bombs
+            return _thumbnail(Image.open(io.BytesIO(data)), max_px)
+        try:
+            import pypdfium2
+        except ImportError as e:
+            raise PreviewUnavailable("PDF previews need the optional pypdfium2 package") from e
+        pdf = pypdfium2.PdfDocument(data)
+        try:
+            page = pdf[0]
+            # Rasterize close to the target size instead of at full resolution
+            scale = max_px / max(page.get_size())
+            return _thumbnail(page.render(scale=max(scale, 0.1)).to_pil(), max_px)
+        finally:
+            pdf.close()
+    except PreviewError:
+        raise
+    except Exception as e:
+        raise PreviewError(f"Could not render {kind} preview: {e}") from e
+
+
+# --- Runs in the API process ----------------------------------------------
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+# Caps the files waiting on the pool, each held in memory
+_in_flight: asyncio.Semaphore | None = None
+
+
+def get_preview_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.preview_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_preview_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def in_flight_limit() -> asyncio.Semaphore:
+    global _in_flight
+    if _in_flight is None:
+        _in_flight = asyncio.Semaphore(settings.preview_workers * 2)
+    return _in_flight
+
+
+def preview_kind(content_type: str | None, key: str) -> str | None:
+    content_type = (content_type or mimetypes.guess_type(key)[0] or "").split(";")[0].strip()
+    if content_type.startswith("image/") and content_type != "image/svg+xml":
+        return "image"
+    if content_type == "application/pdf":
+        return "pdf"
+    return None
+
+
+def preview_key(storage_key: str) -> str:
+    # Stored alongside the original; collect_garbage removes both
+    return f"{storage_key}.preview.jpg"
+
+
+def claim_preview(db: Session, sha256: str) -> Blob | None:
+    # Only one worker builds a given preview; the UPDATE decides which
+    now = datetime.utcnow()
+    row = db.execute(
+        update(Blob)
+        .where(
+            Blob.sha256 == sha256,
+            or_(
+                Blob.preview_status == PreviewStatus.PENDING,
+                (Blob.preview_status == PreviewStatus.PROCESSING) & (Blob.preview_updated_at < now - STALE_AFTER),
+            ),
+        )
+        .values(preview_status=PreviewStatus.PROCESSING, preview_updated_at=now)
+        .returning(Blob.storage_key, Blob.content_type)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.commit()
+    if row is None:
+        return None
+    return Blob(sha256=sha256, storage_key=row.storage_key, content_type=row.content_type)
+
+
+def finish_preview(db: Session, sha256: str, status: PreviewStatus, key: str | None = None):
+    db.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256)
+        .values(preview_status=status, preview_key=key, preview_updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def read_object(storage: StorageBackend, key: str) -> bytes:
+    return b"".join(storage.open(key))
+
+
+async def build_preview(sha256: str) -> PreviewStatus | None:
+    """Builds and stores the preview for one blob; scheduled after each upload."""
+    storage = get_storage()
+    db = SessionLocal()
+    try:
+        blob = await run_in_threadpool(claim_preview, db, sha256)
+        if blob is None:
+            return None # Already done or being built elsewhere
+        kind = preview_kind(blob.content_type, blob.storage_key)
+        key = None
+        if kind is None:
+            status = PreviewStatus.UNSUPPORTED
+        else:
+            try:
+                async with in_flight_limit():
+                    data = await run_in_threadpool(read_object, storage, blob.storage_key)
+                    output = await asyncio.wrap_future(
+                        get_preview_pool().submit(render_preview, data, kind, settings.preview_max_px)
+                    )
+                key = preview_key(blob.storage_key)
+                await run_in_threadpool(
+                    store_fileobj, storage, key, io.BytesIO(output), PREVIEW_CONTENT_TYPE,
+                    settings.document_max_upload_mb * MB, settings.storage_part_size_mb * MB,
+                )
+                status = PreviewStatus.READY
+            except PreviewUnavailable as e:
+                print(f"Preview for blob {sha256} skipped: {e}")
+                status = PreviewStatus.UNSUPPORTED
+            except Exception as e:
+                print(f"Preview for blob {sha256} failed: {e}")
+                status = PreviewStatus.FAILED
+        await run_in_threadpool(finish_preview, db, sha256, status, key if status == PreviewStatus.READY else None)
+        return status
+    finally:
+        db.close()
+
+
+def pending_previews(db: Session, limit: int) -> list[str]:
+    stale = datetime.utcnow() - STALE_AFTER
+    return db.execute(
+        select(Blob.sha256)
+        .where(
+            Blob.ref_count > 0,
+            or_(
+                Blob.preview_status == PreviewStatus.PENDING,
+                (Blob.preview_status == PreviewStatus.PROCESSING) & (Blob.preview_updated_at < stale),
+            ),
+        )
+        .order_by(Blob.created_at)
+        .limit(limit)
+    ).scalars().all()
+
+
+async def preview_sweep_loop(batch_size: int = 50):
+    # Catches previews whose upload-triggered job never ran (restart, crash) and existing files
+    while True:
+        await asyncio.sleep(settings.preview_sweep_seconds)
+        db = SessionLocal()
+        try:
+            pending = await run_in_threadpool(pending_previews, db, batch_size)
+        except Exception as e:
+            print(f"Preview sweep failed: {e}")
+            continue
+        finally:
+            db.close()
+        for sha256 in pending:
+            try:
+                await build_preview(sha256)
+            except Exception as e:
+                print(f"Preview for blob {sha256} failed: {e}")
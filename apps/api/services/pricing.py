@@ -0,0 +1,246 @@
+import ast
+import operator
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Iterable
+
+from sqlalchemy.orm import Session
+
+from models.catalog import AddOn, Package, PricingRule
+
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTH_NAMES = ["january", "february", "march", "april", "may", "june", "july",
+               "august", "september", "october", "november", "december"]
+
+# Names a condition may reference; anything else is rejected at compile time
+CONTEXT_VARIABLES = {
+    "date", "day_of_week", "day", "month", "month_name", "year", "hour", "is_weekend",
+    "days_until_event", "package_id", "addon_ids", "num_guests", "event_type",
+    "duration_hours", "location",
+}
+
+MAX_CONDITION_LENGTH = 500
+
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+Predicate = Callable[[dict], Any]
+
+
+class PricingRuleError(ValueError):
+    pass
+
+
+def _literal(node: ast.AST):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float, bool, type(None))):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+        value = node.operand.value
+        # -"a" or -None would raise TypeError (a 500), and -True is just -1 in disguise
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise PricingRuleError(f"Cannot negate {value!r}")
+        return -value
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return frozenset(_literal(element) for element in node.elts)
+    raise PricingRuleError(f"Unsupported expression: {type(node).__name__}")
+
+
+def _compile_node(node: ast.AST) -> Predicate:
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_node(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return lambda ctx: all(part(ctx) for part in parts)
+        return lambda ctx: any(part(ctx) for part in parts)
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        operand = _compile_node(node.operand)
+        return lambda ctx: not operand(ctx)
+
+    if isinstance(node, ast.Compare):
+        operands = [_compile_node(node.left)] + [_compile_node(c) for c in node.comparators]
+        ops = []
+        for op in node.ops:
+            if type(op) not in _COMPARISONS:
+                raise PricingRuleError(f"Unsupported operator: {type(op).__name__}")
+            ops.append(_COMPARISONS[type(op)])
+
+        def compare(ctx):
+            left = operands[0](ctx)
+            for op, right_operand in zip(ops, operands[1:]):
+                right = right_operand(ctx)
+                if not op(left, right):
+                    return False
+                left = right
+            return True
+        return compare
+
+    if isinstance(node, ast.Name):
+        if node.id in ("true", "false"):
+            value = node.id == "true"
+            return lambda ctx: value
+        if node.id not in CONTEXT_VARIABLES:
+            raise PricingRuleError(f"Unknown variable: {node.id}")
+        name = node.id
+        return lambda ctx: ctx.get(name)
+
+    value = _literal(node)
+    return lambda ctx: value
+
+
+def compile_condition(condition: str | None) -> Predicate:
+    """Parses a rule condition once into a predicate over a pricing context.
+
+    Conditions use a small Python-like grammar: comparisons (including chained
+    ones and ``in``), ``and``/``or``/``not``, parentheses, string and number
+    literals and list literals. Nothing is ever passed to ``eval``.
+    """
+    if not condition or not condition.strip():
+        return lambda ctx: True
+    if len(condition) > MAX_CONDITION_LENGTH:
+        raise PricingRuleError("Condition is too long")
+    try:
+        tree = ast.parse(condition.strip(), mode="eval")
+    except SyntaxError as e:
+        raise PricingRuleError(f"Invalid condition: {e.msg}") from e
+    predicate = _compile_node(tree.body)
+
+    def safe_predicate(ctx: dict) -> bool:
+        try:
+            return bool(predicate(ctx))
+        except TypeError:
+            # e.g. num_guests > 100 when num_guests is unknown
+            return False
+    return safe_predicate
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    id: int
+    version: int
+    name: str
+    predicate: Predicate
+    adjustment_percentage: float
+    adjustment_fixed_ars: int
+
+
+_compiled_rules: dict[tuple[int, int], CompiledRule] = {}
+_compiled_lock = threading.Lock()
+
+
+def compile_rule(rule: PricingRule) -> CompiledRule:
+    key = (rule.id, rule.version)
+    compiled = _compiled_rules.get(key)
+    if compiled is None:
+        compiled = CompiledRule(
+            id=rule.id,
+            version=rule.version,
+            name=rule.name,
+            predicate=compile_condition(rule.condition),
+            adjustment_percentage=rule.adjustment_percentage or 0.0,
+            adjustment_fixed_ars=rule.adjustment_fixed_ars or 0,
+        )
+        with _compiled_lock:
+            # Older versions of this rule can no longer be requested
+            for stale in [k for k in _compiled_rules if k[0] == rule.id]:
+                del _compiled_rules[stale]
+            _compiled_rules[key] = compiled
+    return compiled
+
+
+def pricing_context(
+    event_date: datetime | date,
+    package_id: int | None = None,
+    addon_ids: Iterable[int] = (),
+    num_guests: int | None = None,
+    event_type: str | None = None,
+    duration_hours: float | None = None,
+    location: str | None = None,
+    today: date | None = None,
+) -> dict:
+    day = event_date.date() if isinstance(event_date, datetime) else event_date
+    return {
+        "date": day.isoformat(),
+        "day_of_week": DAY_NAMES[day.weekday()],
+        "day": day.day,
+        "month": day.month,
+        "month_name": MONTH_NAMES[day.month - 1],
+        "year": day.year,
+        "hour": event_date.hour if isinstance(event_date, datetime) else None,
+        "is_weekend": day.weekday() >= 5,
+        "days_until_event": (day - (today or date.today())).days,
+        "package_id": package_id,
+        "addon_ids": frozenset(addon_ids),
+        "num_guests": num_guests,
+        "event_type": event_type.lower() if event_type else None,
+        "duration_hours": duration_hours,
+        "location": location,
+    }
+
+
+class PricingEngine:
+    """Prices booking contexts against a preloaded catalog and compiled rules."""
+
+    def __init__(self, packages: dict[int, Package], addons: dict[int, AddOn], rules: list[CompiledRule]):
+        self.packages = packages
+        self.addons = addons
+        self.rules = rules
+
+    def subtotal(self, package_id: int | None, addon_ids: Iterable[int]) -> int:
+        subtotal = 0
+        if package_id is not None:
+            if package_id not in self.packages:
+                raise PricingRuleError(f"Unknown package {package_id}")
+            subtotal += self.packages[package_id].base_price_ars
+        for addon_id in addon_ids:
+            if addon_id not in self.addons:
+                raise PricingRuleError(f"Unknown add-on {addon_id}")
+            subtotal += self.addons[addon_id].price_ars
+        return subtotal
+
+    def price(self, context: dict, subtotal: int | None = None) -> dict:
+        if subtotal is None:
+            subtotal = self.subtotal(context["package_id"], context["addon_ids"])
+        total = float(subtotal)
+        applied = []
+        for rule in self.rules:
+            if rule.predicate(context):
+                adjustment = subtotal * rule.adjustment_percentage / 100 + rule.adjustment_fixed_ars
+                total += adjustment
+                applied.append({"rule_id": rule.id, "name": rule.name, "adjustment_ars": round(adjustment)})
+        return {
+            "date": context["date"],
+            "subtotal_ars": subtotal,
+            "total_ars": max(0, round(total)),
+            "applied_rules": applied,
+        }
+
+    def price_many(self, contexts: Iterable[dict]) -> list[dict]:
+        subtotals: dict[tuple, int] = {}
+        results = []
+        for context in contexts:
+            key = (context["package_id"], context["addon_ids"])
+            if key not in subtotals:
+                subtotals[key] = self.subtotal(*key)
+            results.append(self.price(context, subtotals[key]))
+        return results
+
+
+def load_pricing_engine(db: Session) -> PricingEngine:
+    packages = {package.id: package for package in db.query(Package).all()}
+    addons = {addon.id: addon for addon in db.query(AddOn).all()}
+    rules = []
+    for rule in db.query(PricingRule).order_by(PricingRule.id).all():
+        try:
+            rules.append(compile_rule(rule))
+        except PricingRuleError as e:
+            print(f"Skipping pricing rule {rule.id} ({rule.name}): {e}")
+    return PricingEngine(packages, addons, rules)
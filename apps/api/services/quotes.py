@@ -0,0 +1,192 @@
+from datetime import date, datetime
+from typing import Iterable
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.db import SessionLocal
+from models.event import Lead, LeadStatus, Quote
+from services.app_settings import settings_cache
+from services.catalog_cache import catalog_cache
+from services.payment_gateway import MercadoPagoClient, PaymentGatewayError
+from services.pricing import PricingEngine, PricingRuleError, pricing_context
+from services.report_rollups import RollupDeltas, lead_contribution
+
+# Leads that may (still) receive a quote
+QUOTABLE_STATUSES = [LeadStatus.NEW, LeadStatus.QUOTED]
+
+# Per-lead outcomes reported by quote_leads
+QUOTED = "quoted"
+NOT_FOUND = "not_found"
+NOT_QUOTABLE = "not_quotable"
+NO_PACKAGE = "no_package"
+PRICING_ERROR = "pricing_error"
+
+
+def _mentioned(items: Iterable, text: str) -> list:
+    # Longest names first, so "Premium Plus" wins over "Premium"
+    found = []
+    for item in sorted(items, key=lambda i: len(i.name), reverse=True):
+        name = item.name.lower()
+        if name and name in text:
+            found.append(item)
+            text = text.replace(name, "")
+    return found
+
+
+def select_items(engine: PricingEngine, lead: Lead, package_id: int | None,
+                 addon_ids: list[int] | None) -> tuple[int | None, list[int]]:
+    """Picks what to quote: explicit ids win, otherwise names mentioned by the lead."""
+    text = (lead.interested_services or "").lower()
+    if package_id is None:
+        packages = _mentioned(engine.packages.values(), text)
+        package_id = packages[0].id if packages else settings.quote_default_package_id
+    if addon_ids is None:
+        addon_ids = sorted(addon.id for addon in _mentioned(engine.addons.values(), text))
+    return package_id, addon_ids
+
+
+def quote_leads(
+    db: Session,
+    lead_ids: list[int],
+    package_id: int | None = None,
+    addon_ids: list[int] | None = None,
+) -> list[dict]:
+    """Prices many leads against the cached catalog and inserts their quotes at once.
+
+    Leads are claimed with a single conditional UPDATE to QUOTED, so two
+    concurrent runs cannot quote the same NEW lead twice. Payment links are
+    not created here; see :func:`ensure_payment_links`.
+    """
+    leads = {lead.id: lead for lead in db.query(Lead).filter(Lead.id.in_(lead_ids))}
+    engine = catalog_cache.get_pricing_engine(db)
+    today = date.today()
+
+    results: dict[int, dict] = {}
+    priced: dict[int, dict] = {}
+    for lead_id in lead_ids:
+        lead = leads.get(lead_id)
+        if lead is None:
+            results[lead_id] = {"lead_id": lead_id, "result": NOT_FOUND}
+            continue
+        if lead.status not in QUOTABLE_STATUSES:
+            results[lead_id] = {"lead_id": lead_id, "result": NOT_QUOTABLE, "detail": lead.status.value}
+            continue
+        chosen_package, chosen_addons = select_items(engine, lead, package_id, addon_ids)
+        if chosen_package is None:
+            results[lead_id] = {"lead_id": lead_id, "result": NO_PACKAGE}
+            continue
+        context = pricing_context(
+            lead.event_date or today,
+            package_id=chosen_package,
+            addon_ids=chosen_addons,
+            num_guests=lead.num_guests,
+            event_type=lead.event_type,
+            location=lead.event_location,
+            today=today,
+        )
+        try:
+            price = engine.price(context)
+        except PricingRuleError as e:
+            results[lead_id] = {"lead_id": lead_id, "result": PRICING_ERROR, "detail": str(e)}
+            continue
+        priced[lead_id] = {
+            "lead_id": lead_id,
+            "package_id": chosen_package,
+            "addon_ids": chosen_addons,
+            "price_ars": price["total_ars"] * 100, # Quotes are stored in cents
+            "created_at": datetime.utcnow(),
+        }
+
+    if priced:
+        # One UPDATE per previous status, so the report rollups know what moved
+        claimed = set()
+        deltas = RollupDeltas()
+        for status in QUOTABLE_STATUSES:
+            rows = db.execute(
+                update(Lead)
+                .where(Lead.id.in_([lead_id for lead_id in priced if lead_id not in claimed]), Lead.status == status)
+                .values(status=LeadStatus.QUOTED)
+                .returning(Lead.id, Lead.created_at)
+                .execution_options(synchronize_session=False)
+            )
+            for lead_id, created_at in rows:
+                claimed.add(lead_id)
+                deltas.change(lead_contribution(created_at, status), lead_contribution(created_at, LeadStatus.QUOTED))
+        deltas.apply(db)
+        for lead_id in set(priced) - claimed:
+            results[lead_id] = {"lead_id": lead_id, "result": NOT_QUOTABLE, "detail": "changed concurrently"}
+        rows = [priced[lead_id] for lead_id in priced if lead_id in claimed]
+        if rows:
+            inserted = db.execute(insert(Quote).returning(Quote.id, Quote.lead_id), rows)
+            for quote_id, lead_id in inserted:
+                results[lead_id] = dict(priced[lead_id], result=QUOTED, quote_id=quote_id)
+    db.commit()
+    return [results[lead_id] for lead_id in lead_ids]
+
+
+def quote_new_leads(batch_size: int = 200) -> dict:
+    # Background job: quotes every NEW lead, one batch per transaction
+    counts: dict[str, int] = {}
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            lead_ids = list(db.scalars(
+                select(Lead.id)
+                .where(Lead.status == LeadStatus.NEW, Lead.id > last_id)
+                .order_by(Lead.id)
+                .limit(batch_size)
+            ))
+            if not lead_ids:
+                break
+            for result in quote_leads(db, lead_ids):
+                counts[result["result"]] = counts.get(result["result"], 0) + 1
+            last_id = lead_ids[-1]
+    finally:
+        db.close()
+    if counts:
+        print(f"Quoted new leads: {counts}")
+    return counts
+
+
+def _preference(quote: Quote, lead: Lead | None, title: str, amount_cents: int, kind: str) -> dict:
+    preference = {
+        "items": [{"title": title, "quantity": 1, "unit_price": amount_cents / 100}],
+        # Not a Payment id, so the webhook leaves it to an admin to turn into a booking
+        "external_reference": f"quote-{quote.id}-{kind}",
+    }
+    if lead is not None:
+        preference["payer"] = {"email": lead.contact_email}
+    return preference
+
+
+def ensure_payment_links(db: Session, gateway: MercadoPagoClient, quote: Quote) -> Quote:
+    """Creates the quote's deposit and total checkouts the first time it is viewed.
+
+    Gateway failures are logged and the quote is returned without links, so a
+    later view tries again.
+    """
+    if quote.deposit_payment_link and quote.total_payment_link:
+        return quote
+    lead = db.get(Lead, quote.lead_id) if quote.lead_id else None
+    deposit_cents = int(round(quote.price_ars * settings_cache.get("default_deposit_percentage")))
+    try:
+        # Idempotency keys include the price, so concurrent views get the same preference
+        deposit = gateway.create_preference(
+            _preference(quote, lead, f"Deposit - quote #{quote.id}", deposit_cents, "deposit"),
+            idempotency_key=f"quote-{quote.id}-deposit-{deposit_cents}",
+        )
+        total = gateway.create_preference(
+            _preference(quote, lead, f"Quote #{quote.id}", quote.price_ars, "total"),
+            idempotency_key=f"quote-{quote.id}-total-{quote.price_ars}",
+        )
+    except PaymentGatewayError as e:
+        print(f"Payment links for quote {quote.id} not created: {e}")
+        return quote
+    quote.deposit_payment_link = deposit["init_point"]
+    quote.total_payment_link = total["init_point"]
+    db.commit()
+    db.refresh(quote)
+    return quote
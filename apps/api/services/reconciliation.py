@@ -0,0 +1,287 @@
+import asyncio
+import csv
+import itertools
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, TextIO
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, joinedload
+
+from core.config import settings
+from core.db import SessionLocal
+from models.event import Booking, BookingStatus, Payment, PaymentStatus
+from services.availability import SlotConflictError, index_entries, publish_reserved, reserve_slots
+from services.booking_transitions import bookings_with_live_payments
+from services.checkout import release_checkout
+from services.payment_gateway import MercadoPagoClient, PaymentGatewayError, get_payment_gateway
+from services.report_rollups import RollupDeltas, booking_contribution, payment_contribution
+
+MP_STATUS_MAP = {
+    "approved": PaymentStatus.APPROVED,
+    "rejected": PaymentStatus.REJECTED,
+    "cancelled": PaymentStatus.REJECTED,
+    "pending": PaymentStatus.PENDING,
+    "in_process": PaymentStatus.PENDING,
+}
+# When MP holds several attempts for one of our payments, the strongest wins
+STATUS_PRECEDENCE = {PaymentStatus.PENDING: 0, PaymentStatus.REJECTED: 1, PaymentStatus.APPROVED: 2}
+
+REPORT_FIELDS = ["kind", "payment_id", "mp_payment_id", "local_status", "remote_status", "detail"]
+
+
+def iter_remote_payments(
+    gateway: MercadoPagoClient,
+    since: datetime,
+    until: datetime,
+    window: timedelta = timedelta(days=1),
+    page_size: int = 100,
+) -> Iterator[list[dict]]:
+    """Yields one list of MP payments per date window, paging through search."""
+    window_start = since
+    while window_start < until:
+        window_end = min(window_start + window, until)
+        results: list[dict] = []
+        for offset in itertools.count(0, page_size):
+            page = gateway.search_payments({
+                "range": "date_created",
+                "begin_date": window_start.isoformat(),
+                "end_date": window_end.isoformat(),
+                "sort": "date_created",
+                "criteria": "asc",
+                "offset": offset,
+                "limit": page_size,
+            })
+            results.extend(page.get("results", []))
+            if offset + page_size >= page.get("paging", {}).get("total", 0):
+                break
+        yield results
+        window_start = window_end
+
+
+def dedupe(windows: Iterable[list[dict]]) -> Iterator[dict]:
+    # MP's date range is inclusive on both ends, so only adjacent windows can
+    # repeat a payment: remembering the previous window's ids is enough and
+    # keeps memory bounded by the window size instead of the whole month.
+    previous: set = set()
+    for results in windows:
+        current = set()
+        for payment in results:
+            if payment["id"] in previous or payment["id"] in current:
+                continue
+            current.add(payment["id"])
+            yield payment
+        previous = current
+
+
+def batched(items: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class ReconciliationReport:
+    """Streams mismatch rows to a CSV writer and keeps only summary counters."""
+
+    def __init__(self, out: TextIO | None = None):
+        self.counts: Counter = Counter()
+        self._writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS) if out else None
+        if self._writer:
+            self._writer.writeheader()
+
+    def add(self, kind: str, payment_id=None, mp_payment_id=None, local_status=None,
+            remote_status=None, detail: str = ""):
+        self.counts[kind] += 1
+        if self._writer:
+            self._writer.writerow({
+                "kind": kind,
+                "payment_id": payment_id,
+                "mp_payment_id": mp_payment_id,
+                "local_status": getattr(local_status, "value", local_status),
+                "remote_status": getattr(remote_status, "value", remote_status),
+                "detail": detail,
+            })
+
+    def summary(self) -> dict:
+        return dict(self.counts)
+
+
+def reconcile_batch(db: Session, batch: list[dict], report: ReconciliationReport, dry_run: bool = False):
+    report.counts["remote_payments"] += len(batch)
+
+    # Collapse several MP attempts for the same reference into one target status
+    remote: dict[int, tuple[PaymentStatus, dict]] = {}
+    for mp_payment in batch:
+        reference = str(mp_payment.get("external_reference") or "")
+        status = MP_STATUS_MAP.get(mp_payment.get("status"))
+        if not reference.isdigit():
+            report.add("unknown_reference", mp_payment_id=mp_payment["id"],
+                       remote_status=mp_payment.get("status"), detail=reference)
+            continue
+        if status is None:
+            report.add("unhandled_status", payment_id=int(reference), mp_payment_id=mp_payment["id"],
+                       remote_status=mp_payment.get("status"))
+            continue
+        current = remote.get(int(reference))
+        if current is None or STATUS_PRECEDENCE[status] > STATUS_PRECEDENCE[current[0]]:
+            remote[int(reference)] = (status, mp_payment)
+
+    if not remote:
+        return
+
+    local = {
+        row.id: row
+        for row in db.execute(
+            select(Payment.id, Payment.status, Payment.amount_ars, Payment.booking_id, Payment.checkout_key)
+            .where(Payment.id.in_(remote.keys()))
+        )
+    }
+
+    to_update: dict[PaymentStatus, list[int]] = {status: [] for status in STATUS_PRECEDENCE}
+    # Booking id -> (payment id, MP payment id) of the approval that should confirm it
+    bookings_to_confirm: dict[int, tuple[int, int]] = {}
+    bookings_to_cancel: list[int] = []
+    for payment_id, (status, mp_payment) in remote.items():
+        row = local.get(payment_id)
+        if row is None:
+            report.add("unknown_reference", payment_id=payment_id, mp_payment_id=mp_payment["id"],
+                       remote_status=status, detail="no local payment")
+            continue
+        amount = mp_payment.get("transaction_amount")
+        if amount is not None and round(amount * 100) != row.amount_ars:
+            report.add("amount_mismatch", payment_id, mp_payment["id"], row.status, status,
+                       detail=f"local={row.amount_ars} remote={round(amount * 100)}")
+        if row.status == status:
+            continue
+        if STATUS_PRECEDENCE[status] < STATUS_PRECEDENCE[row.status]:
+            # Never downgrade what a webhook already settled; flag it instead
+            report.add("stale_remote_status", payment_id, mp_payment["id"], row.status, status)
+            continue
+        report.add("status_updated", payment_id, mp_payment["id"], row.status, status)
+        to_update[status].append(payment_id)
+        if status != PaymentStatus.PENDING and not dry_run:
+            release_checkout(db, row.checkout_key)
+        if status == PaymentStatus.APPROVED:
+            bookings_to_confirm[row.booking_id] = (payment_id, mp_payment["id"])
+        elif status == PaymentStatus.REJECTED:
+            bookings_to_cancel.append(row.booking_id)
+
+    if dry_run:
+        return
+
+    deltas = RollupDeltas()
+    for status, ids in to_update.items():
+        if ids:
+            values = {"status": status}
+            if status != PaymentStatus.PENDING:
+                values["checkout_key"] = None
+            if status == PaymentStatus.APPROVED:
+                values["approved_at"] = datetime.utcnow()
+            # Approved payments are never touched, so only new approvals change the revenue rollup
+            rows = db.execute(
+                update(Payment)
+                .where(Payment.id.in_(ids), Payment.status != PaymentStatus.APPROVED)
+                .values(**values)
+                .returning(Payment.approved_at, Payment.amount_ars)
+            )
+            for approved_at, amount_ars in rows:
+                deltas.add(payment_contribution(approved_at, status, amount_ars))
+    # Only bookings still waiting on their deposit are moved automatically, and
+    # a paid booking is confirmed only if its slot is still free.
+    reserved = []
+    if bookings_to_confirm:
+        bookings = (
+            db.query(Booking)
+            .options(joinedload(Booking.event))
+            .filter(Booking.id.in_(bookings_to_confirm.keys()))
+            .all()
+        )
+        candidates = [booking for booking in bookings if booking.status == BookingStatus.PENDING_DEPOSIT]
+        for booking in bookings:
+            if booking.status == BookingStatus.CANCELLED:
+                # Money taken for a booking that is gone; needs a refund or a manual rebooking
+                payment_id, mp_payment_id = bookings_to_confirm[booking.id]
+                report.add("approved_on_cancelled_booking", payment_id, mp_payment_id,
+                           remote_status=PaymentStatus.APPROVED, detail=f"booking {booking.id}")
+        try:
+            reserved, rejected = reserve_slots(db, candidates)
+        except SlotConflictError:
+            # Someone confirmed an overlapping booking meanwhile; retry one by one,
+            # each in its own savepoint, so only the bookings that clash are left out.
+            # The exclusion constraint also catches overlaps within this batch here.
+            reserved, rejected = [], {}
+            for booking in candidates:
+                try:
+                    fit, clashes = reserve_slots(db, [booking])
+                except SlotConflictError:
+                    fit, clashes = [], {booking.id: []}
+                reserved += fit
+                rejected.update(clashes)
+        for booking_id, overlapping in rejected.items():
+            report.add("booking_conflict", detail=f"booking {booking_id} overlaps {overlapping}")
+    if bookings_to_cancel:
+        # A rejected attempt only cancels the booking if no other payment of it
+        # went through or may still go through
+        paying = bookings_with_live_payments(db, bookings_to_cancel)
+        for booking_id in sorted(paying):
+            report.add("cancel_skipped", detail=f"booking {booking_id} has other approved or pending payments")
+        bookings_to_cancel = [booking_id for booking_id in bookings_to_cancel if booking_id not in paying]
+    for booking_status, ids in ((BookingStatus.CONFIRMED, [booking.id for booking in reserved]),
+                                (BookingStatus.CANCELLED, bookings_to_cancel)):
+        if ids:
+            values = {"status": booking_status, "version": Booking.version + 1}
+            if booking_status == BookingStatus.CONFIRMED:
+                values["confirmed_at"] = datetime.utcnow()
+            rows = db.execute(
+                update(Booking)
+                .where(Booking.id.in_(ids), Booking.status == BookingStatus.PENDING_DEPOSIT)
+                .values(**values)
+                .returning(Booking.confirmed_at, Booking.total_price_ars)
+            )
+            for confirmed_at, total_price_ars in rows:
+                deltas.add(booking_contribution(confirmed_at, booking_status, total_price_ars))
+    deltas.apply(db)
+    entries = index_entries(reserved)
+    db.commit()
+    publish_reserved(entries)
+
+
+def reconcile_payments(
+    db: Session,
+    gateway: MercadoPagoClient,
+    since: datetime,
+    until: datetime,
+    report: ReconciliationReport | None = None,
+    batch_size: int = 500,
+    dry_run: bool = False,
+) -> ReconciliationReport:
+    report = report or ReconciliationReport()
+    windows = iter_remote_payments(gateway, since, until)
+    for batch in batched(dedupe(windows), batch_size):
+        reconcile_batch(db, batch, report, dry_run=dry_run)
+    return report
+
+
+def run_reconciliation(days: int, dry_run: bool = False, out: TextIO | None = None) -> dict:
+    until = datetime.now(timezone.utc)
+    since = until - timedelta(days=days)
+    db = SessionLocal()
+    try:
+        report = reconcile_payments(db, get_payment_gateway(), since, until,
+                                    ReconciliationReport(out), dry_run=dry_run)
+    finally:
+        db.close()
+    return report.summary()
+
+
+async def reconciliation_loop():
+    while True:
+        await asyncio.sleep(settings.reconcile_interval_minutes * 60)
+        try:
+            summary = await run_in_threadpool(run_reconciliation, settings.reconcile_lookback_days)
+            print(f"Payment reconciliation finished: {summary}")
+        except PaymentGatewayError as e:
+            print(f"Payment reconciliation skipped, gateway error: {e}")
+        except Exception as e:
+            print(f"Payment reconciliation failed: {e}")
@@ -0,0 +1,221 @@
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import String, cast, delete, event as orm_event, func, inspect, insert, literal, select, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from core.notify import notification_hub
+from models.event import Booking, BookingStatus, Lead, LeadStatus, Payment, PaymentStatus
+from models.report import DailyBookingTotal, DailyLeadCount, DailyRevenue
+
+# A contribution is (rollup model, primary key values, {column: amount})
+Contribution = tuple[type, tuple, dict[str, int]]
+
+# Days whose booking or revenue rollups changed, as {"days": [iso dates]};
+# no days means everything may have changed
+REVENUE_CHANNEL = "report_revenue"
+
+
+def _day(value: datetime | date | None) -> date | None:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def lead_contribution(created_at: datetime | None, status: LeadStatus | None) -> Contribution | None:
+    if created_at is None or status is None:
+        return None
+    return DailyLeadCount, (_day(created_at), status), {"count": 1}
+
+
+def booking_contribution(confirmed_at: datetime | None, status: BookingStatus | None,
+                         total_price_ars: int | None) -> Contribution | None:
+    if status != BookingStatus.CONFIRMED or confirmed_at is None:
+        return None
+    return DailyBookingTotal, (_day(confirmed_at),), {"confirmed": 1, "value_ars": total_price_ars or 0}
+
+
+def payment_contribution(approved_at: datetime | None, status: PaymentStatus | None,
+                         amount_ars: int | None) -> Contribution | None:
+    if status != PaymentStatus.APPROVED or approved_at is None:
+        return None
+    return DailyRevenue, (_day(approved_at),), {"payments": 1, "amount_ars": amount_ars or 0}
+
+
+class RollupDeltas:
+    """Collects before/after contributions of changed rows and applies the net change."""
+
+    def __init__(self):
+        self.deltas: dict[tuple[type, tuple], dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, contribution: Contribution | None, sign: int = 1):
+        if contribution is None:
+            return
+        model, key, values = contribution
+        bucket = self.deltas[(model, key)]
+        for column, amount in values.items():
+            bucket[column] += sign * amount
+
+    def change(self, before: Contribution | None, after: Contribution | None):
+        self.add(before, -1)
+        self.add(after, 1)
+
+    def apply(self, db: Session):
+        """Adds the net changes to the rollups inside the caller's transaction."""
+        rows: dict[type, list[dict]] = defaultdict(list)
+        # Fixed order, so concurrent transactions lock rollup rows alike
+        for (model, key), values in sorted(self.deltas.items(), key=lambda item: (item[0][0].__tablename__, item[0][1])):
+            if any(values.values()):
+                key_columns = [column.name for column in model.__table__.primary_key.columns]
+                rows[model].append({**dict(zip(key_columns, key)), **values})
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        for model, model_rows in rows.items():
+            statement = dialect.insert(model).values(model_rows)
+            db.execute(statement.on_conflict_do_update(
+                index_elements=list(model.__table__.primary_key.columns),
+                set_={
+                    column: getattr(model, column) + getattr(statement.excluded, column)
+                    for column in model_rows[0] if column not in model.__table__.primary_key.columns
+                },
+            ))
+        revenue_days = {row["day"].isoformat() for model in (DailyBookingTotal, DailyRevenue) for row in rows.get(model, [])}
+        if revenue_days:
+            notification_hub.publish(db, REVENUE_CHANNEL, {"days": sorted(revenue_days)})
+        self.deltas.clear()
+
+
+# Columns each rollup contribution is computed from, in argument order
+TRACKED_COLUMNS = {
+    Lead: ("created_at", "status"),
+    Booking: ("confirmed_at", "status", "total_price_ars"),
+    Payment: ("approved_at", "status", "amount_ars"),
+}
+CONTRIBUTIONS = {Lead: lead_contribution, Booking: booking_contribution, Payment: payment_contribution}
+
+
+def _load_previous(target, value, oldvalue, initiator):
+    pass
+
+
+# Active history loads the committed value before a set on an expired or
+# unloaded attribute, so the previous contribution is known after commits
+for _model, _names in TRACKED_COLUMNS.items():
+    for _name in _names:
+        orm_event.listen(getattr(_model, _name), "set", _load_previous, active_history=True)
+
+
+def _contribution(obj, previous: bool = False) -> Contribution | None:
+    model = type(obj)
+    if previous:
+        state = inspect(obj)
+        # Columns that were not set may still be expired; load_history fetches them
+        histories = [getattr(state.attrs, name).load_history() for name in TRACKED_COLUMNS[model]]
+        values = [(h.deleted or h.unchanged or [None])[0] for h in histories]
+    else:
+        values = [getattr(obj, name) for name in TRACKED_COLUMNS[model]]
+    return CONTRIBUTIONS[model](*values)
+
+
+@orm_event.listens_for(Session, "before_flush")
+def _stamp_transitions(session, flush_context, instances):
+    # The rollup day is when the row got there; set before the INSERT/UPDATE is emitted
+    now = datetime.utcnow()
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Lead) and obj.created_at is None:
+            obj.created_at = now
+        elif isinstance(obj, Booking) and obj.status == BookingStatus.CONFIRMED and obj.confirmed_at is None:
+            obj.confirmed_at = now
+        elif isinstance(obj, Payment) and obj.status == PaymentStatus.APPROVED and obj.approved_at is None:
+            obj.approved_at = now
+
+
+@orm_event.listens_for(Session, "after_flush")
+def _roll_up_changes(session, flush_context):
+    # Covers ORM writes; set-based UPDATEs record their own changes with RollupDeltas
+    deltas = RollupDeltas()
+    for obj in session.new:
+        if type(obj) in TRACKED_COLUMNS:
+            deltas.add(_contribution(obj))
+    for obj in session.deleted:
+        if type(obj) in TRACKED_COLUMNS:
+            deltas.add(_contribution(obj, previous=True), -1)
+    for obj in session.dirty:
+        if type(obj) not in TRACKED_COLUMNS:
+            continue
+        state = inspect(obj)
+        if any(getattr(state.attrs, name).history.has_changes() for name in TRACKED_COLUMNS[type(obj)]):
+            deltas.change(_contribution(obj, previous=True), _contribution(obj))
+    if deltas.deltas:
+        deltas.apply(session)
+
+
+def rebuild_rollups(db: Session):
+    """Recomputes every rollup from the source tables, e.g. after writes that bypassed the app."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Holds off writers until the new totals are committed
+        db.execute(text("LOCK TABLE leads, bookings, payments IN SHARE MODE"))
+    for model in (DailyLeadCount, DailyBookingTotal, DailyRevenue):
+        db.execute(delete(model))
+    lead_day = func.date(Lead.created_at)
+    db.execute(insert(DailyLeadCount).from_select(
+        ["day", "status", "count"],
+        select(lead_day, Lead.status, func.count())
+        .where(Lead.created_at.is_not(None))
+        .group_by(lead_day, Lead.status),
+    ))
+    booking_day = func.date(Booking.confirmed_at)
+    db.execute(insert(DailyBookingTotal).from_select(
+        ["day", "confirmed", "value_ars"],
+        select(booking_day, func.count(), func.coalesce(func.sum(Booking.total_price_ars), 0))
+        .where(Booking.status == BookingStatus.CONFIRMED, Booking.confirmed_at.is_not(None))
+        .group_by(booking_day),
+    ))
+    payment_day = func.date(Payment.approved_at)
+    db.execute(insert(DailyRevenue).from_select(
+        ["day", "payments", "amount_ars"],
+        select(payment_day, func.count(), func.coalesce(func.sum(Payment.amount_ars), 0))
+        .where(Payment.status == PaymentStatus.APPROVED, Payment.approved_at.is_not(None))
+        .group_by(payment_day),
+    ))
+    notification_hub.publish(db, REVENUE_CHANNEL)
+    db.commit()
+
+
+def overview(db: Session, start: date | None = None, end: date | None = None) -> dict:
+    """Sums the daily buckets in [start, end]; open ends mean all history."""
+    def in_range(model):
+        conditions = []
+        if start:
+            conditions.append(model.day >= start)
+        if end:
+            conditions.append(model.day <= end)
+        return conditions
+
+    # One round trip: (bucket, status name, first sum, second sum) rows
+    rows = db.execute(union_all(
+        select(literal("leads"), cast(DailyLeadCount.status, String), func.sum(DailyLeadCount.count), literal(0))
+        .where(*in_range(DailyLeadCount))
+        .group_by(DailyLeadCount.status),
+        select(literal("bookings"), literal(""), func.sum(DailyBookingTotal.confirmed), func.sum(DailyBookingTotal.value_ars))
+        .where(*in_range(DailyBookingTotal)),
+        select(literal("revenue"), literal(""), func.sum(DailyRevenue.payments), func.sum(DailyRevenue.amount_ars))
+        .where(*in_range(DailyRevenue)),
+    )).all()
+    leads_by_status = {status.value: 0 for status in LeadStatus}
+    totals = {"bookings": (0, 0), "revenue": (0, 0)}
+    for bucket, status, first, second in rows:
+        if bucket == "leads":
+            leads_by_status[LeadStatus[status].value] = int(first or 0)
+        else:
+            totals[bucket] = (int(first or 0), int(second or 0))
+    confirmed, booked = totals["bookings"]
+    payments, revenue_cents = totals["revenue"]
+    return {
+        "start": start,
+        "end": end,
+        "total_leads": sum(leads_by_status.values()),
+        "leads_by_status": leads_by_status,
+        "confirmed_bookings": int(confirmed),
+        "booked_value_ars": int(booked),
+        "approved_payments": int(payments),
+        "total_revenue": int(revenue_cents) / 100,
+    }
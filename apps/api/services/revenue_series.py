@@ -0,0 +1,152 @@
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, DateTime, cast, func, literal, literal_column, select, union_all
+from sqlalchemy.orm import Session
+
+from core.cache import TTLCache
+from core.config import settings
+from core.notify import notification_hub
+from models.report import DailyBookingTotal, DailyRevenue
+from services.report_rollups import REVENUE_CHANNEL
+
+GRANULARITIES = ("day", "week", "month")
+# Longest series one request may ask for
+MAX_BUCKETS = 1000
+DEFAULT_BUCKETS = {"day": 30, "week": 12, "month": 12}
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday()) # Monday, as date_trunc('week')
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+
+def bucket_starts(start: date, end: date, granularity: str) -> list[date]:
+    starts = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        starts.append(current)
+        current = next_bucket(current, granularity)
+    return starts
+
+
+def _bucket_column(db: Session, day_column, granularity: str):
+    if granularity == "day":
+        return day_column
+    if db.get_bind().dialect.name == "postgresql":
+        # Inlined (granularity is one of GRANULARITIES) so SELECT and GROUP BY are the same expression
+        return cast(func.date_trunc(literal_column(f"'{granularity}'"), cast(day_column, DateTime)), Date)
+    # SQLite: same buckets via date modifiers ('weekday 0' is the next Sunday, or the day itself)
+    if granularity == "week":
+        return func.date(day_column, literal_column("'weekday 0'"), literal_column("'-6 days'"))
+    return func.date(day_column, literal_column("'start of month'"))
+
+
+def query_buckets(db: Session, granularity: str, start: date, end: date) -> dict[date, dict]:
+    """Sums the daily rollups into buckets for [start, end), in one query."""
+    def grouped(model, kind, count_column, amount_column):
+        bucket = _bucket_column(db, model.day, granularity).label("bucket")
+        return (
+            select(literal(kind), bucket, func.sum(count_column), func.sum(amount_column))
+            .where(model.day >= start, model.day < end)
+            .group_by(bucket)
+        )
+
+    buckets: dict[date, dict] = {}
+    for kind, bucket, count, amount in db.execute(union_all(
+        grouped(DailyRevenue, "revenue", DailyRevenue.payments, DailyRevenue.amount_ars),
+        grouped(DailyBookingTotal, "bookings", DailyBookingTotal.confirmed, DailyBookingTotal.value_ars),
+    )):
+        if isinstance(bucket, str): # SQLite returns date() results as text
+            bucket = date.fromisoformat(bucket)
+        point = buckets.setdefault(bucket, empty_point())
+        if kind == "revenue":
+            point["approved_payments"] = int(count or 0)
+            point["revenue"] = int(amount or 0) / 100
+        else:
+            point["confirmed_bookings"] = int(count or 0)
+            point["booked_value_ars"] = int(amount or 0)
+    return buckets
+
+
+def empty_point() -> dict:
+    return {"approved_payments": 0, "revenue": 0.0, "confirmed_bookings": 0, "booked_value_ars": 0}
+
+
+class RevenueSeriesCache:
+    """Per-bucket cache of the revenue series, keyed by (granularity, bucket start).
+
+    A payment or booking write evicts the buckets containing the days it
+    changed (on every worker, via the notification hub), so closed periods
+    stay cached until their numbers actually move. The bucket that contains
+    today gets a short TTL as well, as a safety net.
+    """
+
+    def __init__(self, ttl: float, current_ttl: float):
+        self.current_ttl = current_ttl
+        self._buckets = TTLCache(ttl=ttl, maxsize=len(GRANULARITIES) * MAX_BUCKETS * 2)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def series(self, db: Session, granularity: str, start: date, end: date, today: date | None = None) -> dict:
+        starts = bucket_starts(start, end, granularity)
+        points = {s: self._buckets.get((granularity, s)) for s in starts}
+        missing = [s for s, point in points.items() if point is None]
+        if missing:
+            # One query over the span of missing buckets; cached ones inside it are refreshed too
+            version = self._version
+            fetched = query_buckets(db, granularity, missing[0], next_bucket(missing[-1], granularity))
+            current = bucket_start(today or datetime.utcnow().date(), granularity)
+            with self._lock:
+                # Skipped if a write invalidated buckets while we were querying
+                store = version == self._version
+                for s in starts:
+                    if missing[0] <= s <= missing[-1]:
+                        points[s] = fetched.get(s) or empty_point()
+                        if store:
+                            self._buckets.set((granularity, s), points[s], ttl=self.current_ttl if s >= current else None)
+        return {
+            "granularity": granularity,
+            "start": starts[0],
+            "end": end,
+            "points": [dict(points[s], period=s) for s in starts],
+            "cached_buckets": len(starts) - len(missing),
+        }
+
+    def invalidate(self, payload: dict | None = None):
+        days = (payload or {}).get("days")
+        with self._lock:
+            self._version += 1
+            if not days:
+                self._buckets.clear()
+                return
+            for day in {date.fromisoformat(day) for day in days}:
+                for granularity in GRANULARITIES:
+                    self._buckets.pop((granularity, bucket_start(day, granularity)))
+
+
+revenue_series_cache = RevenueSeriesCache(
+    settings.revenue_series_ttl_seconds,
+    settings.revenue_series_current_ttl_seconds,
+)
+notification_hub.subscribe(REVENUE_CHANNEL, revenue_series_cache.invalidate)
+
+
+def default_range(granularity: str, end: date | None = None) -> tuple[date, date]:
+    # Rollup days are UTC, like the timestamps they come from
+    end = end or datetime.utcnow().date()
+    start = bucket_start(end, granularity)
+    for _ in range(DEFAULT_BUCKETS[granularity] - 1):
+        start = bucket_start(start - timedelta(days=1), granularity)
+    return start, end
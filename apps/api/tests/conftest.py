@@ -0,0 +1,19 @@
+import os
+import tempfile
+
+# Before anything imports core.db: tests never touch a configured database
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'karina-api-tests.db')}"
+
+import pytest
+
+import models  # noqa: F401 (registers the tables and their flush hooks)
+from core.db import Base, SessionLocal, engine
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
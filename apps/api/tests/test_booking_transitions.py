@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from models.event import Booking, Event, Payment, PaymentStatus
+from models.user import User, UserRole
+from services.booking_transitions import bookings_with_live_payments
+
+
+def booking(db, *payment_statuses):
+    client = User(email=f"client{db.query(User).count()}@example.com", hashed_password="x", role=UserRole.CLIENT)
+    event = Event(date=datetime(2026, 11, 7, 22), duration_hours=4)
+    booking = Booking(client=client, event=event, total_price_ars=100_000)
+    db.add_all([client, event, booking])
+    db.flush()
+    payments = [Payment(booking_id=booking.id, amount_ars=30_000, status=status) for status in payment_statuses]
+    db.add_all(payments)
+    db.commit()
+    return booking, payments
+
+
+def test_only_bookings_with_other_approved_or_pending_payments_are_live(db):
+    paid, _ = booking(db, PaymentStatus.REJECTED, PaymentStatus.APPROVED)
+    retrying, _ = booking(db, PaymentStatus.REJECTED, PaymentStatus.PENDING)
+    failed, _ = booking(db, PaymentStatus.REJECTED, PaymentStatus.REJECTED)
+    assert bookings_with_live_payments(db, [paid.id, retrying.id, failed.id]) == {paid.id, retrying.id}
+
+
+def test_excluded_payments_do_not_keep_a_booking_live(db):
+    single, [payment] = booking(db, PaymentStatus.PENDING)
+    assert bookings_with_live_payments(db, [single.id], [payment.id]) == set()
+    assert bookings_with_live_payments(db, []) == set()
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from core.notify import notification_hub
+from models.event import Event
+from services.calendar import CALENDAR_CHANNEL, calendar_service
+
+
+def test_event_writes_are_announced_with_their_months(db):
+    calendar_service.load_all(db)
+    event = Event(date=datetime(2026, 11, 7, 22), duration_hours=4)
+    db.add(event)
+    db.flush()
+    assert db.info["notifications"] == [(CALENDAR_CHANNEL, {"months": [(2026, 11)]})]
+    db.commit()
+    assert [e["id"] for e in calendar_service.get_month((2026, 11)).events] == [event.id]
+
+
+def test_another_worker_announcement_marks_the_month_dirty(db):
+    calendar_service.load_all(db)
+    # Written by "another worker": no notification is queued on this session
+    db.execute(Event.__table__.insert().values(date=datetime(2026, 12, 24, 21), duration_hours=5))
+    db.commit()
+    assert calendar_service.get_month((2026, 12)).events == []
+
+    # JSON turns the month tuples into lists on the way
+    notification_hub.dispatch(CALENDAR_CHANNEL, {"months": [[2026, 12]]})
+    assert len(calendar_service.get_month((2026, 12)).events) == 1
+
+
+def test_agenda_page_has_its_own_etag(db):
+    calendar_service.load_all(db)
+    bucket = calendar_service.get_month((2026, 11))
+    assert bucket.html_etag.startswith('"') and bucket.html_etag != bucket.etag
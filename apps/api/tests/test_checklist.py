@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from models.event import Event
+from models.inventory import ChecklistItem, Equipment, EquipmentStatus
+from services.checklist import CHECK_IN, CHECK_OUT, CHECKED_IN, CHECKED_OUT, NOT_FOUND, ChecklistScanner
+from services.equipment import allocate_equipment, assignment_entries, equipment_index, publish_assignments
+
+
+def allocate(db, requirements):
+    event = Event(date=datetime(2026, 11, 7, 22), duration_hours=4)
+    db.add(event)
+    db.commit()
+    equipment_index.rebuild(db)
+    assignments = allocate_equipment(db, event, requirements)
+    entries = assignment_entries(assignments)
+    db.commit()
+    publish_assignments(entries)
+    return event
+
+
+def statuses(db):
+    db.expire_all()
+    return {equipment.name: equipment.status for equipment in db.query(Equipment)}
+
+
+def test_allocation_creates_one_checklist_item_per_assignment(db):
+    db.add_all([Equipment(name="Parlante JBL", category="Audio"), Equipment(name="Mic", category="Audio")])
+    db.commit()
+    allocate(db, {"Audio": 2})
+    assert sorted(item.name for item in db.query(ChecklistItem)) == ["Mic", "Parlante JBL"]
+
+
+def test_allocated_equipment_can_be_scanned_out_and_in(db):
+    db.add_all([
+        Equipment(name="Parlante JBL", category="Audio"),
+        Equipment(name="Mic", category="Audio"),
+        Equipment(name="Luz LED", category="Luces"),
+    ])
+    db.commit()
+    event = allocate(db, {"Audio": 2})
+
+    scanner = ChecklistScanner(db, event.id)
+    results = scanner.apply(CHECK_OUT, ["parlante jbl", "Mic", "Luz LED"])
+    assert [r["result"] for r in results] == [CHECKED_OUT, CHECKED_OUT, NOT_FOUND]
+    assert statuses(db) == {
+        "Parlante JBL": EquipmentStatus.IN_USE,
+        "Mic": EquipmentStatus.IN_USE,
+        "Luz LED": EquipmentStatus.AVAILABLE,
+    }
+
+    # A fresh scanner (another request) sees the checked-out items too
+    scanner = ChecklistScanner(db, event.id)
+    results = scanner.apply(CHECK_IN, ["Parlante JBL"])
+    assert [r["result"] for r in results] == [CHECKED_IN]
+    assert statuses(db)["Parlante JBL"] == EquipmentStatus.AVAILABLE
+    assert statuses(db)["Mic"] == EquipmentStatus.IN_USE
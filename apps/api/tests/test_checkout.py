@@ -0,0 +1,19 @@
+from core.notify import notification_hub
+from services.checkout import CHECKOUT_CHANNEL, checkout_cache, release_checkout
+
+
+def test_released_checkout_is_announced_to_other_workers(db):
+    release_checkout(db, "1:deposit:3000000")
+    assert db.info["notifications"] == [(CHECKOUT_CHANNEL, {"key": "1:deposit:3000000"})]
+
+
+def test_announcements_drop_the_cached_checkout(db):
+    checkout_cache.set("1:deposit:3000000", {"payment_id": 1})
+    checkout_cache.set("2:deposit:3000000", {"payment_id": 2})
+    notification_hub.dispatch(CHECKOUT_CHANNEL, {"key": "1:deposit:3000000"})
+    assert checkout_cache.get("1:deposit:3000000") is None
+    assert checkout_cache.get("2:deposit:3000000") == {"payment_id": 2}
+
+    # After a listener reconnect every cached checkout is suspect
+    notification_hub.dispatch(CHECKOUT_CHANNEL, None)
+    assert len(checkout_cache) == 0
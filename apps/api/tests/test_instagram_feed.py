@@ -0,0 +1,103 @@
+import pytest
+
+from scripts.fake_instagram import FakeInstagramServer
+from services.instagram_feed import InstagramFeed, retry_delay
+
+TOKEN = "test-token"
+
+
+@pytest.fixture
+def server():
+    with FakeInstagramServer() as server:
+        yield server
+
+
+@pytest.fixture
+def feed(server, tmp_path):
+    feed = InstagramFeed(TOKEN, base_url=server.base_url, timeout=0.5, snapshot_path=str(tmp_path / "feed.json"))
+    yield feed
+    feed.close()
+
+
+def inject_faults(server, **faults):
+    with server.state.lock:
+        for name, value in faults.items():
+            setattr(server.state, name, value)
+
+
+def test_refresh_replaces_snapshot(feed):
+    assert feed.refresh()
+    posts = feed.posts()
+    assert len(posts) == 6
+    # Videos are shown with their cover image
+    assert posts[2]["media_url"].endswith("text=Video3")
+    assert feed.failures == 0
+    assert feed.snapshot.fetched_at is not None
+
+
+@pytest.mark.parametrize("status", [500, 503])
+def test_server_error_keeps_previous_snapshot(feed, server, status):
+    assert feed.refresh()
+    snapshot = feed.snapshot
+    inject_faults(server, fail_next=1, fail_status=status)
+
+    assert not feed.refresh()
+    assert feed.snapshot is snapshot
+    assert feed.failures == 1
+    assert str(status) in feed.last_error
+
+
+def test_timeout_keeps_previous_snapshot(feed, server):
+    assert feed.refresh()
+    snapshot = feed.snapshot
+    inject_faults(server, latency_seconds=1.0)
+
+    assert not feed.refresh()
+    assert feed.snapshot is snapshot
+    assert feed.failures == 1
+    assert TOKEN not in feed.last_error
+
+
+def test_recovery_resets_failures(feed, server):
+    inject_faults(server, fail_next=2)
+    assert not feed.refresh()
+    assert not feed.refresh()
+    assert feed.failures == 2
+    assert feed.posts() == []
+
+    assert feed.refresh()
+    assert feed.failures == 0
+    assert feed.last_error is None
+    assert len(feed.posts()) == 6
+    assert feed.status()["consecutive_failures"] == 0
+
+
+def test_load_snapshot_after_restart(feed, server, tmp_path):
+    assert feed.refresh()
+    # A new process, with the API unreachable: readers still get the saved posts
+    restarted = InstagramFeed(TOKEN, base_url="http://127.0.0.1:9", timeout=0.5,
+                              snapshot_path=str(tmp_path / "feed.json"))
+    restarted.load_snapshot()
+    assert restarted.posts() == feed.posts()
+    assert restarted.snapshot.fetched_at == feed.snapshot.fetched_at
+    assert not restarted.refresh()
+    assert restarted.posts() == feed.posts()
+    restarted.close()
+
+
+def test_unreadable_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "feed.json"
+    path.write_text("not json", encoding="utf-8")
+    feed = InstagramFeed(TOKEN, snapshot_path=str(path))
+    feed.load_snapshot()
+    assert feed.posts() == []
+
+
+@pytest.mark.parametrize("failures", [0, 1, 2, 3, 5, 10, 50])
+def test_retry_delay_bounds(failures):
+    base, cap = 5.0, 300.0
+    expected = min(cap, base * 2 ** max(failures - 1, 0))
+    for _ in range(200):
+        delay = retry_delay(failures, base, cap)
+        assert expected / 2 <= delay <= expected
+        assert delay <= cap
@@ -0,0 +1,40 @@
+from sqlalchemy import event
+
+from core.db import engine
+from models.event import Lead, LeadStatus
+from services.lead_search import LeadFilters, search_leads
+
+
+def add_leads(db):
+    db.add_all([
+        Lead(contact_name="Ana", contact_email="ana@example.com", source="instagram", message="Boda en Palermo"),
+        Lead(contact_name="Beto", contact_email="beto@example.com", source="web", message="Cumple de 15"),
+        Lead(contact_name="Caro", contact_email="caro@example.com", source="web", message="Boda en San Isidro",
+             status=LeadStatus.QUOTED),
+        Lead(contact_name="Dani", contact_email="dani@example.com", source="instagram", message="Boda civil"),
+    ])
+    db.commit()
+
+
+def test_page_and_facets_come_from_one_statement(db):
+    add_leads(db)
+    statements = []
+
+    def record(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        leads, next_cursor, facets = search_leads(
+            db, LeadFilters(status=[LeadStatus.NEW], q="boda"), limit=1, facets=True)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert len(statements) == 1
+    assert [lead.contact_name for lead in leads] == ["Dani"]
+    # Each facet ignores its own filter
+    assert facets == {"status": {"new": 2, "quoted": 1}, "source": {"instagram": 2}}
+
+    leads, next_cursor, facets = search_leads(
+        db, LeadFilters(status=[LeadStatus.NEW], q="boda"), cursor=next_cursor, limit=1)
+    assert [lead.contact_name for lead in leads] == ["Ana"]
+    assert next_cursor is None and facets is None
@@ -0,0 +1,27 @@
+import pytest
+
+from services.payment_gateway import CircuitBreaker, GatewayUnavailableError, MercadoPagoClient
+
+
+class BrokenSession:
+    def request(self, *args, **kwargs):
+        raise RuntimeError("not a requests error")
+
+
+def test_unexpected_error_in_the_trial_call_frees_the_trial_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    client = MercadoPagoClient("token", breaker=breaker)
+    client.session = BrokenSession()
+
+    for _ in range(2):
+        # Half-open each time: if the first trial had kept its slot, the
+        # second call would fail fast with GatewayUnavailableError instead
+        with pytest.raises(RuntimeError):
+            client.get_payment(1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.record_failure()
+    breaker.reset_timeout = 60
+    with pytest.raises(GatewayUnavailableError):
+        client.get_payment(1)
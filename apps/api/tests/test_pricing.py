@@ -0,0 +1,36 @@
+from datetime import date
+
+import pytest
+from pydantic import ValidationError
+
+from models.catalog import Package, PricingRule
+from routers.catalog import PricingRuleBase
+from services.pricing import PricingEngine, PricingRuleError, compile_condition, compile_rule, pricing_context
+
+
+def engine(*rules: PricingRule) -> PricingEngine:
+    return PricingEngine({1: Package(id=1, name="Fiesta", base_price_ars=100_000)}, {},
+                         [compile_rule(rule) for rule in rules])
+
+
+def test_adjustment_percentage_is_a_percent():
+    surcharge = PricingRule(id=1, version=1, name="Sábados", condition='day_of_week == "saturday"',
+                            adjustment_percentage=15, adjustment_fixed_ars=0)
+    discount = PricingRule(id=2, version=1, name="Promo", condition=None,
+                           adjustment_percentage=-10, adjustment_fixed_ars=5_000)
+    result = engine(surcharge, discount).price(pricing_context(date(2026, 11, 7), package_id=1))
+    assert result["subtotal_ars"] == 100_000
+    assert [rule["adjustment_ars"] for rule in result["applied_rules"]] == [15_000, -5_000]
+    assert result["total_ars"] == 110_000
+
+
+@pytest.mark.parametrize("value", [-150, 150])
+def test_adjustment_percentage_out_of_range_is_rejected(value):
+    with pytest.raises(ValidationError):
+        PricingRuleBase(name="Typo", adjustment_percentage=value)
+
+
+@pytest.mark.parametrize("condition", ['num_guests > -"a"', "num_guests > -None", "num_guests > -True"])
+def test_only_numbers_can_be_negated(condition):
+    with pytest.raises(PricingRuleError):
+        compile_condition(condition)